@@ -1,7 +1,9 @@
 module.exports = {
   apps: [{
     name: 'kcislk-api',
-    script: 'run_server.py',
+    // gunicorn master 管理多個 worker，pm2 只需啟動單一 master
+    script: '/opt/kcislk-timetable/backend/venv/bin/gunicorn',
+    args: '-c gunicorn.conf.py wsgi:app',
     cwd: '/opt/kcislk-timetable/backend',
     interpreter: '/opt/kcislk-timetable/backend/venv/bin/python',
     instances: 1,
@@ -14,6 +16,8 @@ module.exports = {
       FLASK_DEBUG: 'false',
       PORT: '8081',
       PYTHONPATH: '/opt/kcislk-timetable/backend',
+      GUNICORN_WORKERS: '4',
+      GUNICORN_THREADS: '4',
     },
 
     // Environment variables for staging
@@ -23,6 +27,8 @@ module.exports = {
       FLASK_DEBUG: 'true',
       PORT: '8082',
       PYTHONPATH: '/opt/kcislk-timetable/backend',
+      GUNICORN_WORKERS: '2',
+      GUNICORN_THREADS: '4',
     },
 
     // Logging
@@ -0,0 +1,36 @@
+"""
+gunicorn 正式環境設定（於 timetable_api 目錄下執行）：
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+- preload_app：在 master 行程載入 app 並建立課表快照，fork 後各 worker 以 copy-on-write 共用
+- worker 與執行緒數量由環境變數 GUNICORN_WORKERS、GUNICORN_THREADS 設定
+- 各 worker 透過資料庫旁的版本檔共用資料版本（SHARED_DATA_VERSION），
+  任一 worker 異動資料後，其他 worker 的回應快取失效並重建快照
+"""
+import gc
+import multiprocessing
+import os
+
+os.environ.setdefault('SHARED_DATA_VERSION', '1')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('GUNICORN_WORKERS', min(multiprocessing.cpu_count() * 2, 4)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def when_ready(server):
+    """fork worker 前：關閉 master 的資料庫連線，並凍結現有物件避免 GC 寫入共用的記憶體分頁"""
+    from src.main import app
+    from src.models.timetable import db
+
+    with app.app_context():
+        db.engine.dispose()
+    gc.freeze()
+    server.log.info(f'✅ 已預先載入課表快照，啟動 {workers} 個 worker（每個 {threads} 個執行緒）')
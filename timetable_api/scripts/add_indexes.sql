@@ -4,19 +4,23 @@
 -- Created: 2025-11-12
 -- Purpose: Add critical indexes to eliminate full table scans
 -- Expected Impact: 15-20x faster queries
+--
+-- NOTE: 這些索引已宣告在 SQLAlchemy 模型的 __table_args__
+--       (models/student.py, models/timetable.py, models/exam.py)，
+--       新資料庫由 db.create_all() 建立，既有資料庫由啟動時的 upgrade_schema() 補上。
+--       本檔案保留供手動套用；新增索引時請先修改模型。
+--       以 scripts/check_query_plans.py 檢查路由查詢是否仍有全表掃描。
 -- ========================================
 
 -- Students table indexes
 -- Prevents full table scan on student name searches (1,036+ students)
 CREATE INDEX IF NOT EXISTS idx_students_student_name ON students(student_name);
-CREATE INDEX IF NOT EXISTS idx_students_student_id ON students(student_id);
 CREATE INDEX IF NOT EXISTS idx_students_homeroom_class ON students(home_room_class_name);
 CREATE INDEX IF NOT EXISTS idx_students_english_class ON students(english_class_name);
 CREATE INDEX IF NOT EXISTS idx_students_ev_class ON students(ev_myreading_class_name);
 
 -- Timetable table indexes
 -- Prevents full table scan on timetable queries
-CREATE INDEX IF NOT EXISTS idx_timetable_class_name ON timetable(class_name);
 CREATE INDEX IF NOT EXISTS idx_timetable_day_period ON timetable(day, period_number);
 CREATE INDEX IF NOT EXISTS idx_timetable_teacher ON timetable(teacher);
 
@@ -24,8 +28,21 @@ CREATE INDEX IF NOT EXISTS idx_timetable_teacher ON timetable(teacher);
 -- Optimizes student timetable retrieval (used in /api/student/<id>/timetable endpoint)
 CREATE INDEX IF NOT EXISTS idx_timetable_class_day_period ON timetable(class_name, day, period_number);
 
--- Teachers table indexes (if exists)
-CREATE INDEX IF NOT EXISTS idx_teachers_teacher_name ON teachers(teacher_name);
+-- English / Home Room timetable indexes
+-- 學生、教師、班級、教室課表以這些欄位篩選
+CREATE INDEX IF NOT EXISTS idx_english_timetable_class_name ON english_timetable(class_name);
+CREATE INDEX IF NOT EXISTS idx_english_timetable_teacher ON english_timetable(teacher);
+CREATE INDEX IF NOT EXISTS idx_english_timetable_classroom ON english_timetable(classroom);
+CREATE INDEX IF NOT EXISTS idx_homeroom_timetable_class_name ON homeroom_timetable(home_room_class_name);
+CREATE INDEX IF NOT EXISTS idx_homeroom_timetable_teacher ON homeroom_timetable(teacher);
+CREATE INDEX IF NOT EXISTS idx_homeroom_timetable_classroom ON homeroom_timetable(classroom);
+
+-- Exam indexes
+CREATE INDEX IF NOT EXISTS idx_exam_sessions_exam_date ON exam_sessions(exam_date);
+CREATE INDEX IF NOT EXISTS idx_class_exam_info_exam_session_id ON class_exam_info(exam_session_id);
+
+-- students.student_id（主鍵）、teachers.teacher_name（UNIQUE）、timetable.class_name
+-- （idx_timetable_class_day_period 的前綴）已有索引，不另外建立
 
 -- ========================================
 -- Query Performance Analysis
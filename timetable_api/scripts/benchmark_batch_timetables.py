@@ -0,0 +1,105 @@
+"""
+批次課表效能測試
+以暫存資料庫載入實際資料，比較「逐一呼叫 /api/students/<id>/timetable」與
+「一次呼叫 POST /api/students/timetables」取得同一批學生課表的時間（教師亦同），
+並確認兩種方式取得的內容完全相同。每輪開始前清除 GET 回應快取，逐一呼叫不會直接命中快取。
+
+使用方式（於 timetable_api 目錄下執行）：
+    python scripts/benchmark_batch_timetables.py [--runs 5]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用暫存資料庫，避免影響正式資料
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='kcislk-bench-'), 'bench.db')
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from src.main import app
+    from src.response_cache import response_cache
+    from src.snapshot import get_snapshot
+
+
+def per_id(client, urls):
+    """逐一呼叫單筆端點 -> [結果]"""
+    results = []
+    for url in urls:
+        data = client.get(url).get_json()
+        data.pop('success')
+        results.append(data)
+    return results
+
+
+def batched(client, url, body):
+    """呼叫批次端點 -> [結果]"""
+    return json.loads(client.post(url, json=body).get_data())['results']
+
+
+def measure(runs, func):
+    """每輪清除回應快取後執行 -> (中位數秒數, 最後一次結果)"""
+    timings = []
+    result = None
+    for _ in range(runs):
+        response_cache.clear()
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批次課表效能測試')
+    parser.add_argument('--runs', type=int, default=5, help='執行次數')
+    args = parser.parse_args()
+
+    client = app.test_client()
+    with app.app_context():
+        snapshot = get_snapshot()
+        homeroom = max(
+            (name for name, entry in snapshot.class_catalog.items() if entry.class_type == 'homeroom'),
+            key=lambda name: len(snapshot.class_students.get(name, ()))
+        )
+        class_ids = list(snapshot.class_students[homeroom])
+        all_ids = [student['student_id'] for student in snapshot.student_list]
+        teacher_names = list(snapshot.teachers)
+
+    cases = [
+        (f'Home Room {homeroom} 學生', class_ids,
+         [f'/api/students/{student_id}/timetable' for student_id in class_ids],
+         '/api/students/timetables', {'student_ids': class_ids}),
+        ('全部學生', all_ids,
+         [f'/api/students/{student_id}/timetable' for student_id in all_ids],
+         '/api/students/timetables', {'student_ids': all_ids}),
+        ('全部教師', teacher_names,
+         [f'/api/teachers/{quote(name)}/timetable' for name in teacher_names],
+         '/api/teachers/timetables', {'teacher_names': teacher_names}),
+    ]
+
+    failed = False
+    print(f"{'範圍':<24}{'筆數':>6}{'逐一 (ms)':>12}{'批次 (ms)':>12}{'倍數':>8}")
+    for label, keys, urls, batch_url, body in cases:
+        loop_secs, loop_results = measure(args.runs, lambda: per_id(client, urls))
+        batch_secs, batch_results = measure(args.runs, lambda: batched(client, batch_url, body))
+        print(f"{label:<24}{len(keys):>6}{loop_secs * 1000:>12.1f}{batch_secs * 1000:>12.1f}"
+              f"{loop_secs / batch_secs:>7.1f}x")
+        if loop_results != batch_results:
+            print(f"  ❌ {label}：批次結果與逐一呼叫不同")
+            failed = True
+
+    if failed:
+        return 1
+    print("✅ 批次結果與逐一呼叫相同")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+資料載入效能測試
+以暫存資料庫重複執行各個 CSV 載入器，回報每個檔案的載入時間與每秒筆數
+
+使用方式（於 timetable_api 目錄下執行）：
+    python scripts/benchmark_loaders.py [--repeat 5]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用暫存資料庫，避免影響正式資料
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='kcislk-bench-'), 'bench.db')
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from src.main import app
+    from src.data_loader import load_timetable_data
+    from src.data_loader_student import (
+        load_student_data, load_english_timetable_data, load_homeroom_timetable_data
+    )
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+BENCHMARKS = [
+    ('load_timetable_data', 'english_timetable_complete.csv', load_timetable_data),
+    ('load_student_data', 'students_complete.csv', load_student_data),
+    ('load_english_timetable_data', 'english_timetable_complete.csv', load_english_timetable_data),
+    ('load_homeroom_timetable_data', 'homeroom_timetable_complete.csv', load_homeroom_timetable_data),
+]
+
+
+def count_rows(csv_name):
+    return len(pd.read_csv(os.path.join(DATA_DIR, csv_name)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CSV 載入效能測試')
+    parser.add_argument('--repeat', type=int, default=5, help='每個載入器執行次數（取最佳值）')
+    args = parser.parse_args()
+
+    print(f"{'載入器':<32}{'CSV':<36}{'筆數':>8}{'最佳秒數':>12}{'筆/秒':>12}")
+    with app.app_context():
+        for name, csv_name, loader in BENCHMARKS:
+            rows = count_rows(csv_name)
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    success = loader()
+                timings.append(time.perf_counter() - start)
+                if success is False:
+                    print(f"❌ {name} 載入失敗")
+                    return 1
+            best = min(timings)
+            print(f"{name:<32}{csv_name:<36}{rows:>8}{best:>12.4f}{rows / best:>12.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+監考分配批次寫入效能測試
+以暫存資料庫複製班級考試資訊至指定筆數，分別以舊做法（逐筆查詢後新增/更新）
+與 /api/exams/proctors/batch（集合式 upsert）寫入，回報每秒筆數與 SQL 數量。
+
+使用方式（於 timetable_api 目錄下執行）：
+    python scripts/benchmark_proctor_batch.py [--rows 5000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用暫存資料庫，避免影響正式資料
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='kcislk-bench-'), 'bench.db')
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from src.main import app
+    from src.models.timetable import db
+    from src.models.exam import ClassExamInfo, ProctorAssignment
+    from sqlalchemy import event
+
+# 集合式 upsert 的最低目標（筆/秒）
+TARGET_ROWS_PER_SECOND = 10000
+
+
+def prepare_classes(rows):
+    """複製既有班級考試資訊直到至少 rows 筆，並清空監考分配，回傳所有 class_exam_info_id"""
+    ProctorAssignment.query.delete()
+    template = [
+        {column: getattr(info, column) for column in ('class_name', 'grade', 'level', 'exam_session_id', 'students', 'teacher')}
+        for info in ClassExamInfo.query.all()
+    ]
+    copies = []
+    copy = 1
+    while len(template) + len(copies) < rows:
+        copies.extend({**record, 'class_name': f"{record['class_name']} #{copy}"} for record in template)
+        copy += 1
+    if copies:
+        db.session.execute(db.insert(ClassExamInfo), copies)
+    db.session.commit()
+    return [row[0] for row in db.session.query(ClassExamInfo.id).order_by(ClassExamInfo.id).limit(rows)]
+
+
+def legacy_batch(assignments):
+    """舊做法：每筆先查詢既有分配，再新增或更新"""
+    for assignment in assignments:
+        existing = ProctorAssignment.query.filter_by(
+            class_exam_info_id=assignment['class_exam_info_id']
+        ).first()
+        if existing:
+            existing.proctor_teacher = assignment['proctor_teacher']
+            existing.classroom = assignment['classroom']
+            existing.updated_at = datetime.utcnow()
+        else:
+            db.session.add(ProctorAssignment(
+                class_exam_info_id=assignment['class_exam_info_id'],
+                proctor_teacher=assignment['proctor_teacher'],
+                classroom=assignment['classroom'],
+                notes=''
+            ))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='監考分配批次寫入效能測試')
+    parser.add_argument('--rows', type=int, default=5000, help='每批筆數')
+    args = parser.parse_args()
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    client = app.test_client()
+    slowest = float('inf')
+    with app.app_context():
+        ids = prepare_classes(args.rows)
+        assignments = [
+            {'class_exam_info_id': class_exam_info_id, 'proctor_teacher': f'Teacher {i % 80}', 'classroom': f'E{100 + i % 300}'}
+            for i, class_exam_info_id in enumerate(ids)
+        ]
+
+        print(f"{'做法':<28}{'動作':<8}{'筆數':>8}{'秒數':>10}{'筆/秒':>12}{'SQL 數':>10}")
+        event.listen(db.engine, 'before_cursor_execute', count)
+        try:
+            for name, run in (
+                ('逐筆查詢（舊做法）', lambda: legacy_batch(assignments)),
+                ('/api/exams/proctors/batch', lambda: client.post('/api/exams/proctors/batch', json={'assignments': assignments})),
+            ):
+                ProctorAssignment.query.delete()
+                db.session.commit()
+                db.session.expunge_all()
+                for action in ('新增', '更新'):
+                    statements.clear()
+                    start = time.perf_counter()
+                    result = run()
+                    elapsed = time.perf_counter() - start
+                    if hasattr(result, 'get_json') and result.status_code != 200:
+                        print(f"❌ {name} 失敗: {result.get_json()}")
+                        return 1
+                    print(f"{name:<28}{action:<8}{len(ids):>8}{elapsed:>10.3f}{len(ids) / elapsed:>12.0f}{len(statements):>10}")
+                    if hasattr(result, 'get_json'):
+                        slowest = min(slowest, len(ids) / elapsed)
+                    db.session.expunge_all()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count)
+
+        if ProctorAssignment.query.count() != len(ids):
+            print("❌ 監考分配筆數不符")
+            return 1
+        if slowest < TARGET_ROWS_PER_SECOND:
+            print(f"❌ 集合式 upsert {slowest:.0f} 筆/秒，低於目標 {TARGET_ROWS_PER_SECOND} 筆/秒")
+            return 1
+        print(f"✅ 集合式 upsert 達到目標 {TARGET_ROWS_PER_SECOND} 筆/秒")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+監考自動分配效能測試
+以暫存資料庫載入實際資料，重新分配整個學期所有班級（dry run），
+回報求解時間、分配與未分配班級數，並檢查結果沒有容量不足、照常上課或時間重疊的情形。
+
+使用方式（於 timetable_api 目錄下執行）：
+    python scripts/benchmark_proctor_solver.py [--runs 5]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用暫存資料庫，避免影響正式資料
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='kcislk-bench-'), 'bench.db')
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from src.main import app
+    from src.proctor_solver import ProctorSolver, solve_proctor_assignments
+    from src.proctor_conflicts import ConflictIndex, Booking
+
+# 整個學期求解時間上限（毫秒）
+TARGET_MS = 1000
+
+
+def violations(solver, assignments):
+    """檢查分配結果 -> [問題說明]"""
+    problems = []
+    index = ConflictIndex()
+    for assignment in assignments:
+        exam_class = solver.classes[assignment['class_exam_info_id']]
+        booking = Booking(exam_class.slot, None, assignment['proctor_teacher'], assignment['classroom'])
+        if solver.capacities.get(assignment['classroom'], 0) < exam_class.need:
+            problems.append(f"{assignment['class_name']}: {assignment['classroom']} 容量不足")
+        if assignment['proctor_teacher'] in solver._busy(solver.teacher_busy, exam_class):
+            problems.append(f"{assignment['class_name']}: {assignment['proctor_teacher']} 該時段有課")
+        if assignment['classroom'] in solver._busy(solver.room_busy, exam_class):
+            problems.append(f"{assignment['class_name']}: {assignment['classroom']} 該時段有課")
+        problems.extend(
+            f"{assignment['class_name']}: {conflict['resource']} 時間重疊" for conflict in index.check(booking)
+        )
+        index.add(booking)
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='監考自動分配效能測試')
+    parser.add_argument('--runs', type=int, default=5, help='執行次數')
+    args = parser.parse_args()
+
+    with app.app_context():
+        timings = []
+        for _ in range(args.runs):
+            assignments, unassigned, elapsed = solve_proctor_assignments(overwrite=True)
+            timings.append(elapsed * 1000)
+
+        problems = violations(ProctorSolver(), assignments)
+        median = statistics.median(timings)
+        print(f"班級數：{len(assignments) + len(unassigned)}，已分配 {len(assignments)}，未分配 {len(unassigned)}")
+        print(f"求解時間：中位數 {median:.1f} ms（最快 {min(timings):.1f} ms，最慢 {max(timings):.1f} ms）")
+        for item in unassigned:
+            print(f"  ⚠️  {item['class_name']}: {item['reason']}")
+
+        if problems:
+            print(f"❌ 分配結果有 {len(problems)} 個問題")
+            for problem in problems:
+                print(f"  {problem}")
+            return 1
+        if median > TARGET_MS:
+            print(f"❌ 求解時間超過 {TARGET_MS} ms")
+            return 1
+        print(f"✅ 分配結果符合限制，求解時間低於 {TARGET_MS} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
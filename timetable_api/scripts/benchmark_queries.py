@@ -0,0 +1,129 @@
+"""
+課表查詢效能測試
+以實際資料比較「每種課表各查一次 ORM」與實際提供服務的路徑取得單一實體課表的延遲：
+課表路由（學生、教師、班級、教室）直接讀取記憶體快照，快照以單一 UNION ALL 查詢建立。
+測試路由前清除 GET 回應快取，並確認快照中的課程數與 ORM 查詢結果相同。
+
+使用方式（於 timetable_api 目錄下執行）：
+    python scripts/benchmark_queries.py [--repeat 3] [--limit 200]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用暫存資料庫，避免影響正式資料
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='kcislk-bench-'), 'bench.db')
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from src.main import app, initialize_data
+    from src.models.timetable import Timetable
+    from src.models.student import Student, EnglishTimetable, HomeRoomTimetable
+    from src.response_cache import response_cache
+    from src.snapshot import TimetableSnapshot, get_snapshot, is_english_class
+
+# 各類實體的課表路由
+ROUTES = {
+    'student': '/api/students/{}/timetable',
+    'teacher': '/api/teachers/{}/timetable',
+    'class': '/api/timetable/{}',
+    'classroom': '/api/classrooms/{}/timetable',
+}
+
+
+def orm_student_lessons(student_id):
+    """舊做法：先查學生，再分別查英文班、EV & myReading、Home Room 課表"""
+    student = Student.query.filter_by(student_id=student_id).first()
+    if not student:
+        return ()
+    rows = EnglishTimetable.query.filter_by(class_name=student.english_class_name).all()
+    if student.ev_myreading_class_name:
+        rows += EnglishTimetable.query.filter_by(class_name=student.ev_myreading_class_name).all()
+    rows += HomeRoomTimetable.query.filter_by(home_room_class_name=student.home_room_class_name).all()
+    return rows
+
+
+def orm_teacher_lessons(teacher_name):
+    return (EnglishTimetable.query.filter_by(teacher=teacher_name).all()
+            + HomeRoomTimetable.query.filter_by(teacher=teacher_name).all())
+
+
+def orm_class_lessons(class_name):
+    rows = EnglishTimetable.query.filter_by(class_name=class_name).all()
+    if not is_english_class(class_name):
+        rows += HomeRoomTimetable.query.filter_by(home_room_class_name=class_name).all()
+    return rows + Timetable.query.filter_by(class_name=class_name).all()
+
+
+def orm_classroom_lessons(classroom):
+    return (EnglishTimetable.query.filter_by(classroom=classroom).all()
+            + HomeRoomTimetable.query.filter_by(classroom=classroom).all())
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='課表查詢效能測試')
+    parser.add_argument('--repeat', type=int, default=3, help='每項測試執行次數（取最佳值）')
+    parser.add_argument('--limit', type=int, default=200, help='每種實體最多測試幾筆')
+    args = parser.parse_args()
+
+    client = app.test_client()
+    with app.app_context():
+        with contextlib.redirect_stdout(io.StringIO()):
+            initialize_data()
+        snapshot = get_snapshot()
+        cases = [
+            ('student', list(snapshot.student_lessons)[:args.limit], orm_student_lessons,
+             snapshot.student_lessons),
+            ('teacher', list(snapshot.teacher_lessons)[:args.limit], orm_teacher_lessons,
+             snapshot.teacher_lessons),
+            ('class', list(snapshot.class_lessons)[:args.limit], orm_class_lessons,
+             snapshot.class_lessons),
+            ('classroom', list(snapshot.classroom_lessons)[:args.limit], orm_classroom_lessons,
+             snapshot.classroom_lessons),
+        ]
+
+        # 正確性：快照中的課程數須與 ORM 查詢結果相同
+        mismatches = 0
+        for kind, keys, orm_fetch, expected in cases:
+            for key in keys:
+                if len(orm_fetch(key)) != len(expected[key]):
+                    mismatches += 1
+                    print(f"❌ {kind} {key} 快照課程數與 ORM 查詢結果不一致")
+
+        def serve(kind, keys):
+            response_cache.clear()
+            for key in keys:
+                client.get(ROUTES[kind].format(quote(key)))
+
+        print(f"{'實體':<12}{'筆數':>8}{'ORM 毫秒/筆':>16}{'路由 毫秒/筆':>16}{'加速':>8}")
+        for kind, keys, orm_fetch, _ in cases:
+            if not keys:
+                continue
+            orm = best_of(args.repeat, lambda: [orm_fetch(key) for key in keys])
+            route = best_of(args.repeat, lambda: serve(kind, keys))
+            print(f"{kind:<12}{len(keys):>8}{orm / len(keys) * 1000:>16.3f}"
+                  f"{route / len(keys) * 1000:>16.3f}{orm / route:>8.1f}x")
+
+        build = best_of(args.repeat, lambda: TimetableSnapshot.build(version=0))
+        print(f"建立快照（單一 UNION ALL 查詢）: {build:.4f} 秒")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+服務模式負載測試
+以同一個暫存資料庫分別啟動：
+
+1. 開發伺服器：python run_server.py（單一行程）
+2. 正式模式：gunicorn -c gunicorn.conf.py wsgi:app（預先載入、多 worker）
+
+再以多個客戶端行程在固定時間內反覆請求常用的查詢路由（學生、教師課表、班級列表、空教室、監考名單），
+比較每秒請求數與延遲。
+
+使用方式（於 timetable_api 目錄下執行）：
+    python scripts/benchmark_serving.py [--duration 10] [--clients 8] [--workers 4] [--threads 4]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+import requests
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 伺服器啟動（含首次載入資料）的等待上限（秒）
+STARTUP_TIMEOUT = 180
+
+
+def start_server(command, env):
+    """啟動伺服器並等待 /health 回應 -> Popen"""
+    process = subprocess.Popen(
+        command, cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base = f"http://127.0.0.1:{env['PORT']}"
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"伺服器啟動失敗：{' '.join(command)}")
+        try:
+            if requests.get(f'{base}/health', timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"伺服器未在 {STARTUP_TIMEOUT} 秒內啟動：{' '.join(command)}")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def sample_urls(base):
+    """由 API 取得實際的學生、教師名稱，組成請求清單"""
+    students = requests.get(f'{base}/api/students').json()['students']
+    teachers = requests.get(f'{base}/api/teachers').json()['teachers']
+    rng = random.Random(0)
+    urls = [f"/api/students/{student['student_id']}/timetable" for student in rng.sample(students, 200)]
+    urls += [f"/api/teachers/{quote(teacher['teacher_name'])}/timetable" for teacher in teachers]
+    urls += [
+        '/api/classes',
+        '/api/classrooms/free?day=Tuesday&period=5',
+        '/api/teachers/available?day=Monday&period=3-4',
+        '/api/exams/proctors',
+    ]
+    return urls
+
+
+def client_loop(args):
+    """單一客戶端行程：在 duration 秒內依序請求 -> (延遲列表, 錯誤數)"""
+    base, urls, duration, seed = args
+    urls = list(urls)
+    random.Random(seed).shuffle(urls)
+    session = requests.Session()
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    index = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if session.get(base + urls[index % len(urls)], timeout=30).status_code != 200:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+        index += 1
+    return latencies, errors
+
+
+def run_load(base, urls, duration, clients):
+    """多個客戶端行程同時請求 -> {'rps', 'p50', 'p95', 'errors'}"""
+    # 暖機：每個路由請求一次
+    for url in urls:
+        requests.get(base + url, timeout=30)
+    with multiprocessing.Pool(clients) as pool:
+        results = pool.map(client_loop, [(base, urls, duration, seed) for seed in range(clients)])
+    latencies = sorted(latency for result in results for latency in result[0])
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / duration,
+        'p50': statistics.median(latencies) * 1000,
+        'p95': latencies[int(len(latencies) * 0.95)] * 1000,
+        'errors': sum(result[1] for result in results)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='服務模式負載測試')
+    parser.add_argument('--duration', type=int, default=10, help='每種模式的測試秒數')
+    parser.add_argument('--clients', type=int, default=8, help='同時請求的客戶端行程數')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker 數')
+    parser.add_argument('--threads', type=int, default=4, help='每個 worker 的執行緒數')
+    parser.add_argument('--port', type=int, default=5091, help='測試使用的連接埠')
+    args = parser.parse_args()
+
+    # 使用暫存資料庫，避免影響正式資料；兩種模式共用同一份資料
+    env = dict(os.environ)
+    env['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='kcislk-bench-'), 'bench.db')
+    env['PORT'] = str(args.port)
+
+    modes = [
+        ('開發伺服器 run_server.py', [sys.executable, 'run_server.py'], {}),
+        (f'gunicorn {args.workers}x{args.threads}',
+         [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+         {'GUNICORN_WORKERS': str(args.workers), 'GUNICORN_THREADS': str(args.threads),
+          'GUNICORN_ACCESS_LOG': os.devnull}),
+    ]
+
+    base = f'http://127.0.0.1:{args.port}'
+    results = []
+    urls = None
+    for label, command, extra_env in modes:
+        process = start_server(command, {**env, **extra_env})
+        try:
+            urls = urls or sample_urls(base)
+            results.append((label, run_load(base, urls, args.duration, args.clients)))
+        finally:
+            stop_server(process)
+
+    print(f"CPU 核心數：{os.cpu_count()}，客戶端行程：{args.clients}，每種模式 {args.duration} 秒，{len(urls)} 個路由")
+    print(f"{'模式':<28}{'請求數':>8}{'req/s':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'錯誤':>6}")
+    for label, result in results:
+        print(f"{label:<28}{result['requests']:>8}{result['rps']:>10.1f}{result['p50']:>10.1f}"
+              f"{result['p95']:>10.1f}{result['errors']:>6}")
+
+    baseline, production = results[0][1], results[1][1]
+    print(f"正式模式 / 開發伺服器：{production['rps'] / baseline['rps']:.2f}x")
+    if production['errors']:
+        print(f"❌ 正式模式有 {production['errors']} 個錯誤回應")
+        return 1
+    print("✅ 正式模式無錯誤回應")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
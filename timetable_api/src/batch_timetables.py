@@ -0,0 +1,68 @@
+"""
+批次課表
+一次請求取得多位學生或教師的課表：課表取自記憶體快照並以各自的組裝快取組裝，
+結果依請求順序逐筆編碼為 JSON，累積約 BATCH_CHUNK_BYTES 便送出，不需先在記憶體組出完整回應。
+整個回應使用串流開始前取得的同一個快照，串流期間資料重新載入也不會混用新舊版本。
+"""
+import json
+import os
+
+from flask import Response, stream_with_context
+
+from src.snapshot import get_snapshot
+
+# 單次請求最多可查詢的數量
+BATCH_TIMETABLE_MAX_KEYS = int(os.environ.get('BATCH_TIMETABLE_MAX_KEYS', 2000))
+
+# 串流回應每次送出的大小
+BATCH_CHUNK_BYTES = 64 * 1024
+
+
+def read_batch_keys(data, field):
+    """
+    從請求 JSON 取出查詢清單（去除重複並保留順序）
+
+    格式錯誤時拋出 ValueError，訊息可直接回傳給前端
+    """
+    keys = (data or {}).get(field)
+    if not isinstance(keys, list) or not keys:
+        raise ValueError(f'{field} 必須為非空陣列')
+    if not all(isinstance(key, str) and key.strip() for key in keys):
+        raise ValueError(f'{field} 只能包含非空字串')
+    keys = list(dict.fromkeys(key.strip() for key in keys))
+    if len(keys) > BATCH_TIMETABLE_MAX_KEYS:
+        raise ValueError(f'{field} 最多 {BATCH_TIMETABLE_MAX_KEYS} 筆')
+    return keys
+
+
+def stream_batch_timetables(keys, assemble, snapshot=None):
+    """
+    以串流方式回傳 {"success": true, "results": [...], "not_found": [...], "count": n}
+
+    assemble(key, snapshot) 回傳該筆的課表 dict，找不到時回傳 None（列入 not_found）；
+    snapshot 預設為目前的快照，於串流開始前取得
+    """
+    snapshot = snapshot or get_snapshot()
+
+    def generate():
+        not_found = []
+        count = 0
+        chunk = ['{"success": true, "results": [']
+        size = 0
+        for key in keys:
+            assembled = assemble(key, snapshot)
+            if assembled is None:
+                not_found.append(key)
+                continue
+            encoded = json.dumps(assembled)
+            chunk.append(encoded if count == 0 else ', ' + encoded)
+            count += 1
+            size += len(encoded)
+            if size >= BATCH_CHUNK_BYTES:
+                yield ''.join(chunk)
+                chunk = []
+                size = 0
+        chunk.append(f'], "not_found": {json.dumps(not_found)}, "count": {count}}}')
+        yield ''.join(chunk)
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
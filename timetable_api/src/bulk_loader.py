@@ -0,0 +1,37 @@
+"""
+批次載入工具
+將 DataFrame 以向量化方式轉為 records，並以 executemany 分批寫入資料表，
+取代逐列 iterrows() + db.session.add() 的載入方式。
+"""
+from sqlalchemy import insert
+
+from src.models.timetable import db
+
+# 每批寫入筆數（SQLite executemany 單批上限由驅動程式處理，此處控制記憶體用量）
+BULK_BATCH_SIZE = 1000
+
+
+def dataframe_to_records(df, column_map, defaults=None):
+    """
+    將 DataFrame 轉為可直接寫入資料表的 records
+
+    column_map: {CSV 欄位: 資料表欄位}
+    defaults: {資料表欄位: 空值時的預設值}，其餘空值一律轉為 None
+    """
+    frame = df[list(column_map)].rename(columns=column_map)
+    if defaults:
+        frame = frame.fillna(value=defaults)
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_dict('records')
+
+
+def bulk_insert(model_or_table, records, batch_size=BULK_BATCH_SIZE):
+    """
+    以 executemany 分批寫入，不建立 ORM 物件
+    呼叫端負責 commit，讓清空與寫入在同一個交易內完成
+    """
+    table = getattr(model_or_table, '__table__', model_or_table)
+    for start in range(0, len(records), batch_size):
+        db.session.execute(insert(table), records[start:start + batch_size])
+    return len(records)
+
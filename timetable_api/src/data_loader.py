@@ -5,6 +5,56 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from src.models.timetable import db, Timetable, ClassInfo, Teacher, Classroom, Period
 from src.main import app
+from src.snapshot import refresh_snapshot
+from src.data_version import bump_data_version
+from src.bulk_loader import dataframe_to_records, bulk_insert
+from src.search_fts import sync_search_table
+
+# 由英文課表 CSV 產生的資料表（載入時只清空這些資料表）
+TIMETABLE_MODELS = (Period, ClassInfo, Teacher, Classroom, Timetable)
+
+def read_timetable_records(csv_file_path):
+    """讀取英文課表 CSV，轉為 periods / classes / teachers / classrooms / timetable 各資料表的 records"""
+    # 讀取CSV檔案
+    df = pd.read_csv(csv_file_path, sep=',')
+    
+    # 提取節次號碼和時間範圍
+    period_parts = df['Period'].str.split(')', n=1)
+    df['Period_Number'] = period_parts.str[0].str.replace('(', '', regex=False).astype(int)
+    df['Time_Range'] = period_parts.str[1]
+    
+    # 節次資訊（每個節次取第一筆出現的時間範圍）
+    periods_df = df.drop_duplicates('Period_Number')[['Period_Number', 'Time_Range']]
+    periods_df = periods_df.assign(
+        Start_Time=periods_df['Time_Range'].str.split('-').str[0],
+        End_Time=periods_df['Time_Range'].str.split('-').str[1]
+    )
+    
+    # 班級資訊（提取年級 G1, G2, etc.）
+    classes_df = pd.DataFrame({'class_name': df['ClassName'].unique()})
+    classes_df['grade'] = classes_df['class_name'].str.split(' ').str[0].where(
+        classes_df['class_name'].str.startswith('G'), 'Unknown'
+    )
+    
+    return {
+        Period: dataframe_to_records(periods_df, {
+            'Period_Number': 'period_number',
+            'Time_Range': 'time_range',
+            'Start_Time': 'start_time',
+            'End_Time': 'end_time'
+        }),
+        ClassInfo: classes_df.to_dict('records'),
+        Teacher: [{'teacher_name': name} for name in df['Teacher'].unique()],
+        Classroom: [{'classroom_name': name} for name in df['Classroom'].unique()],
+        Timetable: dataframe_to_records(df, {
+            'Day': 'day',
+            'Period_Number': 'period_number',
+            'Time_Range': 'time_range',
+            'Classroom': 'classroom',
+            'Teacher': 'teacher',
+            'ClassName': 'class_name'
+        }),
+    }
 
 def load_timetable_data(csv_file_path=None):
     """載入課表資料到資料庫"""
@@ -18,88 +68,27 @@ def load_timetable_data(csv_file_path=None):
         print(f"錯誤：找不到檔案 {csv_file_path}")
         return False
 
-    # 讀取CSV檔案
-    df = pd.read_csv(csv_file_path, sep=',')
-    
-    # 提取節次號碼和時間範圍
-    df['Period_Number'] = df['Period'].apply(lambda x: int(x.split(')')[0].replace('(', '')))
-    df['Time_Range'] = df['Period'].apply(lambda x: x.split(')')[1])
+    records_by_model = read_timetable_records(csv_file_path)
     
     with app.app_context():
-        # 清空現有資料
-        db.drop_all()
-        db.create_all()
-        
-        # 載入節次資訊
-        periods_data = {}
-        for _, row in df.iterrows():
-            period_num = row['Period_Number']
-            time_range = row['Time_Range']
-            if period_num not in periods_data:
-                start_time, end_time = time_range.split('-')
-                periods_data[period_num] = {
-                    'time_range': time_range,
-                    'start_time': start_time,
-                    'end_time': end_time
-                }
-        
-        for period_num, period_info in periods_data.items():
-            period = Period(
-                period_number=period_num,
-                time_range=period_info['time_range'],
-                start_time=period_info['start_time'],
-                end_time=period_info['end_time']
-            )
-            db.session.add(period)
-        
-        # 載入班級資訊
-        unique_classes = df['ClassName'].unique()
-        for class_name in unique_classes:
-            # 提取年級 (G1, G2, etc.)
-            grade = 'Unknown'
-            if class_name.startswith('G'):
-                grade = class_name.split(' ')[0]
-            
-            class_info = ClassInfo(
-                class_name=class_name,
-                grade=grade
-            )
-            db.session.add(class_info)
-        
-        # 載入教師資訊
-        unique_teachers = df['Teacher'].unique()
-        for teacher_name in unique_teachers:
-            teacher = Teacher(teacher_name=teacher_name)
-            db.session.add(teacher)
-        
-        # 載入教室資訊
-        unique_classrooms = df['Classroom'].unique()
-        for classroom_name in unique_classrooms:
-            classroom = Classroom(classroom_name=classroom_name)
-            db.session.add(classroom)
-        
-        # 載入課表資料
-        for _, row in df.iterrows():
-            timetable_entry = Timetable(
-                day=row['Day'],
-                period_number=row['Period_Number'],
-                time_range=row['Time_Range'],
-                classroom=row['Classroom'],
-                teacher=row['Teacher'],
-                class_name=row['ClassName']
-            )
-            db.session.add(timetable_entry)
+        # 只清空課表相關資料表（學生、Home Room、考試資料不受影響），並在同一個交易內寫入
+        for model in TIMETABLE_MODELS:
+            model.query.delete()
+        for model in TIMETABLE_MODELS:
+            bulk_insert(model, records_by_model[model])
+        sync_search_table()
         
         # 提交所有變更
         db.session.commit()
+        refresh_snapshot()
+        bump_data_version()
 
-        print(f"成功載入 {len(df)} 筆課表資料")
-        print(f"班級數量: {len(unique_classes)}")
-        print(f"教師數量: {len(unique_teachers)}")
-        print(f"教室數量: {len(unique_classrooms)}")
-        print(f"節次數量: {len(periods_data)}")
+        print(f"成功載入 {len(records_by_model[Timetable])} 筆課表資料")
+        print(f"班級數量: {len(records_by_model[ClassInfo])}")
+        print(f"教師數量: {len(records_by_model[Teacher])}")
+        print(f"教室數量: {len(records_by_model[Classroom])}")
+        print(f"節次數量: {len(records_by_model[Period])}")
         return True
 
 if __name__ == '__main__':
     load_timetable_data()
-
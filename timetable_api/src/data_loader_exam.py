@@ -1,457 +1,415 @@
 """
 期末考資料載入器
-載入 2025 Fall Semester Final Assessment 的考試場次和班級資訊
+考試場次、班級名單與監考分配由 data/exams/<學期>/ 下的檔案提供，多個學期可並存：
+
+    data/exams/manifest.json                  目前學期（current）與各學期名稱
+    data/exams/<學期>/sessions.csv            考試場次（每個 GradeBand 一筆）
+    data/exams/<學期>/classes.csv             班級名單（class_name, level, students；有學生資料時人數以 Student 為準）
+    data/exams/<學期>/class_teachers.csv      班級 LT/IT 教師對應（選填）
+    data/exams/<學期>/proctor_assignments.csv 監考分配（選填）
+    data/exams/<學期>/rooms.csv               教室容量（選填，classroom, capacity；供自動分配使用）
+
+環境變數 EXAM_SEMESTER 可覆寫 manifest 的 current。新增學期只需加入目錄並呼叫
+POST /api/admin/reload-exams，不需修改程式或重新部署。
 """
-import pandas as pd
+import json
 import os
+
+import pandas as pd
+
 from src.models.timetable import db
 from src.models.exam import ExamSession, ClassExamInfo, ProctorAssignment
-from src.models.student import Student, HomeRoomTimetable
-
-
-def load_exam_sessions():
-    """載入 12 個 GradeBand 的考試場次資訊"""
-
-    exam_sessions_data = [
-        # LT Assessment (6 個 GradeBand)
-        {
-            'grade_band': 'G1 LT\'s',
-            'exam_type': 'LT',
-            'grade': 'G1',
-            'exam_date': '2026-01-07',
-            'periods': 'P3-P4',
-            'duration': 75,
-            'self_study_time': None,
-            'preparation_time': '10:20-10:30',
-            'exam_time': '10:30-11:45',
-            'subject': 'LT Assessment'
-        },
-        {
-            'grade_band': 'G2 LT\'s',
-            'exam_type': 'LT',
-            'grade': 'G2',
-            'exam_date': '2026-01-07',
-            'periods': 'P1-P2',
-            'duration': 75,
-            'self_study_time': None,
-            'preparation_time': '08:25-08:35',
-            'exam_time': '08:35-09:50',
-            'subject': 'LT Assessment'
-        },
-        {
-            'grade_band': 'G3 LT\'s',
-            'exam_type': 'LT',
-            'grade': 'G3',
-            'exam_date': '2026-01-07',
-            'periods': 'P3-P4',
-            'duration': 60,
-            'self_study_time': '10:20-10:35',
-            'preparation_time': '10:35-10:40',
-            'exam_time': '10:40-11:40',
-            'subject': 'LT Assessment'
-        },
-        {
-            'grade_band': 'G4 LT\'s',
-            'exam_type': 'LT',
-            'grade': 'G4',
-            'exam_date': '2026-01-07',
-            'periods': 'P1-P2',
-            'duration': 60,
-            'self_study_time': '08:25-08:40',
-            'preparation_time': '08:40-08:45',
-            'exam_time': '08:45-09:45',
-            'subject': 'LT Assessment'
-        },
-        {
-            'grade_band': 'G5 LT\'s',
-            'exam_type': 'LT',
-            'grade': 'G5',
-            'exam_date': '2026-01-07',
-            'periods': 'P3-P4',
-            'duration': 60,
-            'self_study_time': '10:20-10:40',
-            'preparation_time': '10:40-10:45',
-            'exam_time': '10:45-11:45',
-            'subject': 'LT Assessment'
-        },
-        {
-            'grade_band': 'G6 LT\'s',
-            'exam_type': 'LT',
-            'grade': 'G6',
-            'exam_date': '2026-01-07',
-            'periods': 'P1-P2',
-            'duration': 80,
-            'self_study_time': None,
-            'preparation_time': '08:25-08:30',
-            'exam_time': '08:30-09:50',
-            'subject': 'LT Assessment'
-        },
-
-        # IT Assessment (6 個 GradeBand)
-        {
-            'grade_band': 'G1 IT\'s',
-            'exam_type': 'IT',
-            'grade': 'G1',
-            'exam_date': '2026-01-08',
-            'periods': 'P3-P4',
-            'duration': 75,
-            'self_study_time': None,
-            'preparation_time': '10:20-10:30',
-            'exam_time': '10:30-11:45',
-            'subject': 'IT Assessment'
-        },
-        {
-            'grade_band': 'G2 IT\'s',
-            'exam_type': 'IT',
-            'grade': 'G2',
-            'exam_date': '2026-01-08',
-            'periods': 'P1-P2',
-            'duration': 75,
-            'self_study_time': None,
-            'preparation_time': '08:25-08:35',
-            'exam_time': '08:35-09:50',
-            'subject': 'IT Assessment'
-        },
-        {
-            'grade_band': 'G3 IT\'s',
-            'exam_type': 'IT',
-            'grade': 'G3',
-            'exam_date': '2026-01-06',
-            'periods': 'P7-P8',
-            'duration': 75,
-            'self_study_time': None,
-            'preparation_time': '14:40-14:45',
-            'exam_time': '14:50-16:00',
-            'subject': 'IT Assessment'
-        },
-        {
-            'grade_band': 'G4 IT\'s',
-            'exam_type': 'IT',
-            'grade': 'G4',
-            'exam_date': '2026-01-06',
-            'periods': 'P5-P6',
-            'duration': 75,
-            'self_study_time': None,
-            'preparation_time': '12:55-13:00',
-            'exam_time': '13:00-14:15',
-            'subject': 'IT Assessment'
-        },
-        {
-            'grade_band': 'G5 IT\'s',
-            'exam_type': 'IT',
-            'grade': 'G5',
-            'exam_date': '2026-01-06',
-            'periods': 'P7-P8',
-            'duration': 80,
-            'self_study_time': None,
-            'preparation_time': '14:40-14:45',
-            'exam_time': '14:45-16:05',
-            'subject': 'IT Assessment'
-        },
-        {
-            'grade_band': 'G6 IT\'s',
-            'exam_type': 'IT',
-            'grade': 'G6',
-            'exam_date': '2026-01-06',
-            'periods': 'P5-P6',
-            'duration': 80,
-            'self_study_time': None,
-            'preparation_time': '12:55-13:00',
-            'exam_time': '13:00-14:20',
-            'subject': 'IT Assessment'
-        }
-    ]
+from src.models.student import Student
+from src.data_version import bump_data_version
+from src.proctor_assignments import upsert_assignments
+
+EXAMS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'exams')
+MANIFEST_PATH = os.path.join(EXAMS_DIR, 'manifest.json')
+
+SESSION_FIELDS = (
+    'grade_band', 'exam_type', 'grade', 'exam_date', 'periods', 'duration',
+    'self_study_time', 'preparation_time', 'exam_time', 'subject'
+)
+CLASS_FIELDS = ('class_name', 'level', 'students')
+
+
+class ExamConfigError(Exception):
+    """考試設定檔不存在或格式錯誤"""
+
+
+def load_manifest():
+    """讀取 manifest.json -> {'current': 學期, 'semesters': {學期: 名稱}}"""
+    if not os.path.exists(MANIFEST_PATH):
+        return {'current': None, 'semesters': {}}
+    with open(MANIFEST_PATH, encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest.setdefault('current', None)
+    manifest.setdefault('semesters', {})
+    return manifest
+
+
+def list_semesters():
+    """data/exams/ 下所有含 sessions.csv 的學期目錄"""
+    if not os.path.isdir(EXAMS_DIR):
+        return []
+    return sorted(
+        name for name in os.listdir(EXAMS_DIR)
+        if os.path.isfile(os.path.join(EXAMS_DIR, name, 'sessions.csv'))
+    )
+
+
+def current_semester():
+    """目前學期：EXAM_SEMESTER 環境變數優先，其次為 manifest 的 current"""
+    return os.environ.get('EXAM_SEMESTER') or load_manifest()['current']
 
-    print("開始載入考試場次資料...")
 
-    for session_data in exam_sessions_data:
-        # 檢查是否已存在
-        existing = ExamSession.query.filter_by(grade_band=session_data['grade_band']).first()
-        if existing:
-            print(f"  ⚠️  {session_data['grade_band']} 已存在，跳過")
+def semester_title(semester=None):
+    semester = semester or current_semester()
+    return load_manifest()['semesters'].get(semester, semester)
+
+
+def semester_dir(semester=None):
+    """學期目錄路徑（只接受 data/exams/ 下既有的學期）"""
+    semester = semester or current_semester()
+    if semester not in list_semesters():
+        raise ExamConfigError(f'找不到學期設定：{semester}（可用：{", ".join(list_semesters()) or "無"}）')
+    return os.path.join(EXAMS_DIR, semester)
+
+
+def _records(df):
+    """DataFrame -> list[dict]，空值轉為 None"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def _read_csv(path, required):
+    df = pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[''])
+    missing = [column for column in required if column not in df.columns]
+    if missing:
+        raise ExamConfigError(f'{os.path.basename(path)} 缺少欄位：{", ".join(missing)}')
+    df = df[list(required)].apply(lambda column: column.str.strip())
+    return df
+
+
+def read_exam_sessions(semester=None):
+    """讀取學期的 sessions.csv"""
+    df = _read_csv(os.path.join(semester_dir(semester), 'sessions.csv'), SESSION_FIELDS)
+    if df['grade_band'].duplicated().any():
+        raise ExamConfigError(f'sessions.csv 有重複的 grade_band：{", ".join(df.loc[df["grade_band"].duplicated(), "grade_band"])}')
+    df['duration'] = df['duration'].astype(int)
+    return df
+
+
+def read_class_roster(semester=None):
+    """讀取學期的 classes.csv 並依 class_teachers.csv 附上 LT/IT 教師 -> 每個班級每個考試類型一列"""
+    directory = semester_dir(semester)
+    df = _read_csv(os.path.join(directory, 'classes.csv'), CLASS_FIELDS)
+    df['students'] = df['students'].astype(int)
+    df['grade'] = df['class_name'].str.split().str[0]  # 'G1 Achievers' -> 'G1'
+
+    teachers_path = os.path.join(directory, 'class_teachers.csv')
+    if os.path.exists(teachers_path):
+        teachers = pd.read_csv(teachers_path, dtype=str)
+        teachers = teachers.rename(columns={
+            'EnglishName': 'class_name', 'system_display_lt': 'LT', 'system_display_it': 'IT'
+        }).melt(id_vars='class_name', value_vars=['LT', 'IT'], var_name='exam_type', value_name='teacher')
+        print(f"✅ 成功載入 {teachers['class_name'].nunique()} 個班級的教師對應資料")
+    else:
+        print(f"⚠️  找不到教師對應檔案：{teachers_path}")
+        teachers = pd.DataFrame(columns=['class_name', 'exam_type', 'teacher'])
+    return df, teachers
+
+
+def english_class_student_counts():
+    """{english_class_name: 學生人數}，以一次 GROUP BY 查詢取得"""
+    return dict(db.session.execute(
+        db.select(Student.english_class_name, db.func.count())
+        .where(Student.english_class_name.isnot(None))
+        .group_by(Student.english_class_name)
+    ).all())
+
+
+def base_class_name(exam_class_name):
+    """'G1 Achievers (LT)' -> 'G1 Achievers'"""
+    return exam_class_name.rsplit(' (', 1)[0]
+
+
+def refresh_exam_student_counts():
+    """
+    依 Student 重新計算班級考試資訊的學生人數（不 commit），只更新人數有變動的班級 -> 更新筆數
+
+    Student 中沒有學生的班級保留原本的人數（列於 student_count_drift()）。
+    """
+    counts = english_class_student_counts()
+    updates = [
+        {'row_id': row_id, 'students': counts[base_class_name(class_name)]}
+        for row_id, class_name, students in db.session.execute(
+            db.select(ClassExamInfo.id, ClassExamInfo.class_name, ClassExamInfo.students)
+        )
+        if counts.get(base_class_name(class_name), students) != students
+    ]
+    if updates:
+        table = ClassExamInfo.__table__
+        db.session.execute(
+            table.update().where(table.c.id == db.bindparam('row_id')).values(students=db.bindparam('students')),
+            updates
+        )
+    return len(updates)
+
+
+def student_count_drift(semester=None):
+    """
+    學生人數一致性報告：比對 classes.csv 的人數（configured）、資料庫中的人數（recorded）
+    與 Student 實際人數（actual），列出不一致或沒有學生資料的班級
+    """
+    roster, _ = read_class_roster(semester)
+    counts = english_class_student_counts()
+    recorded = {}
+    for class_name, students in db.session.execute(db.select(ClassExamInfo.class_name, ClassExamInfo.students)):
+        recorded.setdefault(base_class_name(class_name), students)
+
+    drifted = []
+    for class_name, configured in zip(roster['class_name'], roster['students']):
+        actual = counts.get(class_name)
+        if actual is not None and actual == configured == recorded.get(class_name):
             continue
+        drifted.append({
+            'class_name': class_name,
+            'configured': int(configured),
+            'recorded': recorded.get(class_name),
+            'actual': actual,
+            'difference': None if actual is None else actual - int(configured)
+        })
+    return {
+        'semester': semester or current_semester(),
+        'checked': len(roster),
+        'drifted': drifted
+    }
+
 
-        session = ExamSession(**session_data)
-        db.session.add(session)
-        print(f"  ✅ 新增 {session_data['grade_band']} - {session_data['exam_date']} {session_data['periods']}")
+def read_room_capacities(semester=None):
+    """學期目錄的 rooms.csv（選填，classroom, capacity）-> {教室: 容量}"""
+    try:
+        path = os.path.join(semester_dir(semester), 'rooms.csv')
+    except ExamConfigError:
+        return {}
+    if not os.path.exists(path):
+        return {}
+    df = _read_csv(path, ('classroom', 'capacity'))
+    return dict(zip(df['classroom'], df['capacity'].astype(int)))
+
+
+def _upsert(model, key, records):
+    """依 key 欄位批次新增或更新（不 commit），以一次查詢取得既有 ID -> (新增筆數, 更新筆數)"""
+    table = model.__table__
+    existing = dict(db.session.execute(db.select(table.c[key], table.c.id)).all())
+    inserts = [record for record in records if record[key] not in existing]
+    updates = [{**record, 'row_id': existing[record[key]]} for record in records if record[key] in existing]
+
+    if inserts:
+        db.session.execute(table.insert(), inserts)
+    if updates:
+        fields = [field for field in records[0] if field != key]
+        db.session.execute(
+            table.update()
+            .where(table.c.id == db.bindparam('row_id'))
+            .values(**{field: db.bindparam(field) for field in fields}),
+            updates
+        )
+    return len(inserts), len(updates)
+
+
+def load_exam_sessions(semester=None):
+    """依 sessions.csv 載入考試場次；已存在的 GradeBand 以檔案內容更新（只 flush，由 load_all_exam_data 提交）"""
+    print("開始載入考試場次資料...")
 
     try:
-        db.session.commit()
-        print("✅ 考試場次資料載入成功！共載入 12 個 GradeBand")
+        sessions = read_exam_sessions(semester)
+        created, updated = _upsert(ExamSession, 'grade_band', _records(sessions))
+        db.session.flush()
+        print(f"✅ 考試場次資料載入成功！共 {len(sessions)} 個 GradeBand（新增 {created}，更新 {updated}）")
         return True
     except Exception as e:
-        db.session.rollback()
         print(f"❌ 考試場次資料載入失敗: {e}")
         return False
 
 
-def load_class_exam_info():
-    """載入 84 個班級的考試資訊"""
-
-    # 載入教師對應表
-    csv_file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'class_teachers.csv')
-
-    if not os.path.exists(csv_file_path):
-        print(f"⚠️  找不到教師對應檔案：{csv_file_path}")
-        teacher_map = {}
-    else:
-        teachers_df = pd.read_csv(csv_file_path)
-        teacher_map = {}
-        for _, row in teachers_df.iterrows():
-            teacher_map[row['EnglishName']] = {
-                'LT': row['system_display_lt'],
-                'IT': row['system_display_it']
-            }
-        print(f"✅ 成功載入 {len(teacher_map)} 個班級的教師對應資料")
-
-    # 班級資料：ClassName, Level, Students
-    class_data = [
-        # G1 - 14 個班級
-        ('G1 Achievers', 'G1E1', 20),
-        ('G1 Discoverers', 'G1E1', 20),
-        ('G1 Voyagers', 'G1E1', 19),
-        ('G1 Explorers', 'G1E1', 20),
-        ('G1 Navigators', 'G1E1', 20),
-        ('G1 Adventurers', 'G1E2', 18),
-        ('G1 Guardians', 'G1E2', 18),
-        ('G1 Pioneers', 'G1E2', 18),
-        ('G1 Innovators', 'G1E2', 18),
-        ('G1 Visionaries', 'G1E2', 16),
-        ('G1 Pathfinders', 'G1E3', 17),
-        ('G1 Seekers', 'G1E3', 16),
-        ('G1 Trailblazers', 'G1E3', 16),
-        ('G1 Inventors', 'G1E3', 15),
-
-        # G2 - 14 個班級
-        ('G2 Pioneers', 'G2E1', 20),
-        ('G2 Explorers', 'G2E1', 20),
-        ('G2 Inventors', 'G2E1', 20),
-        ('G2 Achievers', 'G2E1', 19),
-        ('G2 Voyagers', 'G2E1', 20),
-        ('G2 Adventurers', 'G2E2', 21),
-        ('G2 Innovators', 'G2E2', 20),
-        ('G2 Guardians', 'G2E2', 20),
-        ('G2 Pathfinders', 'G2E2', 20),
-        ('G2 Visionaries', 'G2E2', 20),
-        ('G2 Navigators', 'G2E3', 13),
-        ('G2 Discoverers', 'G2E3', 14),
-        ('G2 Seekers', 'G2E3', 12),
-        ('G2 Trailblazers', 'G2E3', 13),
-
-        # G3 - 13 個班級
-        ('G3 Inventors', 'G3E1', 19),
-        ('G3 Innovators', 'G3E1', 19),
-        ('G3 Guardians', 'G3E1', 19),
-        ('G3 Achievers', 'G3E1', 19),
-        ('G3 Voyagers', 'G3E2', 20),
-        ('G3 Visionaries', 'G3E2', 20),
-        ('G3 Trailblazers', 'G3E2', 20),
-        ('G3 Discoverers', 'G3E2', 20),
-        ('G3 Explorers', 'G3E2', 20),
-        ('G3 Navigators', 'G3E2', 20),
-        ('G3 Adventurers', 'G3E2', 20),
-        ('G3 Seekers', 'G3E3', 11),
-        ('G3 Pathfinders', 'G3E3', 13),
-        ('G3 Pioneers', 'G3E3', 12),
-
-        # G4 - 13 個班級
-        ('G4 Seekers', 'G4E1', 19),
-        ('G4 Voyagers', 'G4E1', 18),
-        ('G4 Visionaries', 'G4E1', 18),
-        ('G4 Achievers', 'G4E1', 19),
-        ('G4 Navigators', 'G4E2', 20),
-        ('G4 Trailblazers', 'G4E2', 20),
-        ('G4 Pathfinders', 'G4E2', 17),
-        ('G4 Explorers', 'G4E2', 19),
-        ('G4 Adventurers', 'G4E2', 20),
-        ('G4 Innovators', 'G4E2', 20),
-        ('G4 Discoverers', 'G4E2', 18),
-        ('G4 Guardians', 'G4E3', 16),
-        ('G4 Inventors', 'G4E3', 14),
-        ('G4 Pioneers', 'G4E3', 14),
-
-        # G5 - 14 個班級
-        ('G5 Adventurers', 'G5E1', 20),
-        ('G5 Navigators', 'G5E1', 20),
-        ('G5 Pioneers', 'G5E1', 21),
-        ('G5 Inventors', 'G5E2', 20),
-        ('G5 Seekers', 'G5E2', 19),
-        ('G5 Discoverers', 'G5E2', 19),
-        ('G5 Guardians', 'G5E2', 19),
-        ('G5 Pathfinders', 'G5E2', 19),
-        ('G5 Explorers', 'G5E2', 19),
-        ('G5 Achievers', 'G5E2', 20),
-        ('G5 Voyagers', 'G5E3', 14),
-        ('G5 Trailblazers', 'G5E3', 15),
-        ('G5 Innovators', 'G5E3', 14),
-        ('G5 Visionaries', 'G5E3', 13),
-
-        # G6 - 16 個班級
-        ('G6 Explorers', 'G6E1', 20),
-        ('G6 Inventors', 'G6E1', 19),
-        ('G6 Adventurers', 'G6E1', 19),
-        ('G6 Achievers', 'G6E1', 19),
-        ('G6 Voyagers', 'G6E2', 19),
-        ('G6 Discoverers', 'G6E2', 18),
-        ('G6 Innovators', 'G6E2', 18),
-        ('G6 Guardians', 'G6E2', 19),
-        ('G6 Pathfinders', 'G6E2', 19),
-        ('G6 Seekers', 'G6E2', 19),
-        ('G6 Visionaries', 'G6E2', 17),
-        ('G6 Pioneers', 'G6E3', 14),
-        ('G6 Trailblazers', 'G6E3', 16),
-        ('G6 Navigators', 'G6E3', 16),
-    ]
-
+def load_class_exam_info(semester=None):
+    """依 classes.csv 載入班級考試資訊：每個班級對應同年級的每個考試場次（LT / IT）（只 flush）"""
     print("開始載入班級考試資訊...")
 
-    # 建立 GradeBand 對照表（每個班級對應兩個 GradeBand：LT 和 IT）
-    grade_to_gradeband = {
-        'G1': ('G1 LT\'s', 'G1 IT\'s'),
-        'G2': ('G2 LT\'s', 'G2 IT\'s'),
-        'G3': ('G3 LT\'s', 'G3 IT\'s'),
-        'G4': ('G4 LT\'s', 'G4 IT\'s'),
-        'G5': ('G5 LT\'s', 'G5 IT\'s'),
-        'G6': ('G6 LT\'s', 'G6 IT\'s'),
-    }
+    try:
+        roster, teachers = read_class_roster(semester)
+        sessions = read_exam_sessions(semester)[['grade_band', 'exam_type', 'grade']]
+
+        # 學生人數以 Student 實際名單為準（一次 GROUP BY），沒有學生資料的班級使用 classes.csv 的人數
+        actual = roster['class_name'].map(english_class_student_counts())
+        drifted = roster.loc[actual.notna() & (actual != roster['students']), 'class_name']
+        if len(drifted):
+            print(f"  ⚠️  {len(drifted)} 班人數與 classes.csv 不同，改用學生資料：{', '.join(drifted)}")
+        roster['students'] = actual.fillna(roster['students']).astype(int)
+
+        # 一次查詢取得 GradeBand -> 考試場次 ID
+        session_ids = dict(db.session.execute(db.select(ExamSession.grade_band, ExamSession.id)).all())
+        sessions = sessions.assign(exam_session_id=sessions['grade_band'].map(session_ids))
+        missing = sessions['exam_session_id'].isna()
+        for grade_band in sessions.loc[missing, 'grade_band']:
+            print(f"  ⚠️  找不到 {grade_band} 的考試場次，跳過")
+        sessions = sessions[~missing]
+
+        classes = roster.merge(sessions, on='grade').merge(teachers, on=['class_name', 'exam_type'], how='left', validate='many_to_one')
+        unmatched = sorted(set(roster['grade']) - set(sessions['grade']))
+        if unmatched:
+            print(f"  ⚠️  {', '.join(unmatched)} 沒有考試場次，跳過這些年級的班級")
 
-    loaded_count = 0
-
-    for class_name, level, students in class_data:
-        # 擷取年級
-        grade = class_name.split()[0]  # 'G1 Achievers' -> 'G1'
-
-        # 每個班級需要建立兩筆記錄：LT 和 IT
-        for exam_type in ['LT', 'IT']:
-            grade_band_name = grade_to_gradeband[grade][0 if exam_type == 'LT' else 1]
-
-            # 查詢對應的 ExamSession
-            exam_session = ExamSession.query.filter_by(grade_band=grade_band_name).first()
-            if not exam_session:
-                print(f"  ⚠️  找不到 {grade_band_name} 的考試場次，跳過 {class_name}")
-                continue
-
-            # 建立完整的 class_name（包含考試類型）
-            full_class_name = f"{class_name} ({exam_type})"
-
-            # 檢查是否已存在
-            existing = ClassExamInfo.query.filter_by(class_name=full_class_name).first()
-            if existing:
-                continue
-
-            # 查詢教師（從教師對應表，根據考試類型 LT 或 IT）
-            teacher = teacher_map.get(class_name, {}).get(exam_type, None)
-
-            # 建立班級考試資訊
-            class_exam_info = ClassExamInfo(
-                class_name=full_class_name,
-                grade=grade,
-                level=level,
-                exam_session_id=exam_session.id,
-                students=students,
-                teacher=teacher
-            )
-            db.session.add(class_exam_info)
-            loaded_count += 1
+        # 建立完整的 class_name（包含考試類型）
+        classes['class_name'] = classes['class_name'] + ' (' + classes['exam_type'] + ')'
+        classes['exam_session_id'] = classes['exam_session_id'].astype(int)
+        records = _records(classes[['class_name', 'grade', 'level', 'exam_session_id', 'students', 'teacher']])
 
-    try:
-        db.session.commit()
-        print(f"✅ 班級考試資訊載入成功！共載入 {loaded_count} 筆記錄（84班 x 2考試類型 = 168筆）")
+        created, updated = _upsert(ClassExamInfo, 'class_name', records)
+        db.session.flush()
+        print(f"✅ 班級考試資訊載入成功！共 {len(records)} 筆（{len(roster)} 班，新增 {created}，更新 {updated}）")
         return True
     except Exception as e:
-        db.session.rollback()
         print(f"❌ 班級考試資訊載入失敗: {e}")
         return False
 
 
-def load_proctor_assignments_from_csv():
-    """從 CSV 檔案載入監考分配資料"""
+def clear_exam_data():
+    """刪除所有考試場次、班級考試資訊與監考分配（不 commit），用於切換學期"""
+    db.session.execute(db.delete(ProctorAssignment))
+    db.session.execute(db.delete(ClassExamInfo))
+    db.session.execute(db.delete(ExamSession))
 
-    csv_file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'proctor_assignments.csv')
 
-    if not os.path.exists(csv_file_path):
-        print(f"❌ 找不到監考分配檔案：{csv_file_path}")
-        return False
+def proctor_rejected_report_path(csv_file_path):
+    """被拒絕資料的報告檔路徑（與來源 CSV 同目錄）"""
+    root, ext = os.path.splitext(csv_file_path)
+    return f"{root}_rejected{ext}"
 
-    print("開始載入監考分配資料...")
 
-    # 讀取 CSV 檔案
-    df = pd.read_csv(csv_file_path)
-    print(f"  ✅ 讀取到 {len(df)} 筆資料")
+def resolve_proctor_rows(df):
+    """
+    以一次查詢建立 class_name -> id 對照表，並以 merge 對應每一筆監考資料
 
-    loaded_count = 0
-    updated_count = 0
-    error_count = 0
+    回傳 (matched, rejected)：matched 含 class_exam_info_id 欄位；rejected 保留原始欄位並附上 Reason
+    """
+    df = df.reset_index(drop=True)
 
-    for _, row in df.iterrows():
-        # 從 CSV 取得資料
-        class_name = row['ClassName']
-        grade_band = row['GradeBand']
-        proctor = row['Proctor']
-        classroom = row['Classroom']
+    # 根據 GradeBand 判斷考試類型，建立完整的 class_name（包含考試類型）
+    grade_band = df['GradeBand'].fillna('').astype(str)
+    exam_type = grade_band.str.contains('LT', regex=False).map({True: 'LT', False: 'IT'})
+    df['full_class_name'] = df['ClassName'].astype(str).str.strip() + ' (' + exam_type + ')'
 
-        # 根據 GradeBand 判斷考試類型
-        exam_type = 'LT' if 'LT' in grade_band else 'IT'
+    class_ids = pd.DataFrame(
+        db.session.execute(db.select(ClassExamInfo.class_name, ClassExamInfo.id)).all(),
+        columns=['full_class_name', 'class_exam_info_id']
+    )
+    merged = df.merge(class_ids, on='full_class_name', how='left', validate='many_to_one')
 
-        # 建立完整的 class_name（包含考試類型）
-        full_class_name = f"{class_name} ({exam_type})"
+    reasons = pd.Series('', index=merged.index)
+    reasons[merged['class_exam_info_id'].isna()] = '找不到班級：' + merged['full_class_name']
+    for column in ('Proctor', 'Classroom'):
+        reasons[merged[column].isna() & (reasons == '')] = f'缺少 {column}'
+    for column in ('ClassName', 'GradeBand'):
+        reasons[merged[column].isna()] = f'缺少 {column}'
 
-        # 查詢對應的 ClassExamInfo
-        class_exam_info = ClassExamInfo.query.filter_by(class_name=full_class_name).first()
+    rejected_mask = reasons != ''
+    rejected = merged.loc[rejected_mask, df.columns.drop('full_class_name')].copy()
+    rejected['Reason'] = reasons[rejected_mask]
+    matched = merged.loc[~rejected_mask].copy()
+    matched['class_exam_info_id'] = matched['class_exam_info_id'].astype(int)
+    return matched, rejected
 
-        if not class_exam_info:
-            print(f"  ⚠️  找不到班級：{full_class_name}")
-            error_count += 1
-            continue
 
-        # 檢查是否已有監考分配
-        existing = ProctorAssignment.query.filter_by(class_exam_info_id=class_exam_info.id).first()
+def load_proctor_assignments_from_csv(semester=None):
+    """從學期目錄的 proctor_assignments.csv 載入監考分配資料（尚未排定監考的學期可不提供；只 flush）"""
 
-        if existing:
-            # 更新現有記錄
-            existing.proctor_teacher = proctor
-            existing.classroom = classroom
-            updated_count += 1
-        else:
-            # 新增記錄
-            assignment = ProctorAssignment(
-                class_exam_info_id=class_exam_info.id,
-                proctor_teacher=proctor,
-                classroom=classroom
-            )
-            db.session.add(assignment)
-            loaded_count += 1
+    csv_file_path = os.path.join(semester_dir(semester), 'proctor_assignments.csv')
+
+    if not os.path.exists(csv_file_path):
+        print(f"⚠️  找不到監考分配檔案，跳過：{csv_file_path}")
+        return True
+
+    print("開始載入監考分配資料...")
 
     try:
-        db.session.commit()
+        # 讀取 CSV 檔案
+        df = pd.read_csv(csv_file_path)
+        print(f"  ✅ 讀取到 {len(df)} 筆資料")
+
+        matched, rejected = resolve_proctor_rows(df)
+
+        # 無法對應的資料寫入報告檔，而不是逐筆列印
+        report_path = proctor_rejected_report_path(csv_file_path)
+        if len(rejected):
+            rejected.to_csv(report_path, index=False)
+        elif os.path.exists(report_path):
+            os.remove(report_path)
+
+        rows = [
+            (index, class_exam_info_id, {'proctor_teacher': str(proctor), 'classroom': str(classroom)})
+            for index, class_exam_info_id, proctor, classroom in zip(
+                matched.index, matched['class_exam_info_id'], matched['Proctor'], matched['Classroom']
+            )
+        ]
+        loaded_count, updated_count = upsert_assignments(rows, insert_defaults={'notes': None})
+        db.session.flush()
         print(f"✅ 監考分配資料載入成功！")
         print(f"  - 新增：{loaded_count} 筆")
         print(f"  - 更新：{updated_count} 筆")
-        print(f"  - 錯誤：{error_count} 筆")
+        print(f"  - 錯誤：{len(rejected)} 筆")
+        if len(rejected):
+            print(f"  ⚠️  無法對應的資料已寫入：{report_path}")
         return True
     except Exception as e:
-        db.session.rollback()
         print(f"❌ 監考分配資料載入失敗: {e}")
         return False
 
 
-def load_all_exam_data():
-    """載入所有考試相關資料"""
+def load_all_exam_data(semester=None, replace=False):
+    """
+    載入學期的所有考試資料（預設為目前學期）
+
+    replace=True 時先清除資料庫中既有的考試資料（含監考分配），用於切換學期；
+    否則以檔案內容新增或更新既有資料。
+    """
+    semester = semester or current_semester()
     print("\n" + "="*60)
-    print("開始載入 2025 Fall Semester Final Assessment 資料")
+    print(f"開始載入 {semester_title(semester)} 資料")
     print("="*60 + "\n")
 
-    # 1. 載入考試場次
-    success1 = load_exam_sessions()
-
-    # 2. 載入班級考試資訊
-    success2 = load_class_exam_info()
+    try:
+        semester_dir(semester)
+    except ExamConfigError as e:
+        print(f"❌ {e}")
+        return False
 
-    # 3. 載入監考分配資料
-    success3 = load_proctor_assignments_from_csv()
+    # 清除與三個步驟在同一個交易中，任一步驟失敗時整批復原，既有的考試資料保持不變
+    try:
+        if replace:
+            clear_exam_data()
+
+        # 1. 載入考試場次
+        # 2. 載入班級考試資訊
+        # 3. 載入監考分配資料
+        success = (
+            load_exam_sessions(semester)
+            and load_class_exam_info(semester)
+            and load_proctor_assignments_from_csv(semester)
+        )
+        if success:
+            db.session.commit()
+            bump_data_version()
+        else:
+            db.session.rollback()
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ 考試資料載入失敗: {e}")
+        success = False
 
     print("\n" + "="*60)
-    if success1 and success2 and success3:
+    if success:
         print("✅ 所有考試資料載入完成！")
 
         # 顯示統計資訊
@@ -461,10 +419,10 @@ def load_all_exam_data():
 
         print(f"\n統計資訊：")
         print(f"  - 考試場次：{session_count} 個 GradeBand")
-        print(f"  - 班級記錄：{class_count} 筆（84班 x 2考試類型）")
+        print(f"  - 班級記錄：{class_count} 筆")
         print(f"  - 監考分配：{proctor_count} 筆")
     else:
-        print("❌ 部分資料載入失敗，請檢查錯誤訊息")
+        print("❌ 部分資料載入失敗，已復原，資料庫中的考試資料未變更")
     print("="*60 + "\n")
 
-    return success1 and success2 and success3
+    return success
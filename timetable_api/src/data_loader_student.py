@@ -1,8 +1,74 @@
 import pandas as pd
-import sqlite3
 import os
 from src.models.timetable import db
 from src.models.student import Student, EnglishTimetable, HomeRoomTimetable
+from src.snapshot import refresh_snapshot
+from src.data_version import bump_data_version
+from src.search_fts import sync_search_table
+from src.data_loader_exam import refresh_exam_student_counts
+from src.bulk_loader import dataframe_to_records, bulk_insert
+
+# 節次字串格式: "(3)10:20-11:00"
+PERIOD_PATTERN = r'\((\d+)\)\s*(\d{1,2}:\d{2})\s*-\s*(\d{1,2}:\d{2})'
+
+
+def parse_period_columns(periods):
+    """
+    將節次字串欄位解析為 period_number / start_time / end_time 三欄
+    無法解析的節次以 None 表示
+    """
+    parsed = periods.astype(str).str.strip().str.extract(PERIOD_PATTERN)
+    parsed.columns = ['period_number', 'start_time', 'end_time']
+    parsed['period_number'] = pd.to_numeric(parsed['period_number']).astype('Int64')
+    return parsed.astype(object).where(parsed.notna(), None)
+
+
+def read_student_records(csv_file_path):
+    """讀取學生資料 CSV 並轉為 students 資料表 records"""
+    # Home Room 班級以字串讀入，例如 "102"
+    students_df = pd.read_csv(csv_file_path, dtype={'Home Room Class Name': str})
+    return dataframe_to_records(students_df, {
+        'Student ID': 'student_id',
+        'Student Name': 'student_name',
+        'English Class Name': 'english_class_name',
+        'Home Room Class Name': 'home_room_class_name',
+        'EV & myReading Class Name': 'ev_myreading_class_name'
+    })
+
+
+def read_english_timetable_records(csv_file_path):
+    """讀取英文班課表 CSV 並轉為 english_timetable 資料表 records（含解析後的節次欄位）"""
+    timetable_df = pd.read_csv(csv_file_path)
+    timetable_df = timetable_df.join(parse_period_columns(timetable_df['Period']))
+    return dataframe_to_records(timetable_df, {
+        'Day': 'day',
+        'Classroom': 'classroom',
+        'Teacher': 'teacher',
+        'Period': 'period',
+        'period_number': 'period_number',
+        'start_time': 'start_time',
+        'end_time': 'end_time',
+        'ClassName': 'class_name'
+    })
+
+
+def read_homeroom_timetable_records(csv_file_path):
+    """讀取 Home Room 課表 CSV 並轉為 homeroom_timetable 資料表 records（含解析後的節次欄位）"""
+    homeroom_df = pd.read_csv(csv_file_path, dtype={'Home Room Class Name': str})
+    homeroom_df = homeroom_df.join(parse_period_columns(homeroom_df['Period']))
+    # 處理空值：教師、教室、課程名稱為空時以 'TBD' 表示
+    return dataframe_to_records(homeroom_df, {
+        'Home Room Class Name': 'home_room_class_name',
+        'Day': 'day',
+        'Period': 'period',
+        'period_number': 'period_number',
+        'start_time': 'start_time',
+        'end_time': 'end_time',
+        'Classroom': 'classroom',
+        'Teacher': 'teacher',
+        'Course Name': 'course_name'
+    }, defaults={'teacher': 'TBD', 'classroom': 'TBD', 'course_name': 'TBD'})
+
 
 def load_student_data():
     """載入學生資料到資料庫"""
@@ -16,24 +82,14 @@ def load_student_data():
             return False
 
         # 讀取學生資料 CSV
-        students_df = pd.read_csv(csv_file_path)
+        records = read_student_records(csv_file_path)
         
-        # 清空現有資料
+        # 清空現有資料並批次寫入（同一個交易）
         Student.query.delete()
-        
-        # 載入學生資料
-        for _, row in students_df.iterrows():
-            student = Student(
-                student_id=row['Student ID'],
-                student_name=row['Student Name'],
-                english_class_name=row['English Class Name'],
-                home_room_class_name=str(row['Home Room Class Name']),
-                ev_myreading_class_name=row['EV & myReading Class Name'] if pd.notna(row['EV & myReading Class Name']) else None
-            )
-            db.session.add(student)
+        bulk_insert(Student, records)
         
         db.session.commit()
-        print(f"成功載入 {len(students_df)} 筆學生資料")
+        print(f"成功載入 {len(records)} 筆學生資料")
         return True
 
     except Exception as e:
@@ -52,25 +108,15 @@ def load_english_timetable_data():
             print(f"錯誤：找不到英文班課表檔案 {csv_file_path}")
             return False
 
-        # 讀取英文班課表 CSV
-        timetable_df = pd.read_csv(csv_file_path)
+        # 讀取英文班課表 CSV，並一次解析節次欄位
+        records = read_english_timetable_records(csv_file_path)
         
-        # 清空現有資料
+        # 清空現有資料並批次寫入（同一個交易）
         EnglishTimetable.query.delete()
-        
-        # 載入課表資料
-        for _, row in timetable_df.iterrows():
-            timetable = EnglishTimetable(
-                day=row['Day'],
-                classroom=row['Classroom'],
-                teacher=row['Teacher'],
-                period=row['Period'],
-                class_name=row['ClassName']
-            )
-            db.session.add(timetable)
+        bulk_insert(EnglishTimetable, records)
         
         db.session.commit()
-        print(f"成功載入 {len(timetable_df)} 筆英文班課表資料")
+        print(f"成功載入 {len(records)} 筆英文班課表資料")
         return True
 
     except Exception as e:
@@ -94,29 +140,13 @@ def load_homeroom_timetable_data():
             return True
 
         # 讀取 Home Room 課表 CSV - 新格式: Day, Home Room Class Name, Period, Classroom, Teacher, Course Name
-        homeroom_df = pd.read_csv(csv_file_path)
-        print(f"讀取到 {len(homeroom_df)} 筆 Home Room 課表資料")
-        print(f"CSV 欄位: {list(homeroom_df.columns)}")
-
-        # 載入 Home Room 課表資料 - 調整欄位對應新格式
-        for _, row in homeroom_df.iterrows():
-            # 處理空值：將 NaN 或空值轉換為預設值
-            teacher = row['Teacher'] if pd.notna(row['Teacher']) else 'TBD'
-            classroom = row['Classroom'] if pd.notna(row['Classroom']) else 'TBD'
-            course_name = row['Course Name'] if pd.notna(row['Course Name']) else 'TBD'
-
-            homeroom_entry = HomeRoomTimetable(
-                home_room_class_name=str(row['Home Room Class Name']),  # 確保轉為字串
-                day=row['Day'],
-                period=row['Period'],
-                classroom=classroom,
-                teacher=teacher,
-                course_name=course_name
-            )
-            db.session.add(homeroom_entry)
+        records = read_homeroom_timetable_records(csv_file_path)
+        print(f"讀取到 {len(records)} 筆 Home Room 課表資料")
+
+        bulk_insert(HomeRoomTimetable, records)
 
         db.session.commit()
-        print(f"成功載入 {len(homeroom_df)} 筆 Home Room 課表資料")
+        print(f"成功載入 {len(records)} 筆 Home Room 課表資料")
         return True
 
     except Exception as e:
@@ -135,6 +165,11 @@ def load_all_data():
         load_student_data()
         load_english_timetable_data()
         load_homeroom_timetable_data()
+        sync_search_table()
+        refresh_exam_student_counts()
+        db.session.commit()
+        refresh_snapshot()
+        bump_data_version()
     print("資料載入完成！")
 
 if __name__ == '__main__':
@@ -0,0 +1,105 @@
+"""
+資料版本計數器
+課表、學生、考試資料任何異動後遞增，供回應快取等以版本判斷是否失效
+
+多個 worker 行程（gunicorn）時以 enable_version_stamp() 啟用共用的版本檔：
+版本檔內容為「資料版本 快照世代」，異動的行程在檔案鎖內遞增後以 os.replace 整檔替換；
+其他行程每個請求以一次 stat 檢查檔案是否變動，變動時才讀取（見 snapshot.sync_snapshot()）。
+"""
+import os
+import threading
+
+_data_version = 1
+_data_version_lock = threading.Lock()
+
+# 共用版本檔（未啟用時為 None）與目前採用的快照世代
+_stamp_path = None
+_stamp_seen = None
+_snapshot_generation = 0
+
+
+def get_data_version():
+    """取得目前的資料版本"""
+    return _data_version
+
+
+def bump_data_version():
+    """資料異動後呼叫，遞增資料版本並回傳新版本"""
+    global _data_version
+    with _data_version_lock:
+        if _stamp_path is None:
+            _data_version += 1
+        else:
+            _data_version = _update_stamp(bump_version=True)[0]
+        return _data_version
+
+
+def snapshot_generation():
+    """目前行程的快照世代"""
+    return _snapshot_generation
+
+
+def mark_snapshot_changed():
+    """課表快照的來源資料異動後呼叫，通知其他行程重建快照"""
+    global _snapshot_generation
+    if _stamp_path is None:
+        return
+    with _data_version_lock:
+        _snapshot_generation = _update_stamp(bump_generation=True)[1]
+
+
+def enable_version_stamp(path):
+    """啟用多行程共用的版本檔，沿用檔案中既有的版本（需在 fork worker 前呼叫）"""
+    global _stamp_path, _data_version, _snapshot_generation
+    with _data_version_lock:
+        _stamp_path = path
+        _data_version, _snapshot_generation = _update_stamp()
+
+
+def read_version_stamp():
+    """版本檔自上次採用後有變動時回傳 (資料版本, 快照世代, 檔案識別)，否則回傳 None"""
+    if _stamp_path is None:
+        return None
+    try:
+        stat = os.stat(_stamp_path)
+    except OSError:
+        return None
+    seen = (stat.st_ino, stat.st_mtime_ns)
+    if seen == _stamp_seen:
+        return None
+    stamp = _read_stamp()
+    return None if stamp is None else (*stamp, seen)
+
+
+def adopt_version_stamp(version, generation, seen):
+    """採用其他行程寫入的版本（快照需先重建完成）"""
+    global _data_version, _snapshot_generation, _stamp_seen
+    with _data_version_lock:
+        _data_version = max(_data_version, version)
+        _snapshot_generation = generation
+        _stamp_seen = seen
+
+
+def _read_stamp():
+    try:
+        with open(_stamp_path) as stamp_file:
+            version, generation = (int(value) for value in stamp_file.read().split())
+    except (OSError, ValueError):
+        return None
+    return version, generation
+
+
+def _update_stamp(bump_version=False, bump_generation=False):
+    """在檔案鎖內讀取、遞增並寫回版本檔 -> (資料版本, 快照世代)"""
+    import fcntl
+
+    with open(f'{_stamp_path}.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        version, generation = _read_stamp() or (_data_version, _snapshot_generation)
+        version = max(version, _data_version) + (1 if bump_version else 0)
+        generation += 1 if bump_generation else 0
+        temp_path = f'{_stamp_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as stamp_file:
+            stamp_file.write(f'{version} {generation}\n')
+        os.replace(temp_path, _stamp_path)
+    return version, generation
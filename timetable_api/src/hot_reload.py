@@ -0,0 +1,239 @@
+"""
+課表資料熱更新
+重新讀取 CSV 時先寫入影子資料表（<table>__shadow）並驗證，驗證通過後在單一交易內
+以影子資料表內容替換正式資料表，再重建課表快照。替換前正在處理的請求看到的是舊資料，
+替換後看到的是完整的新資料，不會出現空白或載入一半的狀態；考試資料不受影響。
+
+影子資料表名稱固定，多個 worker 行程（gunicorn）共用同一個資料庫，因此整個熱更新以資料庫旁的
+{資料庫}.reload.lock 檔案鎖保護，同一時間只有一個行程可以進行；替換前另確認影子資料表筆數與讀取的資料相符。
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import MetaData, text
+
+from src.models.timetable import db, Timetable, ClassInfo, Teacher, Classroom, Period
+from src.models.student import Student, EnglishTimetable, HomeRoomTimetable
+from src.bulk_loader import bulk_insert
+from src.snapshot import DAYS, refresh_snapshot
+from src.data_version import bump_data_version
+from src.search_fts import sync_search_table
+from src.data_loader_exam import refresh_exam_student_counts
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+
+SHADOW_SUFFIX = '__shadow'
+
+# 熱更新涵蓋的資料表（依寫入順序）
+RELOAD_MODELS = (
+    Period, ClassInfo, Teacher, Classroom, Timetable,
+    Student, EnglishTimetable, HomeRoomTimetable
+)
+
+# 允許為空的資料表（找不到 Home Room 課表檔案時沿用既有行為：視為空課表）
+OPTIONAL_MODELS = (HomeRoomTimetable,)
+
+_reload_lock = threading.Lock()
+
+# 檔案鎖的副檔名（與資料庫檔案並列）
+RELOAD_LOCK_SUFFIX = '.reload.lock'
+
+
+class ReloadInProgressError(Exception):
+    """已有熱更新正在進行"""
+
+
+def read_reload_records(data_dir=DATA_DIR):
+    """讀取所有課表相關 CSV，回傳 {model: records}"""
+    from src.data_loader import read_timetable_records
+    from src.data_loader_student import (
+        read_student_records, read_english_timetable_records, read_homeroom_timetable_records
+    )
+
+    english_csv = os.path.join(data_dir, 'english_timetable_complete.csv')
+    homeroom_csv = os.path.join(data_dir, 'homeroom_timetable_complete.csv')
+    students_csv = os.path.join(data_dir, 'students_complete.csv')
+
+    for csv_file_path in (english_csv, students_csv):
+        if not os.path.exists(csv_file_path):
+            raise FileNotFoundError(f'找不到檔案 {csv_file_path}')
+
+    records_by_model = read_timetable_records(english_csv)
+    records_by_model[Student] = read_student_records(students_csv)
+    records_by_model[EnglishTimetable] = read_english_timetable_records(english_csv)
+    records_by_model[HomeRoomTimetable] = (
+        read_homeroom_timetable_records(homeroom_csv) if os.path.exists(homeroom_csv) else []
+    )
+    return records_by_model
+
+
+def validate_reload_records(records_by_model):
+    """驗證新資料，回傳 (errors, warnings)；有 errors 時不進行替換"""
+    errors = []
+    warnings = []
+
+    for model in RELOAD_MODELS:
+        if not records_by_model[model] and model not in OPTIONAL_MODELS:
+            errors.append(f'{model.__tablename__} 沒有任何資料')
+
+    for model in (EnglishTimetable, HomeRoomTimetable):
+        records = records_by_model[model]
+        unparsed = sum(1 for record in records if record['period_number'] is None)
+        if unparsed:
+            errors.append(f'{model.__tablename__} 有 {unparsed} 筆節次無法解析')
+        unknown_days = sorted({record['day'] for record in records} - set(DAYS))
+        if unknown_days:
+            errors.append(f'{model.__tablename__} 含有無效的星期: {", ".join(map(str, unknown_days))}')
+
+    english_classes = {record['class_name'] for record in records_by_model[EnglishTimetable]}
+    homeroom_classes = {record['home_room_class_name'] for record in records_by_model[HomeRoomTimetable]}
+    students = records_by_model[Student]
+    missing_english = {s['english_class_name'] for s in students} - english_classes
+    if missing_english:
+        warnings.append(f'{len(missing_english)} 個英文班級沒有課表: {", ".join(sorted(missing_english)[:10])}')
+    if homeroom_classes:
+        missing_homeroom = {s['home_room_class_name'] for s in students} - homeroom_classes
+        if missing_homeroom:
+            warnings.append(f'{len(missing_homeroom)} 個 Home Room 班級沒有課表: {", ".join(sorted(missing_homeroom)[:10])}')
+
+    return errors, warnings
+
+
+def reload_timetable_data(data_dir=DATA_DIR):
+    """
+    以影子資料表熱更新課表、學生資料（需在 app context 內呼叫）
+
+    回傳報告 dict：success、rows（各資料表新筆數）、previous_rows、timings（秒）、errors、warnings，
+    以及 exam_student_counts_updated（依新學生名單更新人數的班級考試資訊筆數）
+    """
+    with _exclusive_reload():
+        timings = {}
+        started = time.perf_counter()
+
+        # 1. 讀取 CSV
+        records_by_model = read_reload_records(data_dir)
+        timings['read'] = time.perf_counter() - started
+
+        # 2. 驗證
+        step = time.perf_counter()
+        errors, warnings = validate_reload_records(records_by_model)
+        timings['validate'] = time.perf_counter() - step
+
+        report = {
+            'success': not errors,
+            'rows': {model.__tablename__: len(records_by_model[model]) for model in RELOAD_MODELS},
+            'previous_rows': {
+                model.__tablename__: db.session.query(model).count() for model in RELOAD_MODELS
+            },
+            'errors': errors,
+            'warnings': warnings,
+            'timings': timings
+        }
+        if errors:
+            timings['total'] = time.perf_counter() - started
+            return report
+
+        # 3. 寫入影子資料表（唯一鍵等資料表限制在此一併檢查）
+        step = time.perf_counter()
+        shadow_tables = _create_shadow_tables()
+        try:
+            for model in RELOAD_MODELS:
+                bulk_insert(shadow_tables[model], records_by_model[model])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            _drop_shadow_tables(shadow_tables)
+            report['success'] = False
+            report['errors'].append(f'寫入影子資料表失敗: {e}')
+            timings['total'] = time.perf_counter() - started
+            return report
+        timings['load_shadow'] = time.perf_counter() - step
+
+        # 影子資料表須完整包含本次讀取的資料，否則不替換
+        mismatched = [
+            model.__tablename__ for model in RELOAD_MODELS
+            if db.session.execute(
+                db.select(db.func.count()).select_from(shadow_tables[model])
+            ).scalar() != len(records_by_model[model])
+        ]
+        if mismatched:
+            _drop_shadow_tables(shadow_tables)
+            report['success'] = False
+            report['errors'].append(f'影子資料表筆數與讀取的資料不符: {", ".join(mismatched)}')
+            timings['total'] = time.perf_counter() - started
+            return report
+
+        # 4. 單一交易內替換正式資料表
+        step = time.perf_counter()
+        try:
+            for model in RELOAD_MODELS:
+                live = model.__table__
+                columns = ', '.join(column.name for column in live.columns)
+                db.session.execute(live.delete())
+                db.session.execute(text(
+                    f'INSERT INTO {live.name} ({columns}) SELECT {columns} FROM {shadow_tables[model].name}'
+                ))
+            sync_search_table()
+            report['exam_student_counts_updated'] = refresh_exam_student_counts()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            _drop_shadow_tables(shadow_tables)
+        timings['swap'] = time.perf_counter() - step
+
+        # 5. 重建快照並使回應快取失效
+        step = time.perf_counter()
+        refresh_snapshot()
+        bump_data_version()
+        timings['snapshot'] = time.perf_counter() - step
+
+        timings['total'] = time.perf_counter() - started
+        report['timings'] = {name: round(seconds, 4) for name, seconds in timings.items()}
+        return report
+
+
+@contextmanager
+def _exclusive_reload():
+    """同一時間只允許一個熱更新：行程內以執行緒鎖、跨行程以資料庫旁的檔案鎖"""
+    import fcntl
+
+    if not _reload_lock.acquire(blocking=False):
+        raise ReloadInProgressError('已有資料熱更新正在進行')
+    try:
+        database = db.engine.url.database
+        if not database or database == ':memory:':
+            yield
+            return
+        with open(database + RELOAD_LOCK_SUFFIX, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise ReloadInProgressError('已有資料熱更新正在進行（其他 worker）')
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    finally:
+        _reload_lock.release()
+
+
+def _create_shadow_tables():
+    """建立與正式資料表相同結構（不含索引）的影子資料表"""
+    metadata = MetaData()
+    shadow_tables = {}
+    for model in RELOAD_MODELS:
+        shadow = model.__table__.to_metadata(metadata, name=model.__tablename__ + SHADOW_SUFFIX)
+        shadow.indexes.clear()
+        shadow_tables[model] = shadow
+    metadata.drop_all(db.engine)
+    metadata.create_all(db.engine)
+    return shadow_tables
+
+
+def _drop_shadow_tables(shadow_tables):
+    for shadow in shadow_tables.values():
+        shadow.drop(db.engine, checkfirst=True)
@@ -6,6 +6,8 @@ from src.routes.timetable import timetable_bp
 from src.routes.student import student_bp
 from src.routes.teacher import teacher_bp
 from src.routes.admin import admin_bp
+from src.routes.exam import exam_bp
+from src.response_cache import enable_response_cache
 
 # Import exam models to ensure they are registered with SQLAlchemy
 from src.models import exam
@@ -37,12 +39,15 @@ CORS(app, origins=all_origins,
      allow_headers=['Content-Type', 'Authorization', 'X-Admin-Key'],
      supports_credentials=False)
 
+# 查詢路由的 GET 回應快取（ETag / If-None-Match），資料版本遞增時失效
+for blueprint in (timetable_bp, student_bp, teacher_bp, exam_bp):
+    enable_response_cache(blueprint)
+
 app.register_blueprint(timetable_bp, url_prefix='/api')
 app.register_blueprint(student_bp, url_prefix='/api')
 app.register_blueprint(teacher_bp, url_prefix='/api')
 
-# Import and register exam blueprint
-from src.routes.exam import exam_bp
+# Register exam blueprint
 app.register_blueprint(exam_bp, url_prefix='/api')
 
 # Register admin blueprint for database maintenance
@@ -81,6 +86,13 @@ def enable_wal_mode():
             app._wal_enabled = True
             print("✅ SQLite WAL mode enabled for better performance")
 
+# 多個 worker 行程（gunicorn.conf.py）共用資料版本：任一行程異動資料後，其他行程於下一個請求前同步
+if os.environ.get('SHARED_DATA_VERSION', '').lower() in ('1', 'true'):
+    from src.data_version import enable_version_stamp
+    from src.snapshot import sync_snapshot
+    enable_version_stamp(f'{db_path}.version')
+    app.before_request(sync_snapshot)
+
 def initialize_data():
     """初始化數據庫並載入初始數據"""
     from src.data_loader import load_timetable_data
@@ -151,9 +163,18 @@ with app.app_context():
     db.create_all()
     print("Database tables created successfully.")
 
+    # 補上既有資料表缺少的欄位與索引
+    from src.schema import upgrade_schema
+    upgrade_schema()
+
     # 初始化數據
     initialize_data()
 
+    # 建立課表記憶體快照，查詢路由直接由快照回應
+    from src.snapshot import rebuild_snapshot
+    rebuild_snapshot()
+    print("Timetable snapshot built.")
+
 # API Routes
 @app.route('/')
 def api_info():
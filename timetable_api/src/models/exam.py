@@ -9,6 +9,9 @@ from datetime import datetime
 class ExamSession(db.Model):
     """考試場次 - 記錄每個 GradeBand 的考試時間資訊"""
     __tablename__ = 'exam_sessions'
+    __table_args__ = (
+        db.Index('idx_exam_sessions_exam_date', 'exam_date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     grade_band = db.Column(db.String(20), unique=True, nullable=False)  # G1 LT's, G2 IT's, etc.
@@ -44,6 +47,9 @@ class ExamSession(db.Model):
 class ClassExamInfo(db.Model):
     """班級考試資訊 - 記錄每個班級的考試基本資料"""
     __tablename__ = 'class_exam_info'
+    __table_args__ = (
+        db.Index('idx_class_exam_info_exam_session_id', 'exam_session_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     class_name = db.Column(db.String(50), nullable=False, unique=True)  # G1 Achievers, G3 Trailblazers
@@ -2,6 +2,12 @@ from src.models.timetable import db
 
 class Student(db.Model):
     __tablename__ = 'students'
+    __table_args__ = (
+        db.Index('idx_students_student_name', 'student_name'),
+        db.Index('idx_students_english_class', 'english_class_name'),
+        db.Index('idx_students_homeroom_class', 'home_room_class_name'),
+        db.Index('idx_students_ev_class', 'ev_myreading_class_name'),
+    )
     
     student_id = db.Column(db.String(20), primary_key=True)
     student_name = db.Column(db.String(100), nullable=False)
@@ -20,12 +26,22 @@ class Student(db.Model):
 
 class EnglishTimetable(db.Model):
     __tablename__ = 'english_timetable'
+    __table_args__ = (
+        db.Index('idx_english_timetable_day_period', 'day', 'period_number'),
+        db.Index('idx_english_timetable_start_end', 'start_time', 'end_time'),
+        db.Index('idx_english_timetable_class_name', 'class_name'),
+        db.Index('idx_english_timetable_teacher', 'teacher'),
+        db.Index('idx_english_timetable_classroom', 'classroom'),
+    )
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     day = db.Column(db.String(20), nullable=False)
     classroom = db.Column(db.String(20), nullable=False)
     teacher = db.Column(db.String(100), nullable=False)
-    period = db.Column(db.String(30), nullable=False)
+    period = db.Column(db.String(30), nullable=False)  # (3)10:20-11:00
+    period_number = db.Column(db.Integer, nullable=True)  # 3（載入時由 period 解析）
+    start_time = db.Column(db.String(10), nullable=True)  # 10:20
+    end_time = db.Column(db.String(10), nullable=True)  # 11:00
     class_name = db.Column(db.String(50), nullable=False)
     
     def to_dict(self):
@@ -35,16 +51,29 @@ class EnglishTimetable(db.Model):
             'classroom': self.classroom,
             'teacher': self.teacher,
             'period': self.period,
+            'period_number': self.period_number,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
             'class_name': self.class_name
         }
 
 class HomeRoomTimetable(db.Model):
     __tablename__ = 'homeroom_timetable'
+    __table_args__ = (
+        db.Index('idx_homeroom_timetable_day_period', 'day', 'period_number'),
+        db.Index('idx_homeroom_timetable_start_end', 'start_time', 'end_time'),
+        db.Index('idx_homeroom_timetable_class_name', 'home_room_class_name'),
+        db.Index('idx_homeroom_timetable_teacher', 'teacher'),
+        db.Index('idx_homeroom_timetable_classroom', 'classroom'),
+    )
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     home_room_class_name = db.Column(db.String(20), nullable=False)
     day = db.Column(db.String(20), nullable=False)
-    period = db.Column(db.String(30), nullable=False)
+    period = db.Column(db.String(30), nullable=False)  # (1)08:25-09:05
+    period_number = db.Column(db.Integer, nullable=True)  # 1（載入時由 period 解析）
+    start_time = db.Column(db.String(10), nullable=True)  # 08:25
+    end_time = db.Column(db.String(10), nullable=True)  # 09:05
     classroom = db.Column(db.String(20), nullable=False)
     teacher = db.Column(db.String(100), nullable=False)
     course_name = db.Column(db.String(100), nullable=False)
@@ -55,6 +84,9 @@ class HomeRoomTimetable(db.Model):
             'home_room_class_name': self.home_room_class_name,
             'day': self.day,
             'period': self.period,
+            'period_number': self.period_number,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
             'classroom': self.classroom,
             'teacher': self.teacher,
             'course_name': self.course_name
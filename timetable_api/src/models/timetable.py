@@ -4,6 +4,11 @@ db = SQLAlchemy()
 
 class Timetable(db.Model):
     __tablename__ = 'timetable'
+    __table_args__ = (
+        db.Index('idx_timetable_class_day_period', 'class_name', 'day', 'period_number'),
+        db.Index('idx_timetable_day_period', 'day', 'period_number'),
+        db.Index('idx_timetable_teacher', 'teacher'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     day = db.Column(db.String(10), nullable=False)  # Monday, Tuesday, etc.
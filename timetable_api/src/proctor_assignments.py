@@ -0,0 +1,182 @@
+"""
+監考分配批次寫入
+以集合方式處理批次新增/更新：先逐筆驗證所有資料，再以一次 IN 查詢取得既有分配與班級，
+新增與更新各自以 executemany 寫入，整批在同一個交易內完成（呼叫端負責 commit）。
+"""
+from datetime import datetime
+
+from src.models.timetable import db
+from src.models.exam import ClassExamInfo, ProctorAssignment
+
+# 可更新的欄位；新增時未提供的欄位預設為空字串（與單筆新增 API 相同）
+ASSIGNMENT_FIELDS = ('proctor_teacher', 'classroom', 'notes')
+
+# IN 查詢每批的參數數量（低於 SQLite 參數上限）
+PREFETCH_CHUNK_SIZE = 500
+
+
+class RowError:
+    """單筆資料的錯誤"""
+
+    def __init__(self, index, class_exam_info_id, error):
+        self.index = index
+        self.class_exam_info_id = class_exam_info_id
+        self.error = error
+
+    def to_dict(self):
+        return {
+            'index': self.index,
+            'class_exam_info_id': self.class_exam_info_id,
+            'error': self.error
+        }
+
+    def __str__(self):
+        if self.class_exam_info_id is None:
+            return f'第 {self.index + 1} 筆: {self.error}'
+        return f'第 {self.index + 1} 筆 (class_exam_info_id={self.class_exam_info_id}): {self.error}'
+
+
+def _chunks(values, size=PREFETCH_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def fetch_existing_assignments(class_exam_info_ids):
+    """{class_exam_info_id: proctor_assignment_id}，以 IN 查詢一次取得"""
+    existing = {}
+    for chunk in _chunks(class_exam_info_ids):
+        existing.update(db.session.execute(
+            db.select(ProctorAssignment.class_exam_info_id, ProctorAssignment.id)
+            .where(ProctorAssignment.class_exam_info_id.in_(chunk))
+        ).all())
+    return existing
+
+
+def fetch_class_exam_info_ids(class_exam_info_ids):
+    """實際存在的 class_exam_info_id"""
+    found = set()
+    for chunk in _chunks(class_exam_info_ids):
+        found.update(db.session.execute(
+            db.select(ClassExamInfo.id).where(ClassExamInfo.id.in_(chunk))
+        ).scalars())
+    return found
+
+
+def parse_class_exam_info_id(value):
+    """class_exam_info_id 轉為整數（接受數字字串），格式錯誤時回傳 None"""
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int):
+        return None
+    return value
+
+
+def validate_assignments(assignments):
+    """
+    逐筆驗證批次資料，回傳 (rows, errors)
+
+    rows: [(index, class_exam_info_id, {欄位: 值})]，只含通過驗證的資料
+    errors: [RowError]
+    """
+    rows = []
+    errors = []
+    for index, assignment in enumerate(assignments):
+        if not isinstance(assignment, dict):
+            errors.append(RowError(index, None, '資料格式錯誤，應為物件'))
+            continue
+        if 'class_exam_info_id' not in assignment:
+            errors.append(RowError(index, None, '缺少 class_exam_info_id'))
+            continue
+
+        class_exam_info_id = parse_class_exam_info_id(assignment['class_exam_info_id'])
+        if class_exam_info_id is None:
+            errors.append(RowError(index, assignment['class_exam_info_id'], 'class_exam_info_id 必須為整數'))
+            continue
+
+        values = {}
+        for field in ASSIGNMENT_FIELDS:
+            if field not in assignment:
+                continue
+            value = assignment[field]
+            if value is None and field == 'notes':
+                values[field] = None
+            elif isinstance(value, str):
+                values[field] = value
+            else:
+                errors.append(RowError(index, class_exam_info_id, f'{field} 必須為字串'))
+                break
+        else:
+            rows.append((index, class_exam_info_id, values))
+
+    # 班級必須存在
+    known_ids = fetch_class_exam_info_ids({row[1] for row in rows})
+    valid_rows = []
+    for index, class_exam_info_id, values in rows:
+        if class_exam_info_id in known_ids:
+            valid_rows.append((index, class_exam_info_id, values))
+        else:
+            errors.append(RowError(index, class_exam_info_id, '找不到此班級考試資訊'))
+
+    errors.sort(key=lambda error: error.index)
+    return valid_rows, errors
+
+
+def upsert_assignments(rows, insert_defaults=None):
+    """
+    批次新增或更新監考分配（不 commit）
+
+    rows 為 validate_assignments() 回傳的資料；同一班級出現多次時依序合併，後者覆蓋前者。
+    已有分配的班級只更新有提供的欄位；新增時未提供的欄位使用 insert_defaults（預設為空字串）。
+    回傳 (created, updated) 筆數。
+    """
+    defaults = {field: '' for field in ASSIGNMENT_FIELDS}
+    defaults.update(insert_defaults or {})
+    existing = fetch_existing_assignments({row[1] for row in rows})
+    now = datetime.utcnow()
+
+    inserts = {}
+    updates = {}
+    created = updated = 0
+    for _, class_exam_info_id, values in rows:
+        if class_exam_info_id in existing or class_exam_info_id in inserts:
+            updated += 1
+        else:
+            created += 1
+
+        if class_exam_info_id in existing:
+            updates.setdefault(class_exam_info_id, {}).update(values)
+        else:
+            inserts.setdefault(class_exam_info_id, {}).update(values)
+
+    if inserts:
+        db.session.execute(db.insert(ProctorAssignment), [
+            {
+                'class_exam_info_id': class_exam_info_id,
+                **defaults,
+                **values,
+                'created_at': now,
+                'updated_at': now
+            }
+            for class_exam_info_id, values in inserts.items()
+        ])
+
+    # 依提供的欄位組合分組，每組一次 executemany
+    update_groups = {}
+    for class_exam_info_id, values in updates.items():
+        fields = tuple(field for field in ASSIGNMENT_FIELDS if field in values)
+        update_groups.setdefault(fields, []).append({
+            'row_id': existing[class_exam_info_id],
+            'updated_at': now,
+            **{field: values[field] for field in fields}
+        })
+    table = ProctorAssignment.__table__
+    for fields, params in update_groups.items():
+        db.session.execute(
+            table.update()
+            .where(table.c.id == db.bindparam('row_id'))
+            .values(updated_at=db.bindparam('updated_at'), **{field: db.bindparam(field) for field in fields}),
+            params
+        )
+
+    return created, updated
@@ -0,0 +1,311 @@
+"""
+監考衝突檢查
+將考試時間（exam_date + exam_time）解析為以分鐘表示的區間，依監考老師與教室各自建立區間索引。
+同一資源同一天的區間依開始時間排序，查詢時以 bisect 找出開始時間早於查詢區間結束的項目，
+再往前檢查到前綴最大結束時間不晚於查詢開始為止。加入區間需移動串列（O(n)），
+查詢為 O(log n + m)，m 為往前檢查的項目數；較早開始的長區間會使 m 大於重疊數 k。
+同一位老師或同一間教室每天只有數場考試，n 很小，不需要更複雜的區間樹。
+
+索引以資料版本為單位快取（監考分配異動後 bump_data_version 即重建），寫入前只需查詢索引。
+"""
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+
+from src.models.timetable import db
+from src.models.exam import ExamSession, ClassExamInfo, ProctorAssignment
+from src.data_version import get_data_version
+from src.snapshot import get_snapshot
+from src.proctor_assignments import RowError
+
+# 班級的考試時段；start/end 為當天的分鐘數，無法解析時為 None
+Slot = namedtuple('Slot', ['class_exam_info_id', 'class_name', 'exam_date', 'exam_time', 'start', 'end'])
+
+# 班級的監考分配（proctor_assignment_id 為 None 表示尚未寫入）
+Booking = namedtuple('Booking', ['slot', 'proctor_assignment_id', 'proctor_teacher', 'classroom'])
+
+RESOURCE_TYPES = ('teacher', 'classroom')
+
+TITLE_PATTERN = re.compile(r'^(Mr|Ms|Mrs|Miss|Dr)\.?\s+', re.IGNORECASE)
+
+
+def parse_time_range(value):
+    """'10:30-11:45' -> (630, 705)，格式不符時回傳 None"""
+    try:
+        start, end = (part.strip() for part in value.split('-'))
+        start_hour, start_minute = start.split(':')
+        end_hour, end_minute = end.split(':')
+        start = int(start_hour) * 60 + int(start_minute)
+        end = int(end_hour) * 60 + int(end_minute)
+    except (AttributeError, ValueError):
+        return None
+    return (start, end) if start < end else None
+
+
+def split_proctors(proctor_teacher):
+    """'Mr. Thompson/Ms. Liza' -> ('Mr. Thompson', 'Ms. Liza')"""
+    if not proctor_teacher:
+        return ()
+    return tuple(name.strip() for name in proctor_teacher.split('/') if name.strip())
+
+
+def teacher_name_tokens(teacher_names):
+    """{名字（小寫）: {課表教師名稱}}，供 canonical_teacher() 對應「稱謂 + 名字」的寫法"""
+    by_token = defaultdict(set)
+    for name in teacher_names:
+        for token in name.split():
+            by_token[token.lower()].add(name)
+    return by_token
+
+
+def canonical_teacher(name, by_token):
+    """
+    監考名單的名稱 -> 課表教師名稱，例如 'Mr. Van' -> 'Carlo Van Rensburg'
+    （課表中恰有一位教師含有該名字時才對應，否則回傳原名稱）
+    """
+    stripped = TITLE_PATTERN.sub('', name).strip()
+    if stripped != name.strip() and ' ' not in stripped:
+        matches = by_token.get(stripped.lower(), ())
+        if len(matches) == 1:
+            return next(iter(matches))
+    return name.strip()
+
+
+def booking_resources(booking, by_token=None):
+    """此監考分配占用的資源 -> [(類型, 名稱)]，監考老師以 canonical_teacher() 換成課表名稱"""
+    resources = [
+        ('teacher', canonical_teacher(name, by_token or {}))
+        for name in split_proctors(booking.proctor_teacher)
+    ]
+    classroom = (booking.classroom or '').strip()
+    if classroom:
+        resources.append(('classroom', classroom))
+    return resources
+
+
+class IntervalList:
+    """
+    單一資源在單一日期的區間，依 (start, end) 排序
+
+    add() 為 O(n)（插入串列並重算插入點之後的前綴最大值）；
+    overlapping() 為 O(log n + m)，m 為往前檢查的項目數（至少為重疊數 k，最多為 n）
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.entries = []  # (start, end, Booking)
+        self.max_ends = []  # max_ends[i] = max(end for entries[:i + 1])
+
+    def add(self, booking):
+        slot = booking.slot
+        index = bisect_right(self.starts, slot.start)
+        self.starts.insert(index, slot.start)
+        self.entries.insert(index, (slot.start, slot.end, booking))
+        running = self.max_ends[index - 1] if index else slot.end
+        del self.max_ends[index:]
+        for start, end, _ in self.entries[index:]:
+            running = max(running, end)
+            self.max_ends.append(running)
+
+    def overlapping(self, start, end):
+        """與 [start, end) 重疊的監考分配（由最後一個開始時間早於 end 的項目往前檢查）"""
+        index = bisect_left(self.starts, end) - 1
+        found = []
+        while index >= 0 and self.max_ends[index] > start:
+            if self.entries[index][1] > start:
+                found.append(self.entries[index][2])
+            index -= 1
+        return found
+
+
+def _conflict(resource_type, resource, booking, other):
+    return {
+        'type': resource_type,
+        'resource': resource,
+        'exam_date': booking.slot.exam_date,
+        'classes': [
+            {
+                'class_exam_info_id': item.slot.class_exam_info_id,
+                'class_name': item.slot.class_name,
+                'exam_time': item.slot.exam_time,
+                'proctor_assignment_id': item.proctor_assignment_id
+            }
+            for item in (booking, other)
+        ]
+    }
+
+
+class ConflictIndex:
+    """
+    所有班級的考試時段與監考分配，依 (資源類型, 名稱, 日期) 建立區間索引
+
+    by_token 為 teacher_name_tokens() 的結果：'Mr. Thompson' 與課表名稱視為同一位監考老師
+    """
+
+    def __init__(self, slots=None, by_token=None):
+        self.slots = dict(slots or {})  # class_exam_info_id -> Slot
+        self.by_token = by_token or {}
+        self.bookings = {}  # class_exam_info_id -> Booking
+        self._intervals = {}  # (資源類型, 名稱, 日期) -> IntervalList
+
+    @classmethod
+    def build(cls):
+        """以一次查詢（班級 JOIN 考試場次 LEFT JOIN 監考分配）建立索引"""
+        index = cls(by_token=teacher_name_tokens(get_snapshot().teachers))
+        rows = db.session.execute(
+            db.select(
+                ClassExamInfo.id, ClassExamInfo.class_name, ExamSession.exam_date, ExamSession.exam_time,
+                ProctorAssignment.id, ProctorAssignment.proctor_teacher, ProctorAssignment.classroom
+            )
+            .join(ExamSession, ClassExamInfo.exam_session_id == ExamSession.id)
+            .outerjoin(ProctorAssignment, ProctorAssignment.class_exam_info_id == ClassExamInfo.id)
+        )
+        for class_exam_info_id, class_name, exam_date, exam_time, assignment_id, proctor_teacher, classroom in rows:
+            interval = parse_time_range(exam_time) or (None, None)
+            slot = Slot(class_exam_info_id, class_name, exam_date, exam_time, *interval)
+            index.slots[class_exam_info_id] = slot
+            if assignment_id is not None:
+                index.add(Booking(slot, assignment_id, proctor_teacher, classroom))
+        return index
+
+    def add(self, booking):
+        self.bookings[booking.slot.class_exam_info_id] = booking
+        if booking.slot.start is None:
+            return
+        for resource_type, name in booking_resources(booking, self.by_token):
+            key = (resource_type, name, booking.slot.exam_date)
+            intervals = self._intervals.get(key)
+            if intervals is None:
+                intervals = self._intervals[key] = IntervalList()
+            intervals.add(booking)
+
+    def booking_for(self, class_exam_info_id, proctor_teacher, classroom, proctor_assignment_id=None):
+        """以班級的考試時段建立待檢查的監考分配，找不到班級時回傳 None"""
+        slot = self.slots.get(class_exam_info_id)
+        if slot is None:
+            return None
+        return Booking(slot, proctor_assignment_id, proctor_teacher, classroom)
+
+    def check(self, booking, ignore=()):
+        """
+        此監考分配與索引中其他班級的衝突 -> [conflict]
+
+        同一班級（即將被取代的分配）及 ignore 中的 class_exam_info_id 不列入。
+        """
+        if booking.slot.start is None:
+            return []
+        skip = set(ignore)
+        skip.add(booking.slot.class_exam_info_id)
+        conflicts = []
+        for resource_type, name in booking_resources(booking, self.by_token):
+            intervals = self._intervals.get((resource_type, name, booking.slot.exam_date))
+            if intervals is None:
+                continue
+            for other in intervals.overlapping(booking.slot.start, booking.slot.end):
+                if other.slot.class_exam_info_id not in skip:
+                    conflicts.append(_conflict(resource_type, name, booking, other))
+        return conflicts
+
+    def all_conflicts(self):
+        """一次掃描所有區間，列出每一組重疊的監考分配"""
+        conflicts = []
+        for (resource_type, name, _), intervals in sorted(self._intervals.items()):
+            active = []
+            for start, end, booking in intervals.entries:
+                active = [other for other in active if other.slot.end > start]
+                conflicts.extend(_conflict(resource_type, name, other, booking) for other in active)
+                active.append(booking)
+        return conflicts
+
+
+# 以資料版本為單位快取索引
+_index_version = None
+_index = None
+
+
+def get_conflict_index():
+    """目前資料版本的衝突索引（唯讀，請勿直接 add）"""
+    global _index_version, _index
+    version = get_data_version()
+    index = _index
+    if _index_version != version or index is None:
+        index = ConflictIndex.build()
+        _index, _index_version = index, version
+    return index
+
+
+def check_assignment(class_exam_info_id, proctor_teacher, classroom, proctor_assignment_id=None):
+    """檢查單筆監考分配寫入後是否與其他班級衝突 -> [conflict]"""
+    index = get_conflict_index()
+    booking = index.booking_for(class_exam_info_id, proctor_teacher, classroom, proctor_assignment_id)
+    return index.check(booking) if booking else []
+
+
+def check_batch_conflicts(rows):
+    """
+    檢查批次資料（validate_assignments() 的結果）的衝突 -> (rows, errors)
+
+    每筆資料先與資料庫中的其他分配比對（本批次更新的班級除外），再與本批次先前通過的資料
+    及不寫入而保留既有分配的班級比對；未提供的欄位沿用既有分配。有衝突的資料不寫入，以 RowError 回報。
+    """
+    index = get_conflict_index()
+    batch_ids = {row[1] for row in rows}
+
+    # 同一班級出現多次時依序合併，與 upsert_assignments() 相同
+    merged = {}
+    for _, class_exam_info_id, values in rows:
+        if class_exam_info_id not in merged:
+            existing = index.bookings.get(class_exam_info_id)
+            merged[class_exam_info_id] = {
+                'proctor_teacher': existing.proctor_teacher if existing else '',
+                'classroom': existing.classroom if existing else '',
+                'proctor_assignment_id': existing.proctor_assignment_id if existing else None
+            }
+        merged[class_exam_info_id].update(
+            (field, values[field]) for field in ('proctor_teacher', 'classroom') if field in values
+        )
+
+    # 依序檢查，通過的資料立即加入 batch，後續資料需與其比對。
+    # 不寫入的班級保留既有分配，可能與先前已通過的資料衝突，因此重新檢查直到不再有新的衝突
+    rejected = {}
+    while True:
+        batch = ConflictIndex(index.slots, index.by_token)
+        for class_exam_info_id in rejected:
+            if class_exam_info_id in index.bookings:
+                batch.add(index.bookings[class_exam_info_id])
+        newly_rejected = {}
+        for class_exam_info_id, values in merged.items():
+            if class_exam_info_id in rejected:
+                continue
+            booking = index.booking_for(class_exam_info_id, **values)
+            if booking is None:
+                continue
+            conflicts = index.check(booking, ignore=batch_ids) + batch.check(booking)
+            if conflicts:
+                newly_rejected[class_exam_info_id] = conflicts
+                if class_exam_info_id in index.bookings:
+                    batch.add(index.bookings[class_exam_info_id])
+            else:
+                batch.add(booking)
+        if not newly_rejected:
+            break
+        rejected.update(newly_rejected)
+
+    errors = []
+    valid_rows = []
+    for position, class_exam_info_id, values in rows:
+        if class_exam_info_id in rejected:
+            errors.append(RowError(position, class_exam_info_id, describe_conflicts(rejected[class_exam_info_id])))
+        else:
+            valid_rows.append((position, class_exam_info_id, values))
+    return valid_rows, errors
+
+
+def describe_conflicts(conflicts):
+    """衝突的文字說明"""
+    labels = {'teacher': '監考老師', 'classroom': '教室'}
+    return '；'.join(
+        f"{labels[conflict['type']]} {conflict['resource']} 於 {conflict['exam_date']} "
+        f"與 {conflict['classes'][1]['class_name']}（{conflict['classes'][1]['exam_time']}）時間重疊"
+        for conflict in conflicts
+    )
@@ -0,0 +1,253 @@
+"""
+監考自動分配
+為尚未分配（或指定重新分配）的班級同時決定監考老師與考試教室：
+
+1. 依考試日期將考試時間重疊的班級分為同一組（同組的班級不可共用老師或教室）
+2. 每組分別以二分圖最大匹配（增廣路徑）配對「班級 ↔ 教室」與「班級 ↔ 監考老師」
+   - 教室：容量需 >= 學生人數 + 1，該時段沒有照常上課的課程；優先使用班級平常在該時段上課的教室，
+     其次為容量最接近的教室
+   - 監考老師：該時段沒有照常上課的課程，依目前監考次數由少到多優先
+3. 保留的既有分配放入衝突索引，候選老師與教室以 O(log n) 排除時間重疊者
+
+考試中的年級在考試當天的考試節次停課，該年級的課程不視為占用老師或教室。
+教師課表與教室課表取自記憶體快照；教室容量預設為平常在該教室上課的最大班級人數 + 1，
+可由學期目錄的 rooms.csv 覆寫或補充。
+"""
+import re
+import time
+from collections import defaultdict, namedtuple
+from datetime import datetime
+
+from src.models.timetable import db
+from src.models.exam import ExamSession, ClassExamInfo, ProctorAssignment
+from src.snapshot import get_snapshot, lesson_grade
+from src.data_loader_exam import base_class_name, read_room_capacities
+from src.proctor_conflicts import (
+    ConflictIndex, Slot, Booking, parse_time_range, split_proctors, teacher_name_tokens, canonical_teacher
+)
+
+# 待分配的班級
+ExamClass = namedtuple('ExamClass', ['slot', 'grade', 'grade_band', 'need', 'weekday', 'periods'])
+
+
+def parse_periods(periods):
+    """'P3-P4' -> (3, 4)"""
+    numbers = [int(number) for number in re.findall(r'\d+', periods or '')]
+    return tuple(range(min(numbers), max(numbers) + 1)) if numbers else ()
+
+
+def overlap_groups(classes):
+    """依日期將考試時間重疊的班級分組（時間無法解析的班級各自一組）"""
+    groups = []
+    by_date = defaultdict(list)
+    for exam_class in classes:
+        by_date[exam_class.slot.exam_date].append(exam_class)
+    for exam_date in sorted(by_date):
+        current, current_end = [], None
+        for exam_class in sorted(by_date[exam_date], key=lambda item: (item.slot.start or 0, item.slot.end or 0)):
+            if exam_class.slot.start is None:
+                groups.append([exam_class])
+                continue
+            if current and exam_class.slot.start < current_end:
+                current.append(exam_class)
+                current_end = max(current_end, exam_class.slot.end)
+            else:
+                if current:
+                    groups.append(current)
+                current, current_end = [exam_class], exam_class.slot.end
+        if current:
+            groups.append(current)
+    return groups
+
+
+def max_matching(demands, candidates):
+    """二分圖最大匹配（增廣路徑），candidates[demand] 依偏好排序 -> {demand: resource}"""
+    owner = {}
+
+    def augment(demand, seen):
+        for resource in candidates[demand]:
+            if resource in seen:
+                continue
+            seen.add(resource)
+            if resource not in owner or augment(owner[resource], seen):
+                owner[resource] = demand
+                return True
+        return False
+
+    for demand in demands:
+        augment(demand, set())
+    return {demand: resource for resource, demand in owner.items()}
+
+
+class ProctorSolver:
+    """以快照與考試資料建立限制條件，solve() 回傳分配結果"""
+
+    def __init__(self, semester=None):
+        self.snapshot = get_snapshot()
+        self.by_token = teacher_name_tokens(self.snapshot.teachers)
+
+        # 教室容量：平常在該教室上課的最大班級人數 + 1，rooms.csv 優先
+        class_sizes = defaultdict(int)
+        for student in self.snapshot.student_list:
+            class_sizes[student['english_class_name']] += 1
+        self.capacities = {}
+        for classroom, lessons in self.snapshot.classroom_lessons.items():
+            sizes = [class_sizes[lesson.class_name] for lesson in lessons if lesson.class_name in class_sizes]
+            if sizes:
+                self.capacities[classroom] = max(sizes) + 1
+        self.capacities.update(read_room_capacities(semester))
+
+        # (星期, 節次) -> [(年級, 教師)] / [(年級, 教室)]
+        self.teacher_busy = defaultdict(list)
+        for teacher, lessons in self.snapshot.teacher_lessons.items():
+            for lesson in lessons:
+                self.teacher_busy[(lesson.day, lesson.period_number)].append((lesson_grade(lesson.class_name), teacher))
+        self.room_busy = defaultdict(list)
+        for classroom, lessons in self.snapshot.classroom_lessons.items():
+            for lesson in lessons:
+                self.room_busy[(lesson.day, lesson.period_number)].append((lesson_grade(lesson.class_name), classroom))
+
+        self.classes = {}
+        self.bookings = {}
+        self.examining = defaultdict(set)  # (考試日期, 節次) -> 考試中的年級
+        rows = db.session.execute(
+            db.select(
+                ClassExamInfo.id, ClassExamInfo.class_name, ClassExamInfo.grade, ClassExamInfo.students,
+                ExamSession.grade_band, ExamSession.exam_date, ExamSession.exam_time, ExamSession.periods,
+                ProctorAssignment.id, ProctorAssignment.proctor_teacher, ProctorAssignment.classroom
+            )
+            .join(ExamSession, ClassExamInfo.exam_session_id == ExamSession.id)
+            .outerjoin(ProctorAssignment, ProctorAssignment.class_exam_info_id == ClassExamInfo.id)
+            .order_by(ClassExamInfo.id)
+        )
+        for (class_exam_info_id, class_name, grade, students, grade_band, exam_date, exam_time, periods,
+             assignment_id, proctor_teacher, classroom) in rows:
+            start, end = parse_time_range(exam_time) or (None, None)
+            slot = Slot(class_exam_info_id, class_name, exam_date, exam_time, start, end)
+            try:
+                weekday = datetime.strptime(exam_date, '%Y-%m-%d').strftime('%A')
+            except (TypeError, ValueError):
+                weekday = None
+            exam_class = ExamClass(slot, grade, grade_band, students + 1, weekday, parse_periods(periods))
+            self.classes[class_exam_info_id] = exam_class
+            for period in exam_class.periods:
+                self.examining[(exam_date, period)].add(grade)
+            if assignment_id is not None:
+                self.bookings[class_exam_info_id] = Booking(slot, assignment_id, proctor_teacher, classroom)
+
+    def _busy(self, busy, exam_class):
+        """考試節次內照常上課（該年級當天未考試）的教師或教室"""
+        occupied = set()
+        for period in exam_class.periods:
+            examining = self.examining[(exam_class.slot.exam_date, period)]
+            occupied.update(
+                resource for grade, resource in busy.get((exam_class.weekday, period), ())
+                if grade not in examining
+            )
+        return occupied
+
+    def _regular_rooms(self, exam_class):
+        """班級平常在考試節次上課的教室"""
+        lessons = self.snapshot.class_lessons.get(base_class_name(exam_class.slot.class_name), ())
+        return {
+            lesson.classroom for lesson in lessons
+            if lesson.day == exam_class.weekday and lesson.period_number in exam_class.periods
+        }
+
+    def solve(self, grade_band=None, overwrite=False):
+        """
+        回傳 (assignments, unassigned)
+
+        assignments: [{'class_exam_info_id', 'class_name', 'proctor_teacher', 'classroom'}]
+        unassigned: [{'class_exam_info_id', 'class_name', 'reason'}]
+        overwrite=False 時只分配尚無監考分配的班級；True 時重新分配範圍內的所有班級。
+        """
+        in_scope = [
+            exam_class for exam_class in self.classes.values()
+            if grade_band is None or exam_class.grade_band == grade_band
+        ]
+        targets = [
+            exam_class for exam_class in in_scope
+            if overwrite or exam_class.slot.class_exam_info_id not in self.bookings
+        ]
+        target_ids = {exam_class.slot.class_exam_info_id for exam_class in targets}
+
+        # 保留的分配（索引以課表名稱比對監考老師）
+        index = ConflictIndex(by_token=self.by_token)
+        load = defaultdict(int)
+        for class_exam_info_id, booking in self.bookings.items():
+            if class_exam_info_id in target_ids:
+                continue
+            teachers = [canonical_teacher(name, self.by_token) for name in split_proctors(booking.proctor_teacher)]
+            index.add(booking)
+            for teacher in teachers:
+                load[teacher] += 1
+
+        assignments = []
+        unassigned = []
+        for group in overlap_groups(targets):
+            # 教室：人數多的班級先配對，候選依「平常上課的教室、容量由小到大」排序
+            room_candidates = {}
+            teacher_candidates = {}
+            for exam_class in group:
+                class_exam_info_id = exam_class.slot.class_exam_info_id
+                busy_rooms = self._busy(self.room_busy, exam_class)
+                regular_rooms = self._regular_rooms(exam_class)
+                room_candidates[class_exam_info_id] = sorted(
+                    (
+                        classroom for classroom, capacity in self.capacities.items()
+                        if capacity >= exam_class.need and classroom not in busy_rooms
+                        and not index.check(Booking(exam_class.slot, None, '', classroom))
+                    ),
+                    key=lambda classroom: (classroom not in regular_rooms, self.capacities[classroom], classroom)
+                )
+                busy_teachers = self._busy(self.teacher_busy, exam_class)
+                teacher_candidates[class_exam_info_id] = sorted(
+                    (
+                        teacher for teacher in self.snapshot.teachers
+                        if teacher not in busy_teachers
+                        and not index.check(Booking(exam_class.slot, None, teacher, ''))
+                    ),
+                    key=lambda teacher: (load[teacher], teacher)
+                )
+
+            by_need = sorted(group, key=lambda exam_class: (-exam_class.need, exam_class.slot.class_exam_info_id))
+            demands = [exam_class.slot.class_exam_info_id for exam_class in by_need]
+            rooms = max_matching(demands, room_candidates)
+            teachers = max_matching(demands, teacher_candidates)
+
+            for exam_class in by_need:
+                class_exam_info_id = exam_class.slot.class_exam_info_id
+                classroom = rooms.get(class_exam_info_id)
+                teacher = teachers.get(class_exam_info_id)
+                if classroom is None or teacher is None:
+                    reasons = []
+                    if classroom is None:
+                        reasons.append(f'沒有可容納 {exam_class.need} 人的空教室')
+                    if teacher is None:
+                        reasons.append('沒有空堂的監考老師')
+                    unassigned.append({
+                        'class_exam_info_id': class_exam_info_id,
+                        'class_name': exam_class.slot.class_name,
+                        'reason': '、'.join(reasons)
+                    })
+                    continue
+                index.add(Booking(exam_class.slot, None, teacher, classroom))
+                load[teacher] += 1
+                assignments.append({
+                    'class_exam_info_id': class_exam_info_id,
+                    'class_name': exam_class.slot.class_name,
+                    'proctor_teacher': teacher,
+                    'classroom': classroom
+                })
+
+        assignments.sort(key=lambda assignment: assignment['class_exam_info_id'])
+        unassigned.sort(key=lambda item: item['class_exam_info_id'])
+        return assignments, unassigned
+
+
+def solve_proctor_assignments(grade_band=None, overwrite=False, semester=None):
+    """建立限制條件並求解 -> (assignments, unassigned, 秒數)"""
+    started = time.perf_counter()
+    assignments, unassigned = ProctorSolver(semester).solve(grade_band=grade_band, overwrite=overwrite)
+    return assignments, unassigned, time.perf_counter() - started
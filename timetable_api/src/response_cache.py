@@ -0,0 +1,126 @@
+"""
+GET 回應快取
+將查詢路由產生的回應內容（已編碼的 bytes）連同內容雜湊 ETag 一起快取，
+相同請求直接回傳快取內容；帶有相符 If-None-Match 的請求回傳 304。
+快取以資料版本區隔，資料版本遞增後舊內容即失效。
+回應內容取決於資料庫以外來源（如學期目錄下的 CSV）的路由以 @no_response_cache 排除。
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from flask import Response, current_app, g, request
+
+from src.data_version import get_data_version
+
+# 快取筆數上限（約 1,500 位學生 x 3 種課表端點，加上教師、班級、教室）
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 8000))
+
+# 除了內容本身，需要一併快取的回應標頭
+_CACHED_HEADERS = ('Content-Disposition',)
+
+
+class CachedResponse:
+    """已編碼的回應內容與其 ETag"""
+
+    __slots__ = ('body', 'etag', 'mimetype', 'headers')
+
+    def __init__(self, body, mimetype, headers):
+        self.body = body
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.mimetype = mimetype
+        self.headers = headers
+
+    def to_response(self):
+        response = Response(self.body, mimetype=self.mimetype, headers=self.headers)
+        return _finalize(response, self.etag)
+
+
+class ResponseCache:
+    """依資料版本區隔的 LRU 回應快取"""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            if version != self._version:
+                return None
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, version, entry):
+        with self._lock:
+            if version != self._version:
+                # 資料版本已變更，整份快取失效
+                self._entries.clear()
+                self._version = version
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+
+response_cache = ResponseCache()
+
+
+def enable_response_cache(blueprint):
+    """為藍圖的所有 GET 路由啟用回應快取"""
+    blueprint.before_request(_serve_from_cache)
+    blueprint.after_request(_store_in_cache)
+
+
+def no_response_cache(view):
+    """排除不應快取的路由（回應內容不隨資料版本變更，例如直接讀取檔案）"""
+    view.no_response_cache = True
+    return view
+
+
+def _serve_from_cache():
+    if request.method != 'GET':
+        return None
+    view = current_app.view_functions.get(request.endpoint)
+    if getattr(view, 'no_response_cache', False):
+        return None
+
+    version = get_data_version()
+    g.response_cache_version = version
+    entry = response_cache.get(request.full_path, version)
+    if entry is None:
+        return None
+    return entry.to_response()
+
+
+def _store_in_cache(response):
+    version = g.pop('response_cache_version', None)
+    if (version is None or response.status_code != 200
+            or response.is_streamed or response.headers.get('ETag')):
+        return response
+
+    # 僅在處理期間資料版本未變更時才寫入快取
+    entry = CachedResponse(
+        body=response.get_data(),
+        mimetype=response.mimetype,
+        headers={name: response.headers[name] for name in _CACHED_HEADERS if name in response.headers}
+    )
+    if version == get_data_version():
+        response_cache.put(request.full_path, version, entry)
+    return _finalize(response, entry.etag)
+
+
+def _finalize(response, etag):
+    """設定 ETag 並依 If-None-Match 回傳 304"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
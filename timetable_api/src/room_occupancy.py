@@ -0,0 +1,157 @@
+"""
+空教室查詢
+由快照中的英文班與 Home Room 課表，以及考試場次與監考分配的考試教室，預先計算每個時段的空教室：
+
+- 一般週課表：(星期, 節次) -> 空教室
+- 考試日期：(日期, 節次) -> 空教室（考試中的年級停課，考試教室視為占用；
+  尚未分配考試教室的班級在平常上課的教室考試，該教室仍視為占用）
+
+每個時段的結果已依樓層分組並排序，查詢只需一次 dict 取值，與教室數量無關。
+教室名單為教室資料表、課表與監考分配中出現過的所有教室。索引以資料版本為單位快取。
+"""
+from collections import defaultdict
+from datetime import datetime
+from types import MappingProxyType
+
+from src.models.timetable import db
+from src.models.exam import ExamSession, ClassExamInfo, ProctorAssignment
+from src.data_version import get_data_version
+from src.snapshot import DAYS, get_snapshot, lesson_grade
+from src.data_loader_exam import base_class_name
+from src.teacher_availability import PERIOD_SLOTS, parse_period_numbers
+
+ALL_FLOORS = None
+
+
+def extract_floor(classroom_name):
+    """從教室名稱提取樓層 (E301 -> E3, KCFS1 -> KCFS)"""
+    if not classroom_name:
+        return 'Other'
+    if classroom_name.startswith('KCFS'):
+        return 'KCFS'
+    # E101 -> E1, E301 -> E3
+    if len(classroom_name) >= 2 and classroom_name[0].isalpha() and classroom_name[1].isdigit():
+        return classroom_name[:2]
+    return 'Other'
+
+
+def _grouped(rooms):
+    """{樓層: (教室, ...)}，另以 ALL_FLOORS 為鍵存放全部教室"""
+    grouped = defaultdict(list)
+    for room in sorted(rooms):
+        grouped[extract_floor(room)].append(room)
+    result = {floor: tuple(names) for floor, names in grouped.items()}
+    result[ALL_FLOORS] = tuple(sorted(rooms))
+    return MappingProxyType(result)
+
+
+class RoomOccupancy:
+    """唯讀的空教室索引"""
+
+    def __init__(self, snapshot, exam_bookings):
+        """exam_bookings: [(考試教室或 None, 班級名稱, 年級, 考試日期, 節次字串)]"""
+        rooms = set(snapshot.classroom_names)
+        lessons_by_slot = defaultdict(list)  # (星期, 節次) -> [(年級, 教室)]
+        class_rooms = defaultdict(set)  # (班級, 星期, 節次) -> 平常上課的教室
+        for lessons in snapshot.class_lessons.values():
+            for lesson in lessons:
+                if lesson.class_type in ('english', 'homeroom') and lesson.classroom:
+                    rooms.add(lesson.classroom)
+                    lessons_by_slot[(lesson.day, lesson.period_number)].append(
+                        (lesson_grade(lesson.class_name), lesson.classroom)
+                    )
+                    class_rooms[(lesson.class_name, lesson.day, lesson.period_number)].add(lesson.classroom)
+
+        exams_by_slot = defaultdict(list)  # (日期, 節次) -> [(年級, 考試教室, 班級)]
+        for classroom, class_name, grade, exam_date, periods in exam_bookings:
+            try:
+                period_numbers = parse_period_numbers(periods)
+            except ValueError:
+                continue
+            classroom = (classroom or '').strip()
+            for period_number in period_numbers:
+                exams_by_slot[(exam_date, period_number)].append((grade, classroom, base_class_name(class_name)))
+            if classroom:
+                rooms.add(classroom)
+
+        self.rooms = frozenset(rooms)
+        self.floors = tuple(sorted({extract_floor(room) for room in rooms}))
+        self._weekly = {
+            (day, period_number): _grouped(
+                self.rooms - {room for _, room in lessons_by_slot.get((day, period_number), ())}
+            )
+            for day in DAYS for period_number in range(1, PERIOD_SLOTS + 1)
+        }
+
+        self._exam_days = {}
+        self._exam = {}
+        for exam_date in {exam_date for exam_date, _ in exams_by_slot}:
+            try:
+                day = datetime.strptime(exam_date, '%Y-%m-%d').strftime('%A')
+            except (TypeError, ValueError):
+                continue
+            self._exam_days[exam_date] = day
+            for period_number in range(1, PERIOD_SLOTS + 1):
+                exams = exams_by_slot.get((exam_date, period_number), ())
+                examining = {grade for grade, _, _ in exams}
+                occupied = set()
+                for _, room, class_name in exams:
+                    if room:
+                        occupied.add(room)
+                    else:
+                        occupied.update(class_rooms.get((class_name, day, period_number), ()))
+                occupied.update(
+                    room for grade, room in lessons_by_slot.get((day, period_number), ())
+                    if grade not in examining
+                )
+                self._exam[(exam_date, period_number)] = _grouped(self.rooms - occupied)
+
+    def exam_day(self, exam_date):
+        """考試日期對應的星期，非考試日期回傳 None"""
+        return self._exam_days.get(exam_date)
+
+    def free_rooms(self, day, period_number, floor=ALL_FLOORS, exam_date=None):
+        """
+        指定時段的空教室 (教室, ...)
+
+        exam_date 為考試日期時改用考試時段的結果（考試教室占用、考試中的年級停課）
+        """
+        if exam_date in self._exam_days:
+            slot = self._exam[(exam_date, period_number)]
+        else:
+            slot = self._weekly[(day, period_number)]
+        return slot.get(floor, ())
+
+    def free_rooms_grouped(self, day, period_number, exam_date=None):
+        """指定時段依樓層分組的空教室 {樓層: (教室, ...)}"""
+        if exam_date in self._exam_days:
+            slot = self._exam[(exam_date, period_number)]
+        else:
+            slot = self._weekly[(day, period_number)]
+        return {floor: rooms for floor, rooms in slot.items() if floor is not ALL_FLOORS}
+
+
+_occupancy_version = None
+_occupancy = None
+
+
+def get_room_occupancy():
+    """取得目前資料版本的空教室索引（需在 app context 內呼叫）"""
+    global _occupancy_version, _occupancy
+
+    version = get_data_version()
+    occupancy = _occupancy
+    if _occupancy_version != version or occupancy is None:
+        # 以考試場次為準：尚未分配監考的班級同樣考試（教室為 None）
+        exam_bookings = db.session.execute(
+            db.select(
+                ProctorAssignment.classroom, ClassExamInfo.class_name, ClassExamInfo.grade,
+                ExamSession.exam_date, ExamSession.periods
+            )
+            .select_from(ClassExamInfo)
+            .join(ExamSession, ClassExamInfo.exam_session_id == ExamSession.id)
+            .outerjoin(ProctorAssignment, ProctorAssignment.class_exam_info_id == ClassExamInfo.id)
+        ).all()
+        occupancy = RoomOccupancy(get_snapshot(), exam_bookings)
+        _occupancy, _occupancy_version = occupancy, version
+    return occupancy
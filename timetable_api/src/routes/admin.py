@@ -5,6 +5,12 @@
 from flask import Blueprint, jsonify, request
 from sqlalchemy import text
 from src.models.timetable import db
+from src.snapshot import refresh_snapshot
+from src.data_version import bump_data_version
+from src.search_fts import sync_search_table
+from src.hot_reload import reload_timetable_data, ReloadInProgressError
+from src.data_loader_exam import load_all_exam_data, list_semesters, current_semester, semester_title
+from src.models.exam import ExamSession, ClassExamInfo, ProctorAssignment
 import os
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
@@ -67,9 +73,12 @@ def migrate_john_teacher():
             text("DELETE FROM teachers WHERE teacher_name = 'John'")
         )
         teachers_deleted = result_delete.rowcount
+        sync_search_table()
 
         # 提交事務
         db.session.commit()
+        refresh_snapshot()
+        bump_data_version()
 
         # 4. 驗證結果
         # 檢查 teachers 表中 John 相關記錄
@@ -162,6 +171,117 @@ def verify_john_teacher():
             'error': f'查詢失敗: {str(e)}'
         }), 500
 
+@admin_bp.route('/reload-data', methods=['POST'])
+def reload_data():
+    """
+    熱更新課表與學生資料（不需重啟服務；考試資料只會依新學生名單更新各班人數）
+
+    先將 data/ 目錄下的 CSV 載入影子資料表並驗證，通過後在單一交易內替換正式資料表，
+    載入期間的查詢仍回傳舊資料。
+
+    使用方式：
+    POST /api/admin/reload-data
+    Headers: X-Admin-Key: <your-admin-key>
+
+    回傳：
+    {
+      "success": true,
+      "rows": {"students": 1512, "english_timetable": 1289, ...},
+      "previous_rows": {"students": 1500, ...},
+      "timings": {"read": 0.08, "validate": 0.002, "load_shadow": 0.05, "swap": 0.03, "snapshot": 0.04, "total": 0.21},
+      "errors": [],
+      "warnings": [],
+      "exam_student_counts_updated": 0
+    }
+    """
+    # 驗證 API 金鑰
+    if not verify_admin_key():
+        return jsonify({
+            'success': False,
+            'error': 'Unauthorized: Invalid or missing X-Admin-Key header'
+        }), 401
+
+    try:
+        report = reload_timetable_data()
+        return jsonify(report), 200 if report['success'] else 400
+
+    except ReloadInProgressError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 409
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': f'資料熱更新失敗: {str(e)}'
+        }), 500
+
+@admin_bp.route('/reload-exams', methods=['POST'])
+def reload_exams():
+    """
+    重新載入考試資料（考試場次、班級名單、監考分配），資料來源為 data/exams/<semester>/
+
+    使用方式：
+    POST /api/admin/reload-exams
+    Headers: X-Admin-Key: <your-admin-key>
+    Body（選填）: {"semester": "2025-fall-final", "replace": false}
+
+    - semester: 學期目錄名稱，預設為 EXAM_SEMESTER 或 manifest.json 的 current
+    - replace: true 時先清除現有考試資料與監考分配（切換學期時使用）；
+      false 時以檔案內容新增或更新，保留既有監考分配
+
+    回傳：
+    {
+      "success": true,
+      "semester": "2025-fall-final",
+      "title": "2025 Fall Semester Final Assessment",
+      "replace": false,
+      "rows": {"exam_sessions": 12, "class_exam_info": 168, "proctor_assignments": 168},
+      "available_semesters": ["2025-fall-final"]
+    }
+    """
+    # 驗證 API 金鑰
+    if not verify_admin_key():
+        return jsonify({
+            'success': False,
+            'error': 'Unauthorized: Invalid or missing X-Admin-Key header'
+        }), 401
+
+    data = request.get_json(silent=True) or {}
+    semester = data.get('semester') or current_semester()
+    available = list_semesters()
+    if semester not in available:
+        return jsonify({
+            'success': False,
+            'error': f'找不到學期設定：{semester}',
+            'available_semesters': available
+        }), 400
+
+    try:
+        replace = bool(data.get('replace', False))
+        success = load_all_exam_data(semester, replace=replace)
+        return jsonify({
+            'success': success,
+            'semester': semester,
+            'title': semester_title(semester),
+            'replace': replace,
+            'rows': {
+                'exam_sessions': ExamSession.query.count(),
+                'class_exam_info': ClassExamInfo.query.count(),
+                'proctor_assignments': ProctorAssignment.query.count()
+            },
+            'available_semesters': available
+        }), 200 if success else 400
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': f'考試資料重新載入失敗: {str(e)}'
+        }), 500
+
 @admin_bp.route('/health', methods=['GET'])
 def health():
     """健康檢查端點（不需要驗證）"""
@@ -2,15 +2,56 @@
 期中考監考管理 API 路由
 提供考試場次查詢、班級查詢、監考分配、CSV匯出等功能
 """
-from flask import Blueprint, jsonify, request, Response
+from flask import Blueprint, jsonify, request, Response, stream_with_context
+from sqlalchemy.orm import joinedload
 from src.models.timetable import db
 from src.models.exam import ExamSession, ClassExamInfo, ProctorAssignment
+from src.data_version import get_data_version, bump_data_version
+from src.proctor_assignments import validate_assignments, upsert_assignments, parse_class_exam_info_id
+from src.response_cache import no_response_cache
+from src.data_loader_exam import student_count_drift, list_semesters, current_semester, ExamConfigError
+from src.proctor_solver import solve_proctor_assignments
+from src.proctor_conflicts import (
+    RESOURCE_TYPES, get_conflict_index, check_assignment, check_batch_conflicts, describe_conflicts
+)
 from datetime import datetime
 import io
 import csv
 
 exam_bp = Blueprint('exam', __name__)
 
+# CSV 匯出欄位（15 個欄位）
+EXPORT_HEADERS = [
+    'ClassName', 'Grade', 'Teacher', 'Level', 'Classroom',
+    'GradeBand', 'Duration', 'Periods', 'Self-Study',
+    'Preparation', 'ExamTime', 'Proctor', 'Subject', 'Count', 'Students'
+]
+# 每次從資料庫游標讀取的筆數、每次送出的 CSV 大小
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def class_exam_info_query():
+    """班級考試資訊查詢，以 JOIN 一併載入考試場次與監考分配，避免 to_full_dict() 逐筆查詢"""
+    return ClassExamInfo.query.options(
+        joinedload(ClassExamInfo.exam_session),
+        joinedload(ClassExamInfo.proctor_assignment)
+    )
+
+
+def proctor_assignment_query():
+    """監考分配查詢，以 JOIN 一併載入班級（to_dict() 需要班級名稱）"""
+    return ProctorAssignment.query.options(joinedload(ProctorAssignment.class_exam_info))
+
+
+def conflict_response(conflicts):
+    """監考時間衝突的 409 回應（request 帶 force: true 可略過檢查）"""
+    return jsonify({
+        'success': False,
+        'error': f'監考時間衝突：{describe_conflicts(conflicts)}',
+        'conflicts': conflicts
+    }), 409
+
 
 # ============================================================
 # 考試場次 API
@@ -81,7 +122,7 @@ def get_sessions_by_date(date):
 def get_all_class_exam_info():
     """取得所有班級考試資訊"""
     try:
-        classes = ClassExamInfo.query.all()
+        classes = class_exam_info_query().order_by(ClassExamInfo.id).all()
         return jsonify({
             'success': True,
             'classes': [cls.to_full_dict() for cls in classes],
@@ -107,7 +148,7 @@ def get_classes_by_grade_band(grade_band):
             }), 404
 
         # 查詢該 session 下的所有班級
-        classes = ClassExamInfo.query.filter_by(exam_session_id=session.id).all()
+        classes = class_exam_info_query().filter_by(exam_session_id=session.id).order_by(ClassExamInfo.id).all()
 
         return jsonify({
             'success': True,
@@ -127,7 +168,7 @@ def get_classes_by_grade_band(grade_band):
 def get_class_exam_info(class_name):
     """取得特定班級的考試資訊"""
     try:
-        class_info = ClassExamInfo.query.filter_by(class_name=class_name).first()
+        class_info = class_exam_info_query().filter_by(class_name=class_name).first()
         if not class_info:
             return jsonify({
                 'success': False,
@@ -153,7 +194,7 @@ def get_class_exam_info(class_name):
 def get_all_proctors():
     """取得所有監考分配"""
     try:
-        proctors = ProctorAssignment.query.all()
+        proctors = proctor_assignment_query().order_by(ProctorAssignment.id).all()
         return jsonify({
             'success': True,
             'proctors': [proctor.to_dict() for proctor in proctors],
@@ -181,9 +222,22 @@ def create_proctor_assignment():
                     'error': f'缺少必要欄位: {field}'
                 }), 400
 
+        # class_exam_info_id 須為整數（接受數字字串），否則無法比對考試時段
+        class_exam_info_id = parse_class_exam_info_id(data['class_exam_info_id'])
+        if class_exam_info_id is None:
+            return jsonify({
+                'success': False,
+                'error': 'class_exam_info_id 必須為整數'
+            }), 400
+        if class_exam_info_id not in get_conflict_index().slots:
+            return jsonify({
+                'success': False,
+                'error': '找不到此班級考試資訊'
+            }), 400
+
         # 檢查該班級是否已有監考分配
         existing = ProctorAssignment.query.filter_by(
-            class_exam_info_id=data['class_exam_info_id']
+            class_exam_info_id=class_exam_info_id
         ).first()
 
         if existing:
@@ -192,9 +246,15 @@ def create_proctor_assignment():
                 'error': '該班級已有監考分配，請使用 PUT 方法更新'
             }), 400
 
+        # 檢查監考老師與教室是否與其他班級的考試時間重疊
+        if not data.get('force'):
+            conflicts = check_assignment(class_exam_info_id, data['proctor_teacher'], data['classroom'])
+            if conflicts:
+                return conflict_response(conflicts)
+
         # 建立新的監考分配
         proctor = ProctorAssignment(
-            class_exam_info_id=data['class_exam_info_id'],
+            class_exam_info_id=class_exam_info_id,
             proctor_teacher=data['proctor_teacher'],
             classroom=data['classroom'],
             notes=data.get('notes', '')
@@ -202,6 +262,7 @@ def create_proctor_assignment():
 
         db.session.add(proctor)
         db.session.commit()
+        bump_data_version()
 
         return jsonify({
             'success': True,
@@ -230,6 +291,17 @@ def update_proctor_assignment(proctor_id):
 
         data = request.get_json()
 
+        # 檢查更新後的監考老師與教室是否與其他班級的考試時間重疊
+        if not data.get('force') and ('proctor_teacher' in data or 'classroom' in data):
+            conflicts = check_assignment(
+                proctor.class_exam_info_id,
+                data.get('proctor_teacher', proctor.proctor_teacher),
+                data.get('classroom', proctor.classroom),
+                proctor.id
+            )
+            if conflicts:
+                return conflict_response(conflicts)
+
         # 更新欄位
         if 'proctor_teacher' in data:
             proctor.proctor_teacher = data['proctor_teacher']
@@ -241,6 +313,7 @@ def update_proctor_assignment(proctor_id):
         proctor.updated_at = datetime.utcnow()
 
         db.session.commit()
+        bump_data_version()
 
         return jsonify({
             'success': True,
@@ -269,6 +342,7 @@ def delete_proctor_assignment(proctor_id):
 
         db.session.delete(proctor)
         db.session.commit()
+        bump_data_version()
 
         return jsonify({
             'success': True,
@@ -283,6 +357,29 @@ def delete_proctor_assignment(proctor_id):
         }), 500
 
 
+def apply_proctor_batch(assignments, force=False):
+    """
+    批次寫入監考分配並 commit -> {'created', 'updated', 'errors', 'row_errors'}
+
+    先驗證所有資料，再以集合方式寫入（單一交易）；時間衝突的資料不寫入（force 時略過衝突檢查）
+    """
+    rows, row_errors = validate_assignments(assignments)
+    if not force:
+        rows, conflict_errors = check_batch_conflicts(rows)
+        row_errors = sorted(row_errors + conflict_errors, key=lambda error: error.index)
+    created_count, updated_count = upsert_assignments(rows)
+
+    db.session.commit()
+    bump_data_version()
+
+    return {
+        'created': created_count,
+        'updated': updated_count,
+        'errors': [str(error) for error in row_errors],
+        'row_errors': [error.to_dict() for error in row_errors]
+    }
+
+
 @exam_bp.route('/exams/proctors/batch', methods=['POST'])
 def batch_create_proctor_assignments():
     """批次新增監考分配"""
@@ -295,54 +392,10 @@ def batch_create_proctor_assignments():
                 'error': '請提供 assignments 陣列'
             }), 400
 
-        created_count = 0
-        updated_count = 0
-        errors = []
-
-        for assignment in data['assignments']:
-            try:
-                # 檢查必要欄位
-                if 'class_exam_info_id' not in assignment:
-                    errors.append(f"缺少 class_exam_info_id")
-                    continue
-
-                # 檢查是否已存在
-                existing = ProctorAssignment.query.filter_by(
-                    class_exam_info_id=assignment['class_exam_info_id']
-                ).first()
-
-                if existing:
-                    # 更新現有記錄
-                    if 'proctor_teacher' in assignment:
-                        existing.proctor_teacher = assignment['proctor_teacher']
-                    if 'classroom' in assignment:
-                        existing.classroom = assignment['classroom']
-                    if 'notes' in assignment:
-                        existing.notes = assignment['notes']
-                    existing.updated_at = datetime.utcnow()
-                    updated_count += 1
-                else:
-                    # 建立新記錄
-                    proctor = ProctorAssignment(
-                        class_exam_info_id=assignment['class_exam_info_id'],
-                        proctor_teacher=assignment.get('proctor_teacher', ''),
-                        classroom=assignment.get('classroom', ''),
-                        notes=assignment.get('notes', '')
-                    )
-                    db.session.add(proctor)
-                    created_count += 1
-
-            except Exception as e:
-                errors.append(str(e))
-
-        db.session.commit()
-
         return jsonify({
             'success': True,
             'message': f'批次處理完成',
-            'created': created_count,
-            'updated': updated_count,
-            'errors': errors
+            **apply_proctor_batch(data['assignments'], force=data.get('force', False))
         })
 
     except Exception as e:
@@ -353,62 +406,127 @@ def batch_create_proctor_assignments():
         }), 500
 
 
+@exam_bp.route('/exams/proctors/auto-assign', methods=['POST'])
+def auto_assign_proctors():
+    """
+    自動分配監考老師與考試教室
+
+    Body（皆為選填）:
+    - grade_band: 只分配指定 GradeBand 的班級
+    - overwrite: true 時重新分配範圍內所有班級，預設只分配尚無監考分配的班級
+    - dry_run: true 時只回傳結果，不寫入
+
+    結果經由批次寫入（與 /exams/proctors/batch 相同）寫入資料庫。
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        assignments, unassigned, elapsed = solve_proctor_assignments(
+            grade_band=data.get('grade_band'),
+            overwrite=bool(data.get('overwrite', False))
+        )
+
+        result = {
+            'success': True,
+            'dry_run': bool(data.get('dry_run', False)),
+            'assigned': len(assignments),
+            'assignments': assignments,
+            'unassigned': unassigned,
+            'solve_ms': round(elapsed * 1000, 2)
+        }
+        if not result['dry_run'] and assignments:
+            result.update(apply_proctor_batch([
+                {field: assignment[field] for field in ('class_exam_info_id', 'proctor_teacher', 'classroom')}
+                for assignment in assignments
+            ]))
+        return jsonify(result)
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 # ============================================================
 # CSV 匯出 API
 # ============================================================
 
+def export_query():
+    """匯出用的扁平查詢：班級 JOIN 考試場次 LEFT JOIN 監考分配"""
+    return db.select(
+        ClassExamInfo.class_name,
+        ClassExamInfo.grade,
+        ClassExamInfo.teacher,
+        ClassExamInfo.level,
+        ClassExamInfo.students,
+        ExamSession.grade_band,
+        ExamSession.duration,
+        ExamSession.periods,
+        ExamSession.self_study_time,
+        ExamSession.preparation_time,
+        ExamSession.exam_time,
+        ExamSession.subject,
+        ProctorAssignment.proctor_teacher,
+        ProctorAssignment.classroom
+    ).join_from(ClassExamInfo, ExamSession).outerjoin(ProctorAssignment).order_by(ClassExamInfo.id)
+
+
+def format_export_row(row):
+    """將 export_query() 的一列轉為 CSV 欄位（順序同 EXPORT_HEADERS）"""
+    (class_name, grade, teacher, level, students, grade_band, duration, periods,
+     self_study_time, preparation_time, exam_time, subject, proctor_teacher, classroom) = row
+    return [
+        class_name,  # ClassName (包含 LT/IT 標示)
+        grade,  # Grade
+        teacher or '',  # Teacher
+        level,  # Level
+        classroom or '',  # Classroom
+        grade_band,  # GradeBand
+        duration,  # Duration
+        periods,  # Periods
+        self_study_time if self_study_time else 'None',  # Self-Study
+        preparation_time,  # Preparation
+        exam_time,  # ExamTime
+        proctor_teacher or '',  # Proctor
+        subject,  # Subject
+        students + 1,  # Count = Students + 1
+        students  # Students
+    ]
+
+
+def stream_csv(query, filename):
+    """
+    以串流方式回傳 CSV：查詢結果以 yield_per 分批從資料庫游標讀取，
+    每累積約 EXPORT_CHUNK_BYTES 便送出，記憶體用量與資料筆數無關
+    """
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_HEADERS)
+        rows = db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for row in rows:
+            writer.writerow(format_export_row(row))
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={
+            'Content-Disposition': f'attachment; filename={filename}'
+        }
+    )
+
+
 @exam_bp.route('/exams/export/csv', methods=['GET'])
 def export_all_to_csv():
     """匯出所有班級考試資料為 CSV (15 欄位格式)"""
     try:
-        # 查詢所有班級考試資訊（包含 JOIN）
-        classes = ClassExamInfo.query.join(ExamSession).all()
-
-        # 建立 CSV
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # 寫入標題列（15 個欄位）
-        headers = [
-            'ClassName', 'Grade', 'Teacher', 'Level', 'Classroom',
-            'GradeBand', 'Duration', 'Periods', 'Self-Study',
-            'Preparation', 'ExamTime', 'Proctor', 'Subject', 'Count', 'Students'
-        ]
-        writer.writerow(headers)
-
-        # 寫入資料列
-        for cls in classes:
-            session = cls.exam_session
-            proctor = cls.proctor_assignment
-
-            row = [
-                cls.class_name,  # ClassName (包含 LT/IT 標示)
-                cls.grade,  # Grade
-                cls.teacher or '',  # Teacher
-                cls.level,  # Level
-                proctor.classroom if proctor else '',  # Classroom
-                session.grade_band,  # GradeBand
-                session.duration,  # Duration
-                session.periods,  # Periods
-                session.self_study_time if session.self_study_time else 'None',  # Self-Study
-                session.preparation_time,  # Preparation
-                session.exam_time,  # ExamTime
-                proctor.proctor_teacher if proctor else '',  # Proctor
-                session.subject,  # Subject
-                cls.students + 1,  # Count = Students + 1
-                cls.students  # Students
-            ]
-            writer.writerow(row)
-
-        # 準備回應
-        output.seek(0)
-        return Response(
-            output.getvalue(),
-            mimetype='text/csv',
-            headers={
-                'Content-Disposition': 'attachment; filename=final_exam_proctor_assignments.csv'
-            }
-        )
+        return stream_csv(export_query(), 'final_exam_proctor_assignments.csv')
 
     except Exception as e:
         return jsonify({
@@ -429,56 +547,10 @@ def export_grade_band_to_csv(grade_band):
                 'error': f'找不到 GradeBand: {grade_band}'
             }), 404
 
-        # 查詢該 GradeBand 的所有班級
-        classes = ClassExamInfo.query.filter_by(exam_session_id=session.id).all()
-
-        # 建立 CSV
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # 寫入標題列
-        headers = [
-            'ClassName', 'Grade', 'Teacher', 'Level', 'Classroom',
-            'GradeBand', 'Duration', 'Periods', 'Self-Study',
-            'Preparation', 'ExamTime', 'Proctor', 'Subject', 'Count', 'Students'
-        ]
-        writer.writerow(headers)
-
-        # 寫入資料列
-        for cls in classes:
-            proctor = cls.proctor_assignment
-
-            row = [
-                cls.class_name,
-                cls.grade,
-                cls.teacher or '',
-                cls.level,
-                proctor.classroom if proctor else '',
-                session.grade_band,
-                session.duration,
-                session.periods,
-                session.self_study_time if session.self_study_time else 'None',
-                session.preparation_time,
-                session.exam_time,
-                proctor.proctor_teacher if proctor else '',
-                session.subject,
-                cls.students + 1,
-                cls.students
-            ]
-            writer.writerow(row)
-
-        # 準備回應
-        output.seek(0)
         # 清理 grade_band 字串，移除空格和單引號
         cleaned_grade_band = grade_band.replace(" ", "_").replace("'", "")
         filename = f'final_exam_{cleaned_grade_band}.csv'
-        return Response(
-            output.getvalue(),
-            mimetype='text/csv',
-            headers={
-                'Content-Disposition': f'attachment; filename={filename}'
-            }
-        )
+        return stream_csv(export_query().where(ClassExamInfo.exam_session_id == session.id), filename)
 
     except Exception as e:
         return jsonify({
@@ -491,40 +563,148 @@ def export_grade_band_to_csv(grade_band):
 # 統計 API
 # ============================================================
 
+def compute_exam_stats():
+    """
+    以單一 GROUP BY 查詢計算監考分配統計（整體、依日期、依 GradeBand、依考試類型）
+
+    每個 GradeBand 對應一個考試場次，先依場次分組計數，再在 Python 中彙總；
+    沒有班級的場次以 LEFT JOIN 保留，計為 0。
+    """
+    rows = db.session.execute(
+        db.select(
+            ExamSession.exam_date,
+            ExamSession.grade_band,
+            ExamSession.exam_type,
+            db.func.count(ClassExamInfo.id).label('total'),
+            db.func.count(ProctorAssignment.id).label('assigned')
+        )
+        .select_from(ExamSession)
+        .outerjoin(ClassExamInfo, ClassExamInfo.exam_session_id == ExamSession.id)
+        .outerjoin(ProctorAssignment, ProctorAssignment.class_exam_info_id == ClassExamInfo.id)
+        .group_by(ExamSession.id)
+        .order_by(ExamSession.exam_date, ExamSession.id)
+    ).all()
+
+    def counts(total, assigned):
+        return {'total_classes': total, 'assigned': assigned, 'unassigned': total - assigned}
+
+    by_date = {}
+    by_exam_type = {}
+    by_grade_band = []
+    for row in rows:
+        for key, groups in ((row.exam_date, by_date), (row.exam_type, by_exam_type)):
+            total, assigned = groups.get(key, (0, 0))
+            groups[key] = (total + row.total, assigned + row.assigned)
+        by_grade_band.append({
+            'grade_band': row.grade_band,
+            'exam_type': row.exam_type,
+            'date': row.exam_date,
+            **counts(row.total, row.assigned)
+        })
+
+    total_classes = sum(row.total for row in rows)
+    assigned_classes = sum(row.assigned for row in rows)
+    return {
+        'overall': {
+            **counts(total_classes, assigned_classes),
+            'progress_percent': round(assigned_classes / total_classes * 100, 2) if total_classes > 0 else 0
+        },
+        'by_date': [{'date': date, **counts(*totals)} for date, totals in by_date.items()],
+        'by_grade_band': by_grade_band,
+        'by_exam_type': [
+            {'exam_type': exam_type, **counts(*totals)} for exam_type, totals in sorted(by_exam_type.items())
+        ]
+    }
+
+
+# 統計結果以資料版本為單位快取，監考分配異動（bump_data_version）後重新計算
+_stats_version = None
+_stats = None
+
+
 @exam_bp.route('/exams/stats', methods=['GET'])
 def get_exam_stats():
     """取得考試統計資訊"""
+    global _stats_version, _stats
+
+    try:
+        version = get_data_version()
+        stats = _stats
+        if _stats_version != version or stats is None:
+            stats = compute_exam_stats()
+            _stats, _stats_version = stats, version
+
+        return jsonify({
+            'success': True,
+            **stats
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@exam_bp.route('/exams/student-counts/drift', methods=['GET'])
+@no_response_cache
+def get_student_count_drift():
+    """
+    學生人數一致性報告
+
+    比對學期 classes.csv 的人數、班級考試資訊記錄的人數與學生資料（Student）的實際人數，
+    列出不一致或沒有學生資料的班級
+
+    Query Parameters:
+    - semester: 學期目錄名稱（預設為目前學期）
+
+    classes.csv 可直接於檔案系統修改而不遞增資料版本，因此本路由不使用回應快取
+    """
+    semester = request.args.get('semester') or current_semester()
+    available = list_semesters()
+    if semester not in available:
+        return jsonify({
+            'success': False,
+            'error': f'找不到學期設定：{semester}',
+            'available_semesters': available
+        }), 400
+
     try:
-        total_classes = ClassExamInfo.query.count()
-        assigned_classes = ClassExamInfo.query.join(ProctorAssignment).count()
-        unassigned_classes = total_classes - assigned_classes
+        return jsonify({
+            'success': True,
+            **student_count_drift(semester)
+        })
 
-        # 按日期統計
-        dates = db.session.query(ExamSession.exam_date).distinct().all()
-        date_stats = []
+    except ExamConfigError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 404
 
-        for (date,) in dates:
-            sessions = ExamSession.query.filter_by(exam_date=date).all()
-            session_ids = [s.id for s in sessions]
-            total = ClassExamInfo.query.filter(ClassExamInfo.exam_session_id.in_(session_ids)).count()
-            assigned = ClassExamInfo.query.filter(ClassExamInfo.exam_session_id.in_(session_ids)).join(ProctorAssignment).count()
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
-            date_stats.append({
-                'date': date,
-                'total_classes': total,
-                'assigned': assigned,
-                'unassigned': total - assigned
-            })
 
+@exam_bp.route('/exams/conflicts', methods=['GET'])
+def get_proctor_conflicts():
+    """
+    列出所有監考時間衝突
+
+    同一位監考老師（以 / 分隔多位）或同一間教室，在同一天被分配到考試時間重疊的兩個班級
+    """
+    try:
+        conflicts = get_conflict_index().all_conflicts()
         return jsonify({
             'success': True,
-            'overall': {
-                'total_classes': total_classes,
-                'assigned': assigned_classes,
-                'unassigned': unassigned_classes,
-                'progress_percent': round(assigned_classes / total_classes * 100, 2) if total_classes > 0 else 0
+            'total': len(conflicts),
+            'by_type': {
+                resource_type: sum(1 for conflict in conflicts if conflict['type'] == resource_type)
+                for resource_type in RESOURCE_TYPES
             },
-            'by_date': date_stats
+            'conflicts': conflicts
         })
 
     except Exception as e:
@@ -1,16 +1,105 @@
 from flask import Blueprint, jsonify, request
-from src.models.student import Student, EnglishTimetable, HomeRoomTimetable
+from src.snapshot import get_snapshot, DAYS
+from src import search_index
+from src.search_fts import use_fts, search as fts_search
+from src.batch_timetables import read_batch_keys, stream_batch_timetables
 
 student_bp = Blueprint('student', __name__)
 
+# 課表類型 -> 回應中的課表欄位
+TIMETABLE_KEYS = {
+    'english': 'english_timetable',
+    'homeroom': 'homeroom_timetable',
+    'ev_myreading': 'ev_myreading_timetable'
+}
+
+# 已組裝的學生課表，以快照版本為單位快取
+_assembled_version = None
+_assembled_timetables = {}
+
+
+def assemble_student_timetable(student_id, snapshot=None):
+    """
+    組裝學生的完整課表（英文班、EV & myReading、Home Room）
+
+    三個學生課表端點共用此結果；每位學生在每個快照版本只組裝一次，
+    統計資料在同一次走訪中計算。找不到學生時回傳 None。
+    回傳的 dict 與其他請求共用，呼叫端不可就地修改。
+    snapshot 預設為目前的快照；批次端點傳入串流開始前取得的快照。
+    """
+    global _assembled_version, _assembled_timetables
+
+    snapshot = snapshot or get_snapshot()
+    if _assembled_version is None or snapshot.version > _assembled_version:
+        _assembled_timetables = {}
+        _assembled_version = snapshot.version
+    # 進行中的批次串流可能仍使用較舊的快照，其結果不寫入快取
+    cache = _assembled_timetables if snapshot.version == _assembled_version else {}
+
+    assembled = cache.get(student_id)
+    if assembled is not None:
+        return assembled
+
+    student = snapshot.students.get(student_id)
+    if not student:
+        return None
+
+    # 前端期望的格式：課表類型 -> 星期 -> 節次 -> 課程
+    timetables = {key: {day: {} for day in DAYS} for key in TIMETABLE_KEYS.values()}
+    weekly_timetable = {day: [] for day in DAYS}
+    counts = {class_type: 0 for class_type in TIMETABLE_KEYS}
+
+    for lesson in snapshot.student_lessons[student_id]:
+        counts[lesson.class_type] += 1
+        if lesson.day not in weekly_timetable:
+            continue
+
+        weekly_timetable[lesson.day].append({
+            'day': lesson.day,
+            'period': lesson.period,
+            'classroom': lesson.classroom,
+            'teacher': lesson.teacher,
+            'course_name': lesson.course_name,
+            'class_type': lesson.class_type
+        })
+        # 同一時段有多筆課程時以最後一筆為準
+        timetables[TIMETABLE_KEYS[lesson.class_type]][lesson.day][str(lesson.period_number)] = {
+            'subject': lesson.course_name,
+            'course_name': lesson.course_name,
+            'teacher': lesson.teacher,
+            'classroom': lesson.classroom,
+            'period': lesson.period_number,
+            'time': f'{lesson.period}',
+            'class_type': lesson.class_type
+        }
+
+    # 週課表按節次排序
+    for day_classes in weekly_timetable.values():
+        day_classes.sort(key=lambda x: x['period'])
+
+    assembled = {
+        'student': student,
+        'timetables': timetables,
+        'weekly_timetable': weekly_timetable,
+        'statistics': {
+            'total_classes': len(snapshot.student_lessons[student_id]),
+            'days_with_classes': sum(1 for day_classes in weekly_timetable.values() if day_classes),
+            'english_classes': counts['english'],
+            'ev_myreading_classes': counts['ev_myreading'],
+            'homeroom_classes': counts['homeroom']
+        }
+    }
+    cache[student_id] = assembled
+    return assembled
+
 @student_bp.route('/students', methods=['GET'])
 def get_all_students():
     """取得所有學生列表"""
     try:
-        students = Student.query.all()
+        students = get_snapshot().student_list
         return jsonify({
             'success': True,
-            'students': [student.to_dict() for student in students]
+            'students': list(students)
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -23,14 +112,16 @@ def search_students():
         if not query:
             return jsonify({'success': True, 'students': []})
         
-        students = Student.query.filter(
-            (Student.student_name.contains(query)) |
-            (Student.student_id.contains(query))
-        ).limit(20).all()
-        
+        if use_fts():
+            students = get_snapshot().students
+            results = [students[match['key']] for match in fts_search(query, kinds=('student',))
+                       if match['key'] in students]
+        else:
+            results = search_index.search_students(query)
+
         return jsonify({
             'success': True,
-            'students': [student.to_dict() for student in students]
+            'students': results
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -39,120 +130,15 @@ def search_students():
 def get_student_by_id(student_id):
     """根據學生ID取得學生資訊和週課表"""
     try:
-        # 查找學生
-        student = Student.query.filter_by(student_id=student_id).first()
-        if not student:
+        assembled = assemble_student_timetable(student_id)
+        if not assembled:
             return jsonify({'success': False, 'error': '找不到該學生'}), 404
-        
-        # 取得所有相關課表
-        all_classes = []
-        
-        # 英文班課表
-        english_classes = EnglishTimetable.query.filter_by(
-            class_name=student.english_class_name
-        ).all()
-        for cls in english_classes:
-            all_classes.append({
-                'day': cls.day,
-                'period': cls.period,
-                'time': f'{cls.period}',  # 可以根據需要調整時間格式
-                'classroom': cls.classroom,
-                'teacher': cls.teacher,
-                'course_name': f'English - {cls.class_name}',
-                'class_type': 'english'
-            })
-        
-        # EV & myReading 班課表
-        if student.ev_myreading_class_name:
-            ev_classes = EnglishTimetable.query.filter_by(
-                class_name=student.ev_myreading_class_name
-            ).all()
-            for cls in ev_classes:
-                all_classes.append({
-                    'day': cls.day,
-                    'period': cls.period,
-                    'time': f'{cls.period}',
-                    'classroom': cls.classroom,
-                    'teacher': cls.teacher,
-                    'course_name': f'EV & myReading - {cls.class_name}',
-                    'class_type': 'ev_myreading'
-                })
-        
-        # Home Room 課表
-        homeroom_classes = HomeRoomTimetable.query.filter_by(
-            home_room_class_name=student.home_room_class_name
-        ).all()
-        for cls in homeroom_classes:
-            all_classes.append({
-                'day': cls.day,
-                'period': cls.period,
-                'time': f'{cls.period}',
-                'classroom': cls.classroom,
-                'teacher': cls.teacher,
-                'course_name': cls.course_name,
-                'class_type': 'homeroom'
-            })
-        
-        # 按星期和節次排列
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-        weekly_timetable = {}
-        
-        for day in days:
-            day_classes = [cls for cls in all_classes if cls['day'] == day]
-            # 按節次排序
-            day_classes.sort(key=lambda x: x['period'])
-            weekly_timetable[day] = day_classes
-        
-        # 組織課表資料以匹配前端期望的格式
-        timetables = {
-            'english_timetable': {},
-            'homeroom_timetable': {},
-            'ev_myreading_timetable': {}
-        }
-
-        # 將課表按類型和結構組織
-        for day in days:
-            day_classes = weekly_timetable[day]
-
-            # 初始化每天的時段
-            for timetable_type in timetables:
-                timetables[timetable_type][day] = {}
-
-            # 將課程分配到相應的課表類型
-            for cls in day_classes:
-                # 正確處理 period 字段
-                period_raw = str(cls['period']).strip()
-                import re
-                period_match = re.search(r'(\d+)', period_raw)
-                period = period_match.group(1) if period_match else period_raw
-
-                course_data = {
-                    'subject': cls['course_name'],
-                    'course_name': cls['course_name'],
-                    'teacher': cls['teacher'],
-                    'classroom': cls['classroom'],
-                    'period': int(period) if period.isdigit() else 0,
-                    'class_type': cls['class_type']
-                }
-
-                if cls['class_type'] == 'english':
-                    timetables['english_timetable'][day][period] = course_data
-                elif cls['class_type'] == 'homeroom':
-                    timetables['homeroom_timetable'][day][period] = course_data
-                elif cls['class_type'] == 'ev_myreading':
-                    timetables['ev_myreading_timetable'][day][period] = course_data
 
         return jsonify({
             'success': True,
-            'student': student.to_dict(),
-            'timetables': timetables,
-            'statistics': {
-                'total_classes': len(all_classes),
-                'days_with_classes': len([day for day in days if weekly_timetable[day]]),
-                'english_classes': len([cls for cls in all_classes if cls['class_type'] == 'english']),
-                'ev_myreading_classes': len([cls for cls in all_classes if cls['class_type'] == 'ev_myreading']),
-                'homeroom_classes': len([cls for cls in all_classes if cls['class_type'] == 'homeroom'])
-            }
+            'student': assembled['student'],
+            'timetables': assembled['timetables'],
+            'statistics': assembled['statistics']
         })
         
     except Exception as e:
@@ -162,115 +148,93 @@ def get_student_by_id(student_id):
 def get_student_timetable(student_id):
     """取得特定學生的完整課表"""
     try:
-        # 查找學生
-        student = Student.query.filter_by(student_id=student_id).first()
-        if not student:
+        assembled = assemble_student_timetable(student_id)
+        if not assembled:
             return jsonify({'success': False, 'error': '找不到該學生'}), 404
 
-        # 取得所有相關課表
-        all_classes = []
-
-        # 英文班課表
-        english_classes = EnglishTimetable.query.filter_by(
-            class_name=student.english_class_name
-        ).all()
-        for cls in english_classes:
-            all_classes.append({
-                'day': cls.day,
-                'period': cls.period,
-                'time': f'{cls.period}',
-                'classroom': cls.classroom,
-                'teacher': cls.teacher,
-                'subject': f'English - {cls.class_name}',
-                'class_type': 'english'
-            })
-
-        # EV & myReading 班課表
-        if student.ev_myreading_class_name:
-            ev_classes = EnglishTimetable.query.filter_by(
-                class_name=student.ev_myreading_class_name
-            ).all()
-            for cls in ev_classes:
-                all_classes.append({
-                    'day': cls.day,
-                    'period': cls.period,
-                    'time': f'{cls.period}',
-                    'classroom': cls.classroom,
-                    'teacher': cls.teacher,
-                    'subject': f'EV & myReading - {cls.class_name}',
-                    'class_type': 'ev_myreading'
-                })
+        return jsonify({
+            'success': True,
+            'student': assembled['student'],
+            'timetables': assembled['timetables'],
+            'statistics': assembled['statistics']
+        })
 
-        # Home Room 課表
-        homeroom_classes = HomeRoomTimetable.query.filter_by(
-            home_room_class_name=student.home_room_class_name
-        ).all()
-        for cls in homeroom_classes:
-            all_classes.append({
-                'day': cls.day,
-                'period': cls.period,
-                'time': f'{cls.period}',
-                'classroom': cls.classroom,
-                'teacher': cls.teacher,
-                'subject': cls.course_name,
-                'class_type': 'homeroom'
-            })
-
-        # 組織課表資料以匹配前端期望的格式
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-        timetables = {
-            'english_timetable': {},
-            'homeroom_timetable': {},
-            'ev_myreading_timetable': {}
-        }
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
 
-        # 為每天初始化空的時段
-        for day in days:
-            for timetable_type in timetables:
-                timetables[timetable_type][day] = {}
-
-        # 將課程分配到相應的課表類型和時段
-        for cls in all_classes:
-            day = cls['day']
-            # 正確處理 period 字段 - 移除括號並提取數字
-            period_raw = str(cls['period']).strip()
-            # 處理可能的格式: "第18節" -> "18", "(18)" -> "18", "18" -> "18"
-            import re
-            period_match = re.search(r'(\d+)', period_raw)
-            period = period_match.group(1) if period_match else period_raw
-
-            course_data = {
-                'subject': cls['subject'],
-                'course_name': cls['subject'],  # 確保有 course_name 字段
-                'teacher': cls['teacher'],
-                'classroom': cls['classroom'],
-                'period': int(period) if period.isdigit() else 0,
-                'time': cls['time'],
-                'class_type': cls['class_type']
-            }
+@student_bp.route('/classes/<class_name>/students', methods=['GET'])
+def get_class_students(class_name):
+    """
+    取得班級的學生名單（英文班、Home Room 或 EV & myReading 班級）
 
-            if cls['class_type'] == 'english':
-                timetables['english_timetable'][day][period] = course_data
-            elif cls['class_type'] == 'homeroom':
-                timetables['homeroom_timetable'][day][period] = course_data
-            elif cls['class_type'] == 'ev_myreading':
-                timetables['ev_myreading_timetable'][day][period] = course_data
+    參數: include=timetables 時一併回傳每位學生的課表與統計
+    """
+    try:
+        snapshot = get_snapshot()
+        entry = snapshot.class_catalog.get(class_name)
+        student_ids = snapshot.class_students.get(class_name, ())
+        if entry is None and not student_ids:
+            return jsonify({'success': False, 'error': f'找不到班級: {class_name}'}), 404
+
+        include = {item.strip() for item in request.args.get('include', '').split(',') if item.strip()}
+        if 'timetables' in include:
+            students = []
+            for student_id in student_ids:
+                assembled = assemble_student_timetable(student_id)
+                students.append({
+                    **assembled['student'],
+                    'timetables': assembled['timetables'],
+                    'statistics': assembled['statistics']
+                })
+        else:
+            students = [snapshot.students[student_id] for student_id in student_ids]
 
         return jsonify({
             'success': True,
-            'student': student.to_dict(),
-            'timetables': timetables,
-            'statistics': {
-                'total_classes': len(all_classes),
-                'days_with_classes': len([day for day in days if any(
-                    len(timetables[tt][day]) > 0 for tt in timetables
-                )]),
-                'english_classes': len([cls for cls in all_classes if cls['class_type'] == 'english']),
-                'ev_myreading_classes': len([cls for cls in all_classes if cls['class_type'] == 'ev_myreading']),
-                'homeroom_classes': len([cls for cls in all_classes if cls['class_type'] == 'homeroom'])
-            }
+            'class_name': class_name,
+            'class_type': entry.class_type if entry else None,
+            'grade': entry.grade if entry else None,
+            'students': students,
+            'count': len(students)
         })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@student_bp.route('/students/timetables', methods=['GET', 'POST'])
+def get_student_timetables():
+    """
+    批次取得多位學生的課表（格式同 /students/<student_id>/timetable）
+
+    請求: {"student_ids": [...]} 或 {"class_name": "102"}（該班級所有學生）
+    GET 回傳 405（避免落入 /students/<student_id> 而回傳「找不到學生」）
+    """
+    if request.method == 'GET':
+        return jsonify({'success': False, 'error': '請使用 POST 方法'}), 405, {'Allow': 'POST'}
 
+    try:
+        data = request.get_json(silent=True) or {}
+        snapshot = get_snapshot()
+        if 'student_ids' not in data and data.get('class_name'):
+            if data['class_name'] not in snapshot.class_catalog and data['class_name'] not in snapshot.class_students:
+                return jsonify({'success': False, 'error': f"找不到班級: {data['class_name']}"}), 404
+            student_ids = list(snapshot.class_students.get(data['class_name'], ()))
+        else:
+            try:
+                student_ids = read_batch_keys(data, 'student_ids')
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+
+        def assemble(student_id, snapshot):
+            assembled = assemble_student_timetable(student_id, snapshot)
+            if assembled is None:
+                return None
+            return {
+                'student': assembled['student'],
+                'timetables': assembled['timetables'],
+                'statistics': assembled['statistics']
+            }
+
+        return stream_batch_timetables(student_ids, assemble, snapshot)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -278,80 +242,16 @@ def get_student_timetable(student_id):
 def get_student_weekly_timetable(student_id):
     """取得特定學生的週課表（按星期和節次排列）"""
     try:
-        # 查找學生
-        student = Student.query.filter_by(student_id=student_id).first()
-        if not student:
+        assembled = assemble_student_timetable(student_id)
+        if not assembled:
             return jsonify({'error': '找不到該學生'}), 404
-        
-        # 取得所有相關課表
-        all_classes = []
-        
-        # 英文班課表
-        english_classes = EnglishTimetable.query.filter_by(
-            class_name=student.english_class_name
-        ).all()
-        for cls in english_classes:
-            all_classes.append({
-                'day': cls.day,
-                'period': cls.period,
-                'classroom': cls.classroom,
-                'teacher': cls.teacher,
-                'course_name': f'English - {cls.class_name}',
-                'class_type': 'english'
-            })
-        
-        # EV & myReading 班課表
-        if student.ev_myreading_class_name:
-            ev_classes = EnglishTimetable.query.filter_by(
-                class_name=student.ev_myreading_class_name
-            ).all()
-            for cls in ev_classes:
-                all_classes.append({
-                    'day': cls.day,
-                    'period': cls.period,
-                    'classroom': cls.classroom,
-                    'teacher': cls.teacher,
-                    'course_name': f'EV & myReading - {cls.class_name}',
-                    'class_type': 'ev_myreading'
-                })
-        
-        # Home Room 課表
-        homeroom_classes = HomeRoomTimetable.query.filter_by(
-            home_room_class_name=student.home_room_class_name
-        ).all()
-        for cls in homeroom_classes:
-            all_classes.append({
-                'day': cls.day,
-                'period': cls.period,
-                'classroom': cls.classroom,
-                'teacher': cls.teacher,
-                'course_name': cls.course_name,
-                'class_type': 'homeroom'
-            })
-        
-        # 按星期和節次排列
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-        weekly_timetable = {}
-        
-        for day in days:
-            day_classes = [cls for cls in all_classes if cls['day'] == day]
-            # 按節次排序
-            day_classes.sort(key=lambda x: x['period'])
-            weekly_timetable[day] = day_classes
-        
+
         return jsonify({
             'success': True,
-            'student': student.to_dict(),
-            'weekly_timetable': weekly_timetable,
-            'statistics': {
-                'total_classes': len(all_classes),
-                'days_with_classes': len([day for day in days if weekly_timetable[day]]),
-                'english_classes': len([cls for cls in all_classes if cls['class_type'] == 'english']),
-                'ev_myreading_classes': len([cls for cls in all_classes if cls['class_type'] == 'ev_myreading']),
-                'homeroom_classes': len([cls for cls in all_classes if cls['class_type'] == 'homeroom'])
-            }
+            'student': assembled['student'],
+            'weekly_timetable': assembled['weekly_timetable'],
+            'statistics': assembled['statistics']
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-
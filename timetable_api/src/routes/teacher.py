@@ -1,17 +1,124 @@
 from flask import Blueprint, jsonify, request
 from src.models.timetable import Teacher
-from src.models.student import EnglishTimetable, HomeRoomTimetable
+from src.snapshot import get_snapshot, DAYS
+from src.search_fts import use_fts, search as fts_search
+from src.teacher_availability import get_teacher_availability, parse_period_numbers, exam_schedule_availability
+from src.batch_timetables import read_batch_keys, stream_batch_timetables
 
 teacher_bp = Blueprint('teacher', __name__)
 
+# 已組裝的教師課表，以快照版本為單位快取
+_assembled_version = None
+_assembled_timetables = {}
+
+
+def assemble_teacher_timetable(teacher_name, snapshot=None):
+    """
+    組裝教師的完整課表與統計（教師課表端點與批次端點共用）
+
+    每位教師在每個快照版本只組裝一次；找不到教師時回傳 None。
+    回傳的 dict 與其他請求共用，呼叫端不可就地修改。
+    snapshot 預設為目前的快照；批次端點傳入串流開始前取得的快照。
+    """
+    global _assembled_version, _assembled_timetables
+
+    snapshot = snapshot or get_snapshot()
+    if _assembled_version is None or snapshot.version > _assembled_version:
+        _assembled_timetables = {}
+        _assembled_version = snapshot.version
+    # 進行中的批次串流可能仍使用較舊的快照，其結果不寫入快取
+    cache = _assembled_timetables if snapshot.version == _assembled_version else {}
+
+    assembled = cache.get(teacher_name)
+    if assembled is not None:
+        return assembled
+
+    teacher = snapshot.teachers.get(teacher_name)
+    if not teacher:
+        return None
+
+    # 取得所有教師教的課（英文班、Home Room）
+    all_classes = []
+    for lesson in snapshot.teacher_lessons[teacher_name]:
+        all_classes.append({
+            'day': lesson.day,
+            'period': lesson.period,
+            'period_number': lesson.period_number,
+            'time': f'{lesson.period}',
+            'classroom': lesson.classroom,
+            'class_name': lesson.class_name,
+            'teacher': lesson.teacher,
+            'subject': lesson.course_name,
+            'class_type': lesson.class_type
+        })
+
+    # 組織課表資料以匹配前端期望的格式
+    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+    timetables = {
+        'english_timetable': {},
+        'homeroom_timetable': {},
+        'ev_myreading_timetable': {}
+    }
+
+    # 為每天初始化空的時段
+    for day in days:
+        for timetable_type in timetables:
+            timetables[timetable_type][day] = {}
+
+    # 將課程分配到相應的課表類型和時段
+    for cls in all_classes:
+        day = cls['day']
+        # 節次號碼已於載入時解析
+        period = str(cls['period_number'])
+
+        course_data = {
+            'subject': cls['subject'],
+            'course_name': cls['subject'],  # 確保有 course_name 字段
+            'teacher': cls['teacher'],
+            'classroom': cls['classroom'],
+            'class_name': cls['class_name'],
+            'period': cls['period_number'],
+            'time': cls['time'],
+            'class_type': cls['class_type']
+        }
+
+        if cls['class_type'] == 'english':
+            timetables['english_timetable'][day][period] = course_data
+        elif cls['class_type'] == 'homeroom':
+            timetables['homeroom_timetable'][day][period] = course_data
+        elif cls['class_type'] == 'ev_myreading':
+            timetables['ev_myreading_timetable'][day][period] = course_data
+
+    # 統計教學班級數（去重複）
+    unique_classes = set()
+    for cls in all_classes:
+        unique_classes.add(cls['class_name'])
+
+    assembled = {
+        'teacher': teacher,
+        'timetables': timetables,
+        'statistics': {
+            'total_classes': len(all_classes),
+            'days_with_classes': len([day for day in days if any(
+                len(timetables[tt][day]) > 0 for tt in timetables
+            )]),
+            'english_classes': len([cls for cls in all_classes if cls['class_type'] == 'english']),
+            'ev_myreading_classes': len([cls for cls in all_classes if cls['class_type'] == 'ev_myreading']),
+            'homeroom_classes': len([cls for cls in all_classes if cls['class_type'] == 'homeroom']),
+            'unique_classes': len(unique_classes)
+        }
+    }
+    cache[teacher_name] = assembled
+    return assembled
+
 @teacher_bp.route('/teachers', methods=['GET'])
 def get_all_teachers():
     """取得所有教師列表"""
     try:
-        teachers = Teacher.query.all()
+        teachers = get_snapshot().teacher_list
         return jsonify({
             'success': True,
-            'teachers': [teacher.to_dict() for teacher in teachers]
+            'teachers': list(teachers)
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -24,13 +131,60 @@ def search_teachers():
         if not query:
             return jsonify({'success': True, 'teachers': []})
 
-        teachers = Teacher.query.filter(
-            Teacher.teacher_name.contains(query)
-        ).limit(20).all()
+        if use_fts():
+            snapshot_teachers = get_snapshot().teachers
+            teachers = [snapshot_teachers[match['key']] for match in fts_search(query, kinds=('teacher',))
+                        if match['key'] in snapshot_teachers]
+        else:
+            teachers = [teacher.to_dict() for teacher in Teacher.query.filter(
+                Teacher.teacher_name.contains(query)
+            ).limit(20).all()]
 
         return jsonify({
             'success': True,
-            'teachers': [teacher.to_dict() for teacher in teachers]
+            'teachers': teachers
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@teacher_bp.route('/teachers/available', methods=['GET'])
+def get_available_teachers():
+    """
+    查詢指定星期、節次沒有課的教師
+
+    參數: day（Monday-Friday）、period（3、3,4 或 3-4，多個節次時須全部空堂）
+    """
+    try:
+        day = request.args.get('day', '').strip().capitalize()
+        if day not in DAYS:
+            return jsonify({'success': False, 'error': f'day 必須為 {", ".join(DAYS)} 之一'}), 400
+        try:
+            period_numbers = parse_period_numbers(request.args.get('period', ''))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        availability = get_teacher_availability()
+        teachers = get_snapshot().teachers
+        available = availability.free_teachers(day, period_numbers)
+        return jsonify({
+            'success': True,
+            'day': day,
+            'periods': list(period_numbers),
+            'teachers': [teachers[name] for name in available],
+            'count': len(available),
+            'total_teachers': len(availability.teachers)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@teacher_bp.route('/teachers/available/exams', methods=['GET'])
+def get_available_teachers_for_exams():
+    """查詢每個考試場次全部節次都沒有課的教師（考試中的年級視為停課）"""
+    try:
+        return jsonify({
+            'success': True,
+            'sessions': exam_schedule_availability(),
+            'total_teachers': len(get_teacher_availability().teachers)
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -39,108 +193,38 @@ def search_teachers():
 def get_teacher_timetable(teacher_name):
     """取得特定教師的完整課表"""
     try:
-        # 查找教師
-        teacher = Teacher.query.filter_by(teacher_name=teacher_name).first()
-        if not teacher:
+        assembled = assemble_teacher_timetable(teacher_name)
+        if not assembled:
             return jsonify({'success': False, 'error': '找不到該教師'}), 404
 
-        # 取得所有教師教的課
-        all_classes = []
-
-        # 英文班課表
-        english_classes = EnglishTimetable.query.filter_by(
-            teacher=teacher_name
-        ).all()
-        for cls in english_classes:
-            all_classes.append({
-                'day': cls.day,
-                'period': cls.period,
-                'time': f'{cls.period}',
-                'classroom': cls.classroom,
-                'class_name': cls.class_name,
-                'teacher': cls.teacher,
-                'subject': f'English - {cls.class_name}',
-                'class_type': 'english'
-            })
-
-        # Home Room 課表
-        homeroom_classes = HomeRoomTimetable.query.filter_by(
-            teacher=teacher_name
-        ).all()
-        for cls in homeroom_classes:
-            all_classes.append({
-                'day': cls.day,
-                'period': cls.period,
-                'time': f'{cls.period}',
-                'classroom': cls.classroom,
-                'class_name': cls.home_room_class_name,
-                'teacher': cls.teacher,
-                'subject': cls.course_name,
-                'class_type': 'homeroom'
-            })
-
-        # 組織課表資料以匹配前端期望的格式
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-        timetables = {
-            'english_timetable': {},
-            'homeroom_timetable': {},
-            'ev_myreading_timetable': {}
-        }
+        return jsonify({
+            'success': True,
+            'teacher': assembled['teacher'],
+            'timetables': assembled['timetables'],
+            'statistics': assembled['statistics']
+        })
 
-        # 為每天初始化空的時段
-        for day in days:
-            for timetable_type in timetables:
-                timetables[timetable_type][day] = {}
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
 
-        # 將課程分配到相應的課表類型和時段
-        for cls in all_classes:
-            day = cls['day']
-            # 正確處理 period 字段 - 移除括號並提取數字
-            period_raw = str(cls['period']).strip()
-            # 處理可能的格式: "第18節" -> "18", "(18)" -> "18", "18" -> "18"
-            import re
-            period_match = re.search(r'(\d+)', period_raw)
-            period = period_match.group(1) if period_match else period_raw
-
-            course_data = {
-                'subject': cls['subject'],
-                'course_name': cls['subject'],  # 確保有 course_name 字段
-                'teacher': cls['teacher'],
-                'classroom': cls['classroom'],
-                'class_name': cls['class_name'],
-                'period': int(period) if period.isdigit() else 0,
-                'time': cls['time'],
-                'class_type': cls['class_type']
-            }
+@teacher_bp.route('/teachers/timetables', methods=['GET', 'POST'])
+def get_teacher_timetables():
+    """
+    批次取得多位教師的課表（格式同 /teachers/<teacher_name>/timetable）
 
-            if cls['class_type'] == 'english':
-                timetables['english_timetable'][day][period] = course_data
-            elif cls['class_type'] == 'homeroom':
-                timetables['homeroom_timetable'][day][period] = course_data
-            elif cls['class_type'] == 'ev_myreading':
-                timetables['ev_myreading_timetable'][day][period] = course_data
+    請求: {"teacher_names": [...]}；GET 回傳 405（與學生批次端點一致）
+    """
+    if request.method == 'GET':
+        return jsonify({'success': False, 'error': '請使用 POST 方法'}), 405, {'Allow': 'POST'}
 
-        # 統計教學班級數（去重複）
-        unique_classes = set()
-        for cls in all_classes:
-            unique_classes.add(cls['class_name'])
-
-        return jsonify({
-            'success': True,
-            'teacher': teacher.to_dict(),
-            'timetables': timetables,
-            'statistics': {
-                'total_classes': len(all_classes),
-                'days_with_classes': len([day for day in days if any(
-                    len(timetables[tt][day]) > 0 for tt in timetables
-                )]),
-                'english_classes': len([cls for cls in all_classes if cls['class_type'] == 'english']),
-                'ev_myreading_classes': len([cls for cls in all_classes if cls['class_type'] == 'ev_myreading']),
-                'homeroom_classes': len([cls for cls in all_classes if cls['class_type'] == 'homeroom']),
-                'unique_classes': len(unique_classes)
-            }
-        })
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            teacher_names = read_batch_keys(data, 'teacher_names')
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
 
+        return stream_batch_timetables(teacher_names, assemble_teacher_timetable)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -149,41 +233,22 @@ def get_teacher_weekly_timetable(teacher_name):
     """取得特定教師的週課表（按星期和節次排列）"""
     try:
         # 查找教師
-        teacher = Teacher.query.filter_by(teacher_name=teacher_name).first()
+        snapshot = get_snapshot()
+        teacher = snapshot.teachers.get(teacher_name)
         if not teacher:
             return jsonify({'error': '找不到該教師'}), 404
 
-        # 取得所有教師教的課
+        # 取得所有教師教的課（英文班、Home Room）
         all_classes = []
-
-        # 英文班課表
-        english_classes = EnglishTimetable.query.filter_by(
-            teacher=teacher_name
-        ).all()
-        for cls in english_classes:
-            all_classes.append({
-                'day': cls.day,
-                'period': cls.period,
-                'classroom': cls.classroom,
-                'teacher': cls.teacher,
-                'class_name': cls.class_name,
-                'course_name': f'English - {cls.class_name}',
-                'class_type': 'english'
-            })
-
-        # Home Room 課表
-        homeroom_classes = HomeRoomTimetable.query.filter_by(
-            teacher=teacher_name
-        ).all()
-        for cls in homeroom_classes:
+        for lesson in snapshot.teacher_lessons[teacher_name]:
             all_classes.append({
-                'day': cls.day,
-                'period': cls.period,
-                'classroom': cls.classroom,
-                'teacher': cls.teacher,
-                'class_name': cls.home_room_class_name,
-                'course_name': cls.course_name,
-                'class_type': 'homeroom'
+                'day': lesson.day,
+                'period': lesson.period,
+                'classroom': lesson.classroom,
+                'teacher': lesson.teacher,
+                'class_name': lesson.class_name,
+                'course_name': lesson.course_name,
+                'class_type': lesson.class_type
             })
 
         # 按星期和節次排列
@@ -203,7 +268,7 @@ def get_teacher_weekly_timetable(teacher_name):
 
         return jsonify({
             'success': True,
-            'teacher': teacher.to_dict(),
+            'teacher': teacher,
             'weekly_timetable': weekly_timetable,
             'statistics': {
                 'total_classes': len(all_classes),
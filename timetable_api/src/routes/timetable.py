@@ -1,55 +1,30 @@
 from flask import Blueprint, jsonify, request
-from src.models.timetable import db, Timetable, ClassInfo, Teacher, Classroom, Period
-from src.models.student import HomeRoomTimetable, EnglishTimetable
-from collections import defaultdict
+from src.models.timetable import db, Timetable, Teacher, Classroom, Period
+from src.snapshot import get_snapshot, DAYS
+from src.room_occupancy import extract_floor, get_room_occupancy
+from src.teacher_availability import parse_period_numbers
+from src.search_fts import SEARCH_KINDS, fts_available, search as fts_search
 
 timetable_bp = Blueprint('timetable', __name__)
 
-def is_english_class(class_name):
-    """判斷是否為英文班級格式 (如: G1 Adventurers, G2 Pathfinders 等)"""
-    if not class_name:
-        return False
-
-    # 英文班級格式: G + 數字 + 空格 + 英文名稱
-    # 例如: G1 Adventurers, G2 Pathfinders, G3 Visionaries
-    parts = class_name.split(' ', 1)
-    if len(parts) != 2:
-        return False
-
-    grade_part, name_part = parts
-    # 檢查年級部分格式: G + 數字
-    if not (grade_part.startswith('G') and len(grade_part) >= 2 and grade_part[1:].isdigit()):
-        return False
-
-    # 檢查名稱部分是否為英文
-    return name_part.replace(' ', '').isalpha() and name_part[0].isupper()
-
 @timetable_bp.route('/classes', methods=['GET'])
 def get_all_classes():
-    """取得所有班級列表 - 包含英文班級和 Homeroom 班級"""
+    """取得所有班級列表 - 包含英文班級和 Homeroom 班級（取自快照中的班級目錄）"""
     try:
-        # 1. 獲取英文班級名稱
-        english_classes = ClassInfo.query.all()
-        english_class_names = [cls.class_name for cls in english_classes]
-
-        # 2. 獲取所有 Homeroom 班級名稱
-        homeroom_classes = set()
-        homeroom_records = HomeRoomTimetable.query.all()
-        for record in homeroom_records:
-            homeroom_classes.add(record.home_room_class_name)
-
-        homeroom_class_names = list(homeroom_classes)
-
-        # 3. 合併兩個列表
-        all_class_names = english_class_names + homeroom_class_names
+        snapshot = get_snapshot()
+        type_counts = snapshot.class_type_counts
+        english_count = type_counts['english'] + type_counts['ev_myreading']
 
         return jsonify({
             'success': True,
-            'classes': sorted(all_class_names),
+            'classes': snapshot.class_names,
+            'catalog': [snapshot.class_catalog[name]._asdict() for name in snapshot.class_names],
             'counts': {
-                'english_classes': len(english_class_names),
-                'homeroom_classes': len(homeroom_class_names),
-                'total_classes': len(all_class_names)
+                'english_classes': english_count,
+                'ev_myreading_classes': type_counts['ev_myreading'],
+                'homeroom_classes': type_counts['homeroom'],
+                'total_classes': len(snapshot.class_names),
+                'by_grade': dict(snapshot.class_grade_counts)
             }
         })
     except Exception as e:
@@ -62,73 +37,27 @@ def get_all_classes():
 def get_class_timetable(class_name):
     """取得特定班級的週課表 - 整合所有課表類型"""
     try:
-        days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+        days_order = DAYS
         result_timetable = {}
 
         # 初始化每一天的課表
         for day in days_order:
             result_timetable[day] = []
 
-        has_courses = False
-
-        # 1. 查詢英文班課表 (EnglishTimetable)
-        english_courses = EnglishTimetable.query.filter_by(class_name=class_name).all()
-        for course in english_courses:
-            has_courses = True
-            # 解析節次（期待格式如 "(3)10:20-11:00" -> 3）
-            try:
-                period_num = int(course.period.split(')')[0].replace('(', ''))
-                time_range = course.period.split(')')[-1] if ')' in course.period else course.period
-            except:
-                period_num = 0
-                time_range = course.period
-
-            result_timetable[course.day].append({
-                'period': period_num,
-                'time': time_range,
-                'teacher': course.teacher,
-                'classroom': course.classroom,
-                'course_name': f'English - {class_name}',
-                'class_type': 'english'
-            })
-
-        # 2. 查詢 homeroom 課表 - 但對英文班級跳過此查詢
-        # 英文班級（如 G1 Adventurers）應該只顯示英文課程，不包含 homeroom 課程
-        if not is_english_class(class_name):
-            # 只對非英文班級查詢 homeroom 課程
-            # 根據班級名稱匹配 home_room_class_name
-            homeroom_courses = HomeRoomTimetable.query.filter_by(home_room_class_name=class_name).all()
-
-            for course in homeroom_courses:
-                has_courses = True
-                # 解析節次
-                try:
-                    period_num = int(course.period.split(')')[0].replace('(', ''))
-                    time_range = course.period.split(')')[-1] if ')' in course.period else course.period
-                except:
-                    period_num = 0
-                    time_range = course.period
-
-                result_timetable[course.day].append({
-                    'period': period_num,
-                    'time': time_range,
-                    'teacher': course.teacher,
-                    'classroom': course.classroom,
-                    'course_name': course.course_name,
-                    'class_type': 'homeroom'
-                })
-
-        # 3. 查詢原有的 Timetable 表
-        regular_courses = Timetable.query.filter_by(class_name=class_name).all()
-        for course in regular_courses:
-            has_courses = True
-            result_timetable[course.day].append({
-                'period': course.period_number,
-                'time': course.time_range,
-                'teacher': course.teacher,
-                'classroom': course.classroom,
-                'course_name': f'Regular - {class_name}',
-                'class_type': 'regular'
+        # 英文班課表、homeroom 課表（英文班級不含）與原有 Timetable 已於快照中整理完成
+        lessons = get_snapshot().class_lessons.get(class_name, ())
+        has_courses = bool(lessons)
+
+        for lesson in lessons:
+            if lesson.day not in result_timetable:
+                continue
+            result_timetable[lesson.day].append({
+                'period': lesson.period_number,
+                'time': lesson.time,
+                'teacher': lesson.teacher,
+                'classroom': lesson.classroom,
+                'course_name': lesson.course_name,
+                'class_type': lesson.class_type
             })
 
         if not has_courses:
@@ -207,8 +136,18 @@ def get_class_day_timetable(class_name, day):
 
 @timetable_bp.route('/search', methods=['GET'])
 def search_courses():
-    """搜尋課程"""
+    """
+    搜尋課程；帶 q 參數時改為學生、教師、班級統一搜尋
+
+    統一搜尋參數：
+        q: 關鍵字（姓名、學號、教師、班級名稱）
+        type: 限定類型，逗號分隔（student,teacher,class）
+        limit: 筆數上限（預設 20，最多 100）
+    """
     try:
+        if 'q' in request.args:
+            return unified_search()
+
         class_name = request.args.get('class_name')
         teacher = request.args.get('teacher')
         classroom = request.args.get('classroom')
@@ -242,6 +181,29 @@ def search_courses():
             'error': str(e)
         }), 500
 
+def unified_search():
+    """學生、教師、班級統一搜尋（FTS5），依相關度排序並標示相符位置"""
+    query = request.args.get('q', '').strip()
+    kinds = tuple(
+        kind for kind in request.args.get('type', ','.join(SEARCH_KINDS)).split(',')
+        if kind in SEARCH_KINDS
+    )
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+
+    if not fts_available():
+        return jsonify({
+            'success': False,
+            'error': '此資料庫不支援 FTS5 全文搜尋'
+        }), 503
+
+    results = fts_search(query, kinds=kinds, limit=limit)
+    return jsonify({
+        'success': True,
+        'query': query,
+        'results': results,
+        'count': len(results)
+    })
+
 # NOTE: /teachers 路由已移至 routes/teacher.py (teacher_bp)
 # 避免重複路由導致回傳格式錯誤
 
@@ -279,34 +241,76 @@ def get_all_classrooms():
             'error': str(e)
         }), 500
 
-def extract_floor(classroom_name):
-    """從教室名稱提取樓層 (E301 -> E3, KCFS1 -> KCFS)"""
-    if not classroom_name:
-        return 'Other'
-    if classroom_name.startswith('KCFS'):
-        return 'KCFS'
-    # E101 -> E1, E301 -> E3
-    if len(classroom_name) >= 2 and classroom_name[0].isalpha() and classroom_name[1].isdigit():
-        return classroom_name[:2]
-    return 'Other'
+@timetable_bp.route('/classrooms/free', methods=['GET'])
+def get_free_classrooms():
+    """
+    查詢指定星期、節次沒有課的教室
+
+    參數: day（Monday-Friday）、period（單一節次）、floor（選填，如 E3、KCFS）、
+    date（選填，考試日期 YYYY-MM-DD；考試教室視為占用，考試中的年級停課，可省略 day）
+    """
+    try:
+        occupancy = get_room_occupancy()
+        exam_date = request.args.get('date', '').strip() or None
+        day = request.args.get('day', '').strip().capitalize()
+        if exam_date:
+            exam_day = occupancy.exam_day(exam_date)
+            if exam_day is None:
+                return jsonify({'success': False, 'error': f'{exam_date} 不是考試日期'}), 400
+            if day and day != exam_day:
+                return jsonify({'success': False, 'error': f'{exam_date} 為 {exam_day}，與 day 不符'}), 400
+            day = exam_day
+        if day not in DAYS:
+            return jsonify({'success': False, 'error': f'day 必須為 {", ".join(DAYS)} 之一'}), 400
+        try:
+            period_numbers = parse_period_numbers(request.args.get('period', ''))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        if len(period_numbers) != 1:
+            return jsonify({'success': False, 'error': 'period 只能指定一個節次'}), 400
+        period_number = period_numbers[0]
+
+        floor = request.args.get('floor', '').strip() or None
+        if floor is None:
+            grouped = occupancy.free_rooms_grouped(day, period_number, exam_date=exam_date)
+        else:
+            grouped = {floor: occupancy.free_rooms(day, period_number, floor=floor, exam_date=exam_date)}
+        classrooms = occupancy.free_rooms(day, period_number, floor=floor, exam_date=exam_date)
+        return jsonify({
+            'success': True,
+            'day': day,
+            'period': period_number,
+            'date': exam_date,
+            'floor': floor,
+            'classrooms': classrooms,
+            'grouped': grouped,
+            'count': len(classrooms),
+            'total_classrooms': len(occupancy.rooms)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 @timetable_bp.route('/classrooms/<classroom_name>/timetable', methods=['GET'])
 def get_classroom_timetable(classroom_name):
     """取得特定教室的完整週課表"""
     try:
         # 驗證教室是否存在
-        classroom = Classroom.query.filter_by(classroom_name=classroom_name).first()
-        if not classroom:
+        snapshot = get_snapshot()
+        if classroom_name not in snapshot.classroom_names:
             return jsonify({
                 'success': False,
                 'error': f'找不到教室: {classroom_name}'
             }), 404
 
-        days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+        days_order = DAYS
 
         # 初始化課表結構
-        english_timetable = {day: {} for day in days_order}
-        homeroom_timetable = {day: {} for day in days_order}
+        timetables_by_type = {
+            'english': {day: {} for day in days_order},
+            'homeroom': {day: {} for day in days_order}
+        }
+        english_timetable = timetables_by_type['english']
+        homeroom_timetable = timetables_by_type['homeroom']
 
         # 統計變數
         total_classes = 0
@@ -316,63 +320,33 @@ def get_classroom_timetable(classroom_name):
         unique_teachers = set()
         unique_class_groups = set()
 
-        # 1. 查詢英文班課表
-        english_courses = EnglishTimetable.query.filter_by(classroom=classroom_name).all()
-        for course in english_courses:
-            try:
-                period_num = int(course.period.split(')')[0].replace('(', ''))
-                time_range = course.period.split(')')[-1] if ')' in course.period else course.period
-            except:
-                period_num = 0
-                time_range = course.period
-
-            period_key = str(period_num)
-            if period_key not in english_timetable[course.day]:
-                english_timetable[course.day][period_key] = {
-                    'period': period_num,
-                    'time': time_range,
-                    'teacher': course.teacher,
-                    'classroom': course.classroom,
-                    'course_name': f'English - {course.class_name}',
-                    'class_name': course.class_name,
-                    'class_type': 'english'
-                }
-                total_classes += 1
-                english_count += 1
-                days_with_classes.add(course.day)
-                if course.teacher:
-                    unique_teachers.add(course.teacher)
-                if course.class_name:
-                    unique_class_groups.add(course.class_name)
-
-        # 2. 查詢導師班課表
-        homeroom_courses = HomeRoomTimetable.query.filter_by(classroom=classroom_name).all()
-        for course in homeroom_courses:
-            try:
-                period_num = int(course.period.split(')')[0].replace('(', ''))
-                time_range = course.period.split(')')[-1] if ')' in course.period else course.period
-            except:
-                period_num = 0
-                time_range = course.period
-
-            period_key = str(period_num)
-            if period_key not in homeroom_timetable[course.day]:
-                homeroom_timetable[course.day][period_key] = {
-                    'period': period_num,
-                    'time': time_range,
-                    'teacher': course.teacher,
-                    'classroom': course.classroom,
-                    'course_name': course.course_name,
-                    'class_name': course.home_room_class_name,
-                    'class_type': 'homeroom'
+        # 英文班課表與導師班課表（同一時段只取第一筆）
+        for lesson in snapshot.classroom_lessons[classroom_name]:
+            day_timetable = timetables_by_type[lesson.class_type].get(lesson.day)
+            if day_timetable is None:
+                continue
+
+            period_key = str(lesson.period_number)
+            if period_key not in day_timetable:
+                day_timetable[period_key] = {
+                    'period': lesson.period_number,
+                    'time': lesson.time,
+                    'teacher': lesson.teacher,
+                    'classroom': lesson.classroom,
+                    'course_name': lesson.course_name,
+                    'class_name': lesson.class_name,
+                    'class_type': lesson.class_type
                 }
                 total_classes += 1
-                homeroom_count += 1
-                days_with_classes.add(course.day)
-                if course.teacher:
-                    unique_teachers.add(course.teacher)
-                if course.home_room_class_name:
-                    unique_class_groups.add(course.home_room_class_name)
+                if lesson.class_type == 'english':
+                    english_count += 1
+                else:
+                    homeroom_count += 1
+                days_with_classes.add(lesson.day)
+                if lesson.teacher:
+                    unique_teachers.add(lesson.teacher)
+                if lesson.class_name:
+                    unique_class_groups.add(lesson.class_name)
 
         return jsonify({
             'success': True,
@@ -0,0 +1,74 @@
+"""
+資料庫結構升級
+db.create_all() 只會建立不存在的資料表，不會為既有資料表補上新欄位或索引；
+啟動時於 create_all() 之後呼叫 upgrade_schema() 補齊。
+"""
+import pandas as pd
+from sqlalchemy import inspect, text
+
+from src.models.timetable import db
+from src.models.student import EnglishTimetable, HomeRoomTimetable
+from src.search_fts import create_search_table
+
+# 後續新增的欄位: {資料表: [(欄位, SQLite 型別), ...]}
+ADDED_COLUMNS = {
+    EnglishTimetable.__tablename__: [
+        ('period_number', 'INTEGER'),
+        ('start_time', 'VARCHAR(10)'),
+        ('end_time', 'VARCHAR(10)'),
+    ],
+    HomeRoomTimetable.__tablename__: [
+        ('period_number', 'INTEGER'),
+        ('start_time', 'VARCHAR(10)'),
+        ('end_time', 'VARCHAR(10)'),
+    ],
+}
+
+
+def upgrade_schema():
+    """補上既有資料表缺少的欄位與索引，回填節次欄位，並建立 FTS5 搜尋資料表"""
+    inspector = inspect(db.engine)
+
+    for table_name, columns in ADDED_COLUMNS.items():
+        existing = {column['name'] for column in inspector.get_columns(table_name)}
+        for column_name, column_type in columns:
+            if column_name not in existing:
+                db.session.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}'))
+                print(f"  ✅ 新增欄位 {table_name}.{column_name}")
+    db.session.commit()
+
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+    for model in (EnglishTimetable, HomeRoomTimetable):
+        backfill_period_columns(model)
+
+    create_search_table()
+
+
+def backfill_period_columns(model):
+    """為尚未解析節次的舊資料回填 period_number / start_time / end_time"""
+    from src.data_loader_student import parse_period_columns
+
+    rows = db.session.query(model.id, model.period).filter(model.period_number.is_(None)).all()
+    if not rows:
+        return 0
+
+    df = pd.DataFrame(rows, columns=['id', 'period'])
+    df = df.join(parse_period_columns(df['period']))
+    df = df[df['period_number'].notna()]
+    if len(df):
+        db.session.execute(
+            model.__table__.update()
+            .where(model.__table__.c.id == db.bindparam('row_id'))
+            .values(
+                period_number=db.bindparam('period_number'),
+                start_time=db.bindparam('start_time'),
+                end_time=db.bindparam('end_time'),
+            ),
+            df.rename(columns={'id': 'row_id'})[['row_id', 'period_number', 'start_time', 'end_time']].to_dict('records')
+        )
+        db.session.commit()
+        print(f"  ✅ {model.__tablename__} 回填 {len(df)} 筆節次欄位")
+    return len(df)
@@ -0,0 +1,161 @@
+"""
+FTS5 全文搜尋
+以 SQLite FTS5 虛擬資料表 search_fts 收錄學生（姓名、學號）、教師與班級名稱，
+使用 trigram tokenizer：不需斷詞即可比對中文，英文不分大小寫，並提供 bm25 相關度與 highlight()。
+資料表由各資料載入器在寫入後呼叫 sync_search_table() 重建，與正式資料在同一個交易內提交。
+
+trigram 需要至少三個字元才能使用索引；較短的查詢改以 LIKE 掃描 search_fts（筆數少，仍然很快）。
+
+SEARCH_BACKEND 環境變數決定 /api/students/search、/api/teachers/search 使用的實作：
+    index（預設）：記憶體搜尋索引（src/search_index.py）
+    fts：FTS5
+統一搜尋 /api/search?q= 固定使用 FTS5。
+"""
+import os
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from src.models.timetable import db
+
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'index').lower()
+
+SEARCH_TABLE = 'search_fts'
+SEARCH_KINDS = ('student', 'teacher', 'class')
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+
+# kind、key 僅供回查，不建立索引；name、code 為搜尋欄位
+CREATE_SEARCH_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+    kind UNINDEXED, key UNINDEXED, name, code,
+    tokenize = 'trigram case_sensitive 0'
+)
+"""
+
+SYNC_STATEMENTS = (
+    f"DELETE FROM {SEARCH_TABLE}",
+    f"""INSERT INTO {SEARCH_TABLE} (kind, key, name, code)
+        SELECT 'student', student_id, student_name, student_id FROM students""",
+    f"""INSERT INTO {SEARCH_TABLE} (kind, key, name, code)
+        SELECT 'teacher', teacher_name, teacher_name, '' FROM teachers""",
+    f"""INSERT INTO {SEARCH_TABLE} (kind, key, name, code)
+        SELECT 'class', class_name, class_name, '' FROM (
+            SELECT class_name FROM english_timetable
+            UNION SELECT home_room_class_name FROM homeroom_timetable
+            UNION SELECT class_name FROM timetable
+        ) WHERE class_name IS NOT NULL AND class_name != ''""",
+)
+
+_available = None
+
+
+def create_search_table():
+    """建立 search_fts（SQLite 不支援 FTS5 trigram 時回傳 False），既有資料尚未收錄時一併建立"""
+    global _available
+    try:
+        db.session.execute(text(CREATE_SEARCH_TABLE))
+        db.session.commit()
+    except OperationalError as e:
+        db.session.rollback()
+        _available = False
+        print(f"  ❌ 無法建立 FTS5 搜尋資料表（{e}），搜尋改用記憶體索引")
+        return False
+
+    _available = True
+    if not db.session.execute(text(f"SELECT 1 FROM {SEARCH_TABLE} LIMIT 1")).first():
+        sync_search_table()
+        db.session.commit()
+    return True
+
+
+def fts_available():
+    global _available
+    if _available is None:
+        _available = db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE name = :name"
+        ), {'name': SEARCH_TABLE}).first() is not None
+    return _available
+
+
+def use_fts():
+    """學生、教師搜尋是否使用 FTS5"""
+    return SEARCH_BACKEND == 'fts' and fts_available()
+
+
+def sync_search_table():
+    """以目前的學生、教師、課表資料重建 search_fts（呼叫端負責 commit）"""
+    if not fts_available():
+        return
+    for statement in SYNC_STATEMENTS:
+        db.session.execute(text(statement))
+
+
+def _match_expression(query):
+    """將使用者輸入轉為 FTS5 片語查詢，避免特殊字元被解讀為查詢語法"""
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _highlight(value, query):
+    """短查詢（不經 FTS5 比對）時以 Python 標示第一個相符位置"""
+    index = value.casefold().find(query.casefold())
+    if index < 0:
+        return value
+    end = index + len(query)
+    return value[:index] + HIGHLIGHT_START + value[index:end] + HIGHLIGHT_END + value[end:]
+
+
+def search(query, kinds=SEARCH_KINDS, limit=20):
+    """
+    搜尋 search_fts，依相關度排序
+
+    回傳 [{'type', 'key', 'name', 'highlight', 'score'}]；
+    highlight 為標示相符位置的姓名（姓名不相符時為學號），
+    score 為 bm25 相關度（越大越相關），短查詢不計算相關度，score 為 None
+    """
+    query = query.strip()
+    if not query or not kinds:
+        return []
+
+    params = {'limit': limit}
+    kind_names = []
+    for i, kind in enumerate(kinds):
+        params[f'kind{i}'] = kind
+        kind_names.append(f':kind{i}')
+    kind_filter = f"kind IN ({', '.join(kind_names)})"
+
+    if len(query) >= 3:
+        params['match'] = _match_expression(query)
+        rows = db.session.execute(text(f"""
+            SELECT kind, key, name,
+                   highlight({SEARCH_TABLE}, 2, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}') AS name_highlight,
+                   highlight({SEARCH_TABLE}, 3, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}') AS code_highlight,
+                   bm25({SEARCH_TABLE}, 0, 0, 2.0, 1.0) AS rank
+            FROM {SEARCH_TABLE}
+            WHERE {SEARCH_TABLE} MATCH :match AND {kind_filter}
+            ORDER BY rank
+            LIMIT :limit
+        """), params)
+        return [{
+            'type': row.kind,
+            'key': row.key,
+            'name': row.name,
+            'highlight': row.name_highlight if HIGHLIGHT_START in row.name_highlight else row.code_highlight,
+            'score': round(-row.rank, 4)
+        } for row in rows]
+
+    params['pattern'] = '%' + query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    rows = db.session.execute(text(f"""
+        SELECT kind, key, name, code FROM {SEARCH_TABLE}
+        WHERE (name LIKE :pattern ESCAPE '\\' OR code LIKE :pattern ESCAPE '\\') AND {kind_filter}
+        ORDER BY length(name), rowid
+        LIMIT :limit
+    """), params)
+    return [{
+        'type': row.kind,
+        'key': row.key,
+        'name': row.name,
+        'highlight': _highlight(row.name, query) if query.casefold() in row.name.casefold()
+                     else _highlight(row.code, query),
+        'score': None
+    } for row in rows]
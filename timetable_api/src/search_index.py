@@ -0,0 +1,148 @@
+"""
+學生搜尋索引
+取代 LIKE '%q%' 全表掃描：姓名與學號建立 1~3 字元的 n-gram 反向索引（中英混合姓名皆適用），
+學號另存一份排序清單以二分搜尋做前綴比對。索引以快照版本為單位建立，資料更新後自動重建。
+
+比對不分大小寫，維持「姓名或學號包含查詢字串」的語意與最多 20 筆的回傳上限，結果依相關度排序：
+    0. 學號完全相符或前綴相符（依學號排序）
+    1. 姓名開頭相符
+    2. 姓名中某個單字開頭相符（如 "chen" 比對 "陳星甯Lollie Chen"）
+    3. 姓名其他位置包含
+    4. 學號其他位置包含
+同一等級內姓名較短者優先，其餘依原資料順序。
+"""
+import heapq
+from bisect import bisect_left
+
+from src.snapshot import get_snapshot
+
+SEARCH_LIMIT = 20
+
+# n-gram 最大長度；查詢字串較長時以三字元片段取交集後再逐筆確認
+MAX_GRAM = 3
+
+
+def normalize(text):
+    return (text or '').casefold()
+
+
+def _is_word_start(name, index):
+    """index 是否為單字開頭：字串開頭、空白或符號之後，或由中文轉為英文的位置"""
+    if index == 0:
+        return True
+    previous, current = name[index - 1], name[index]
+    if not previous.isalnum():
+        return True
+    return not previous.isascii() and current.isascii()
+
+
+class StudentSearchIndex:
+    """唯讀學生搜尋索引，students 為學生 dict 序列（與快照共用，不可修改）"""
+
+    def __init__(self, students):
+        self._students = tuple(students)
+        self._names = [normalize(student['student_name']) for student in self._students]
+        self._ids = [normalize(student['student_id']) for student in self._students]
+
+        # n-gram -> 學生位置（遞增）
+        self._grams = {}
+        for position, (name, student_id) in enumerate(zip(self._names, self._ids)):
+            grams = set()
+            for text in (name, student_id):
+                for size in range(1, MAX_GRAM + 1):
+                    grams.update(text[i:i + size] for i in range(len(text) - size + 1))
+            for gram in grams:
+                self._grams.setdefault(gram, []).append(position)
+
+        # 學號排序清單（前綴比對）
+        id_order = sorted(range(len(self._ids)), key=self._ids.__getitem__)
+        self._sorted_ids = [self._ids[position] for position in id_order]
+        self._sorted_positions = id_order
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """回傳最多 limit 筆符合的學生 dict，依相關度排序"""
+        query = normalize(query.strip())
+        if not query:
+            return []
+
+        # 學號前綴相符的學生已足夠時直接回傳（最高等級，依學號排序）
+        prefix_positions = self._id_prefix_positions(query, limit)
+        if len(prefix_positions) >= limit:
+            return [self._students[position] for position in prefix_positions[:limit]]
+
+        ranked = heapq.nsmallest(limit, (
+            rank for rank in (self._rank(position, query) for position in self._candidates(query))
+            if rank is not None
+        ))
+        return [self._students[position] for *_, position in ranked]
+
+    def _id_prefix_positions(self, query, limit):
+        start = bisect_left(self._sorted_ids, query)
+        positions = []
+        for index in range(start, min(start + limit, len(self._sorted_ids))):
+            if not self._sorted_ids[index].startswith(query):
+                break
+            positions.append(self._sorted_positions[index])
+        return positions
+
+    def _candidates(self, query):
+        """可能包含 query 的學生位置（長度超過 MAX_GRAM 時需再確認）"""
+        size = min(len(query), MAX_GRAM)
+        grams = {query[i:i + size] for i in range(len(query) - size + 1)}
+        postings = []
+        for gram in grams:
+            positions = self._grams.get(gram)
+            if not positions:
+                return []
+            postings.append(positions)
+        postings.sort(key=len)
+        if len(postings) == 1:
+            return postings[0]
+        candidates = set(postings[0])
+        for positions in postings[1:]:
+            candidates.intersection_update(positions)
+            if not candidates:
+                break
+        return candidates
+
+    def _rank(self, position, query):
+        """(等級, 次要排序, 位置)；不相符時回傳 None"""
+        student_id = self._ids[position]
+        if student_id.startswith(query):
+            return (0, student_id, position)
+
+        name = self._names[position]
+        index = name.find(query)
+        if index == 0:
+            return (1, len(name), position)
+        if index > 0:
+            while index != -1:
+                if _is_word_start(name, index):
+                    return (2, len(name), position)
+                index = name.find(query, index + 1)
+            return (3, len(name), position)
+
+        if query in student_id:
+            return (4, student_id, position)
+        return None
+
+
+_index_version = None
+_index = None
+
+
+def get_student_search_index():
+    """取得目前快照版本的學生搜尋索引（需在 app context 內呼叫）"""
+    global _index_version, _index
+
+    snapshot = get_snapshot()
+    index = _index
+    if _index_version != snapshot.version or index is None:
+        index = StudentSearchIndex(snapshot.student_list)
+        _index, _index_version = index, snapshot.version
+    return index
+
+
+def search_students(query, limit=SEARCH_LIMIT):
+    """搜尋學生（姓名或學號包含 query），回傳學生 dict 清單"""
+    return get_student_search_index().search(query, limit)
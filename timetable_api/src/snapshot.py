@@ -0,0 +1,251 @@
+"""
+課表記憶體快照
+啟動時一次建立唯讀快照，預先整理好每位學生、教師、班級、教室的課表，
+查詢路由直接讀取快照而不需存取資料庫。資料異動時整份重建後以單一參照替換。
+"""
+import re
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+from src.models.timetable import Teacher, Classroom, ClassInfo
+from src.models.student import Student
+from src.data_version import (
+    adopt_version_stamp, mark_snapshot_changed, read_version_stamp, snapshot_generation
+)
+
+DAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday')
+
+# 單一節課的唯讀紀錄
+# period: 原始節次字串，例如 "(3)10:20-11:00"
+# period_number / time: 載入時已解析的節次號碼與時間範圍
+Lesson = namedtuple('Lesson', [
+    'day', 'period', 'period_number', 'time', 'classroom',
+    'teacher', 'class_name', 'course_name', 'class_type'
+])
+
+# 班級目錄的一筆紀錄，class_type: 'english' / 'ev_myreading' / 'homeroom'
+ClassEntry = namedtuple('ClassEntry', ['class_name', 'grade', 'class_type'])
+
+# 班級資料表的 EV & myReading 班級年級為 'G1A' 這類格式，目錄只保留 'G1'
+GRADE_PATTERN = re.compile(r'^G\d+')
+
+
+def lesson_grade(class_name):
+    """'G1 Achievers' -> 'G1'，Home Room 班級 '103' -> 'G1'，無法判斷時回傳 None"""
+    if not class_name:
+        return None
+    if class_name[0] == 'G' and class_name[1:2].isdigit():
+        return class_name.split()[0]
+    if class_name[0].isdigit():
+        return f'G{class_name[0]}'
+    return None
+
+
+def is_english_class(class_name):
+    """判斷是否為英文班級格式 (如: G1 Adventurers, G2 Pathfinders 等)"""
+    if not class_name:
+        return False
+
+    # 英文班級格式: G + 數字 + 空格 + 英文名稱
+    # 例如: G1 Adventurers, G2 Pathfinders, G3 Visionaries
+    parts = class_name.split(' ', 1)
+    if len(parts) != 2:
+        return False
+
+    grade_part, name_part = parts
+    # 檢查年級部分格式: G + 數字
+    if not (grade_part.startswith('G') and len(grade_part) >= 2 and grade_part[1:].isdigit()):
+        return False
+
+    # 檢查名稱部分是否為英文
+    return name_part.replace(' ', '').isalpha() and name_part[0].isupper()
+
+
+class TimetableSnapshot:
+    """
+    唯讀課表快照
+
+    所有索引皆為 MappingProxyType + tuple，建立後不可修改；
+    其中的 dict（學生、教師資料）與外部共用，呼叫端不可就地修改。
+    """
+
+    def __init__(self, version, students, teachers, classroom_names,
+                 student_lessons, teacher_lessons, class_lessons, classroom_lessons, class_catalog,
+                 class_students):
+        self.version = version
+        self.students = MappingProxyType(students)
+        self.student_list = tuple(students.values())
+        self.teachers = MappingProxyType(teachers)
+        self.teacher_list = tuple(teachers.values())
+        self.classroom_names = frozenset(classroom_names)
+        self.student_lessons = MappingProxyType(student_lessons)
+        self.teacher_lessons = MappingProxyType(teacher_lessons)
+        self.class_lessons = MappingProxyType(class_lessons)
+        self.classroom_lessons = MappingProxyType(classroom_lessons)
+        # 班級目錄：名稱排序與各類型、年級的數量於建立時算好
+        self.class_catalog = MappingProxyType(class_catalog)
+        self.class_names = tuple(sorted(class_catalog))
+        type_counts = {'english': 0, 'ev_myreading': 0, 'homeroom': 0}
+        grade_counts = {}
+        for entry in class_catalog.values():
+            type_counts[entry.class_type] += 1
+            grade = entry.grade or 'Other'
+            grade_counts[grade] = grade_counts.get(grade, 0) + 1
+        self.class_type_counts = MappingProxyType(type_counts)
+        self.class_grade_counts = MappingProxyType(grade_counts)
+        # 班級 -> 學生 ID（英文班、Home Room、EV & myReading 班級）
+        self.class_students = MappingProxyType(class_students)
+
+    @classmethod
+    def build(cls, version):
+        """從資料庫讀取所有課表資料並建立快照（需在 app context 內呼叫）"""
+        from src.timetable_queries import all_lessons_query, iter_lessons
+
+        # 單一 UNION ALL 查詢依來源分組
+        by_class = {'english': {}, 'homeroom': {}, 'regular': {}}
+        by_teacher = {'english': {}, 'homeroom': {}}
+        by_classroom = {'english': {}, 'homeroom': {}}
+        for lesson in iter_lessons(all_lessons_query()):
+            by_class[lesson.class_type].setdefault(lesson.class_name, []).append(lesson)
+            if lesson.class_type != 'regular':
+                by_teacher[lesson.class_type].setdefault(lesson.teacher, []).append(lesson)
+                by_classroom[lesson.class_type].setdefault(lesson.classroom, []).append(lesson)
+        english_by_class, homeroom_by_class, regular_by_class = (
+            by_class['english'], by_class['homeroom'], by_class['regular']
+        )
+        english_by_teacher, homeroom_by_teacher = by_teacher['english'], by_teacher['homeroom']
+        english_by_classroom, homeroom_by_classroom = by_classroom['english'], by_classroom['homeroom']
+
+        # 學生：英文班 + EV & myReading + Home Room
+        students = {}
+        student_lessons = {}
+        ev_myreading_names = set()
+        class_students = {}
+        for student in Student.query.all():
+            students[student.student_id] = student.to_dict()
+            for class_name in {student.english_class_name, student.home_room_class_name,
+                               student.ev_myreading_class_name} - {None, ''}:
+                class_students.setdefault(class_name, []).append(student.student_id)
+            lessons = list(english_by_class.get(student.english_class_name, ()))
+            if student.ev_myreading_class_name:
+                ev_myreading_names.add(student.ev_myreading_class_name)
+                lessons.extend(
+                    lesson._replace(
+                        course_name=f'EV & myReading - {lesson.class_name}',
+                        class_type='ev_myreading'
+                    )
+                    for lesson in english_by_class.get(student.ev_myreading_class_name, ())
+                )
+            lessons.extend(homeroom_by_class.get(student.home_room_class_name, ()))
+            student_lessons[student.student_id] = tuple(lessons)
+
+        # 教師：英文班 + Home Room（僅收錄教師名單中的教師）
+        teachers = {}
+        teacher_lessons = {}
+        for teacher in Teacher.query.all():
+            teachers[teacher.teacher_name] = teacher.to_dict()
+            teacher_lessons[teacher.teacher_name] = tuple(
+                english_by_teacher.get(teacher.teacher_name, [])
+                + homeroom_by_teacher.get(teacher.teacher_name, [])
+            )
+
+        # 班級目錄：班級資料表（英文班、EV & myReading）+ Home Room 班級
+        class_catalog = {}
+        for class_info in ClassInfo.query.all():
+            class_type = 'ev_myreading' if class_info.class_name in ev_myreading_names else 'english'
+            grade = GRADE_PATTERN.match(class_info.grade or '')
+            class_catalog[class_info.class_name] = ClassEntry(
+                class_info.class_name, grade.group(0) if grade else class_info.grade, class_type
+            )
+        for class_name in homeroom_by_class:
+            if class_name not in class_catalog:
+                class_catalog[class_name] = ClassEntry(class_name, lesson_grade(class_name), 'homeroom')
+
+        # 班級：英文班 + Home Room（英文班級不含 Home Room）+ 原有 Timetable
+        class_lessons = {}
+        for class_name in set(english_by_class) | set(homeroom_by_class) | set(regular_by_class):
+            lessons = list(english_by_class.get(class_name, ()))
+            entry = class_catalog.get(class_name)
+            if entry is not None and entry.class_type == 'homeroom':
+                lessons.extend(homeroom_by_class.get(class_name, ()))
+            lessons.extend(regular_by_class.get(class_name, ()))
+            if lessons:
+                class_lessons[class_name] = tuple(lessons)
+
+        # 教室：英文班 + Home Room（僅收錄教室名單中的教室）
+        classroom_names = [classroom.classroom_name for classroom in Classroom.query.all()]
+        classroom_lessons = {
+            name: tuple(english_by_classroom.get(name, []) + homeroom_by_classroom.get(name, []))
+            for name in classroom_names
+        }
+
+        return cls(
+            version=version,
+            students=students,
+            teachers=teachers,
+            classroom_names=classroom_names,
+            student_lessons=student_lessons,
+            teacher_lessons=teacher_lessons,
+            class_lessons=class_lessons,
+            classroom_lessons=classroom_lessons,
+            class_catalog=class_catalog,
+            class_students={name: tuple(sorted(ids)) for name, ids in class_students.items()}
+        )
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot():
+    """取得目前的課表快照，尚未建立時先建立（需在 app context 內呼叫）"""
+    snapshot = _snapshot
+    if snapshot is None:
+        with _snapshot_lock:
+            snapshot = _snapshot
+            if snapshot is None:
+                snapshot = _publish(TimetableSnapshot.build(version=1))
+    return snapshot
+
+
+def rebuild_snapshot():
+    """重新建立快照並以單一參照替換，進行中的請求仍使用舊快照"""
+    with _snapshot_lock:
+        version = _snapshot.version + 1 if _snapshot is not None else 1
+        return _publish(TimetableSnapshot.build(version=version))
+
+
+def refresh_snapshot():
+    """資料載入後呼叫：若已有快照則立即重建，尚未建立則留待啟動流程建立；並通知其他行程重建"""
+    if _snapshot is not None:
+        rebuild_snapshot()
+    mark_snapshot_changed()
+
+
+_sync_lock = threading.Lock()
+
+
+def sync_snapshot():
+    """
+    多行程部署時於每個請求前呼叫：其他行程異動資料後，採用共用的資料版本，
+    若快照來源資料也有異動則先重建快照（同時只由一個執行緒處理，其餘沿用目前狀態）
+    """
+    if not _sync_lock.acquire(blocking=False):
+        return
+    try:
+        stamp = read_version_stamp()
+        if stamp is None:
+            return
+        version, generation, seen = stamp
+        if generation != snapshot_generation():
+            rebuild_snapshot()
+        adopt_version_stamp(version, generation, seen)
+    finally:
+        _sync_lock.release()
+
+
+def _publish(snapshot):
+    global _snapshot
+    _snapshot = snapshot
+    return snapshot
@@ -0,0 +1,149 @@
+"""
+教師空堂查詢
+由快照中的英文班與 Home Room 課表建立「年級 × 教師」的占用位元圖：每位教師一週的課以一個 uint64 表示，
+第 (星期索引 × PERIOD_SLOTS + 節次 - 1) 個位元為 1 代表該節有課。
+查詢時以節次遮罩對所有教師一次做位元運算（numpy 向量化），不需逐一讀取教師課表。
+
+依年級分列是為了支援考試週：考試中的年級在考試節次停課，排除這些年級的列後再合併即可。
+位元圖以快照版本為單位快取。
+"""
+import re
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from src.models.timetable import db
+from src.models.exam import ExamSession
+from src.snapshot import DAYS, get_snapshot, lesson_grade
+
+# 每天保留的節次位元數（5 天 × 12 節 = 60 位元，可放入 uint64）
+PERIOD_SLOTS = 12
+
+
+def period_bit(day, period_number):
+    """(星期, 節次) 對應的位元"""
+    return np.uint64(1) << np.uint64(DAYS.index(day) * PERIOD_SLOTS + period_number - 1)
+
+
+def period_mask(day, period_numbers):
+    """多個節次的遮罩"""
+    mask = np.uint64(0)
+    for period_number in period_numbers:
+        mask |= period_bit(day, period_number)
+    return mask
+
+
+def parse_period_numbers(value):
+    """'3' / '3,4' / '3-4' / 'P3-P4' -> (3, 4)，格式錯誤或超出範圍時拋出 ValueError"""
+    numbers = set()
+    for part in (value or '').split(','):
+        bounds = [int(number) for number in re.findall(r'\d+', part)]
+        if not bounds or len(bounds) > 2:
+            raise ValueError(f'節次格式錯誤：{value}')
+        numbers.update(range(bounds[0], bounds[-1] + 1))
+    if not numbers or min(numbers) < 1 or max(numbers) > PERIOD_SLOTS:
+        raise ValueError(f'節次需介於 1 到 {PERIOD_SLOTS}：{value}')
+    return tuple(sorted(numbers))
+
+
+class TeacherAvailability:
+    """唯讀的教師占用位元圖"""
+
+    def __init__(self, snapshot):
+        self.teachers = tuple(sorted(snapshot.teachers))
+        grades = sorted({
+            lesson_grade(lesson.class_name)
+            for lessons in snapshot.teacher_lessons.values() for lesson in lessons
+        }, key=lambda grade: (grade is None, grade or ''))
+        self.grades = tuple(grades)
+        grade_rows = {grade: row for row, grade in enumerate(self.grades)}
+
+        occupancy = np.zeros((len(self.grades), len(self.teachers)), dtype=np.uint64)
+        for column, teacher in enumerate(self.teachers):
+            for lesson in snapshot.teacher_lessons.get(teacher, ()):
+                if lesson.day in DAYS and lesson.period_number and 1 <= lesson.period_number <= PERIOD_SLOTS:
+                    occupancy[grade_rows[lesson_grade(lesson.class_name)], column] |= period_bit(
+                        lesson.day, lesson.period_number
+                    )
+        self.by_grade = occupancy
+        self.combined = np.bitwise_or.reduce(occupancy, axis=0) if len(self.grades) else np.zeros(
+            len(self.teachers), dtype=np.uint64
+        )
+
+    def occupancy(self, excused_grades=()):
+        """合併後的占用位元（excused_grades 的課程視為停課）"""
+        excused = [row for row, grade in enumerate(self.grades) if grade in excused_grades]
+        if not excused:
+            return self.combined
+        keep = np.ones(len(self.grades), dtype=bool)
+        keep[excused] = False
+        return np.bitwise_or.reduce(self.by_grade[keep], axis=0) if keep.any() else np.zeros_like(self.combined)
+
+    def free_teachers(self, day, period_numbers, excused_grades=()):
+        """在所有指定節次都沒有課的教師名稱"""
+        mask = period_mask(day, period_numbers)
+        free = np.flatnonzero((self.occupancy(excused_grades) & mask) == 0)
+        return [self.teachers[column] for column in free]
+
+
+_availability_version = None
+_availability = None
+
+
+def get_teacher_availability():
+    """取得目前快照版本的教師占用位元圖（需在 app context 內呼叫）"""
+    global _availability_version, _availability
+
+    snapshot = get_snapshot()
+    availability = _availability
+    if _availability_version != snapshot.version or availability is None:
+        availability = TeacherAvailability(snapshot)
+        _availability, _availability_version = availability, snapshot.version
+    return availability
+
+
+def exam_schedule_availability():
+    """
+    每個考試場次全部節次都沒有課的教師 -> [dict]
+
+    考試中的年級（同一天同一節次有考試）視為停課，其課程不占用教師。
+    """
+    availability = get_teacher_availability()
+    sessions = db.session.execute(
+        db.select(ExamSession.grade_band, ExamSession.grade, ExamSession.exam_date,
+                  ExamSession.periods, ExamSession.exam_time)
+        .order_by(ExamSession.exam_date, ExamSession.exam_time, ExamSession.grade_band)
+    ).all()
+
+    parsed = []
+    examining = defaultdict(set)  # (日期, 節次) -> 考試中的年級
+    for grade_band, grade, exam_date, periods, exam_time in sessions:
+        try:
+            day = datetime.strptime(exam_date, '%Y-%m-%d').strftime('%A')
+            period_numbers = parse_period_numbers(periods)
+        except (TypeError, ValueError):
+            day, period_numbers = None, ()
+        parsed.append((grade_band, exam_date, day, periods, exam_time, period_numbers))
+        for period_number in period_numbers:
+            examining[(exam_date, period_number)].add(grade)
+
+    result = []
+    for grade_band, exam_date, day, periods, exam_time, period_numbers in parsed:
+        available = None
+        if day in DAYS and period_numbers:
+            free = np.ones(len(availability.teachers), dtype=bool)
+            for period_number in period_numbers:
+                occupancy = availability.occupancy(examining[(exam_date, period_number)])
+                free &= (occupancy & period_bit(day, period_number)) == 0
+            available = [availability.teachers[column] for column in np.flatnonzero(free)]
+        result.append({
+            'grade_band': grade_band,
+            'exam_date': exam_date,
+            'day': day,
+            'periods': periods,
+            'exam_time': exam_time,
+            'available': available,
+            'count': None if available is None else len(available)
+        })
+    return result
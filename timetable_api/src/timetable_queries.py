@@ -0,0 +1,100 @@
+"""
+課表查詢層
+以單一 UNION ALL 查詢（含 class_type 區分欄位）一次取得英文班、Home Room、
+原有 Timetable 的課程，逐列直接轉為 Lesson，不建立 ORM 物件。
+"""
+from sqlalchemy import and_, case, literal, literal_column, select, union_all
+
+from src.models.timetable import db, Timetable
+from src.models.student import EnglishTimetable, HomeRoomTimetable
+from src.snapshot import Lesson
+
+# 同一實體的課程排序：英文班 -> EV & myReading -> Home Room -> 原有 Timetable
+SOURCE_ORDER = {'english': 0, 'ev_myreading': 1, 'homeroom': 2, 'regular': 3}
+
+_english = EnglishTimetable.__table__
+_homeroom = HomeRoomTimetable.__table__
+_regular = Timetable.__table__
+
+
+def _parsed_time(table):
+    """節次時間範圍；未能解析節次的資料沿用原始字串"""
+    return case(
+        (and_(table.c.start_time.isnot(None), table.c.end_time.isnot(None)),
+         table.c.start_time + '-' + table.c.end_time),
+        else_=table.c.period
+    )
+
+
+def _english_select(class_type='english', course_prefix='English - '):
+    return select(
+        literal(SOURCE_ORDER[class_type]).label('source_order'),
+        _english.c.id,
+        _english.c.day,
+        _english.c.period,
+        _english.c.period_number,
+        _parsed_time(_english).label('time'),
+        _english.c.classroom,
+        _english.c.teacher,
+        _english.c.class_name,
+        (literal(course_prefix) + _english.c.class_name).label('course_name'),
+        literal(class_type).label('class_type')
+    )
+
+
+def _homeroom_select():
+    return select(
+        literal(SOURCE_ORDER['homeroom']).label('source_order'),
+        _homeroom.c.id,
+        _homeroom.c.day,
+        _homeroom.c.period,
+        _homeroom.c.period_number,
+        _parsed_time(_homeroom).label('time'),
+        _homeroom.c.classroom,
+        _homeroom.c.teacher,
+        _homeroom.c.home_room_class_name.label('class_name'),
+        _homeroom.c.course_name,
+        literal('homeroom').label('class_type')
+    )
+
+
+def _regular_select():
+    return select(
+        literal(SOURCE_ORDER['regular']).label('source_order'),
+        _regular.c.id,
+        _regular.c.day,
+        _regular.c.period_number.label('period'),
+        _regular.c.period_number,
+        _regular.c.time_range.label('time'),
+        _regular.c.classroom,
+        _regular.c.teacher,
+        _regular.c.class_name,
+        (literal('Regular - ') + _regular.c.class_name).label('course_name'),
+        literal('regular').label('class_type')
+    )
+
+
+def _ordered(*selects):
+    return union_all(*selects).order_by(literal_column('source_order'), literal_column('id'))
+
+
+def all_lessons_query():
+    """所有課程（英文班、Home Room、原有 Timetable），供建立快照使用"""
+    return _ordered(_english_select(), _homeroom_select(), _regular_select())
+
+
+def iter_lessons(query, params=None):
+    """執行查詢並逐列轉為 Lesson（需在 app context 內呼叫）"""
+    for row in db.session.execute(query, params):
+        yield Lesson(
+            day=row.day,
+            period=row.period,
+            period_number=row.period_number or 0,
+            time=row.time,
+            classroom=row.classroom,
+            teacher=row.teacher,
+            class_name=row.class_name,
+            course_name=row.course_name,
+            class_type=row.class_type
+        )
+
@@ -0,0 +1,29 @@
+"""
+測試共用設定
+以暫存資料庫載入實際資料（data/ 目錄下的 CSV），整個測試階段共用同一個 app
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 使用暫存資料庫，避免影響正式資料（需在匯入 src.main 前設定）
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='kcislk-test-'), 'test.db')
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from src.main import app as flask_app
+
+
+@pytest.fixture(scope='session')
+def app():
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,27 @@
+"""
+批次課表：GET 回傳 405、整個串流使用同一個快照
+"""
+import json
+
+import pytest
+
+from src import batch_timetables
+from src.batch_timetables import stream_batch_timetables
+
+
+@pytest.mark.parametrize('url', ['/api/students/timetables', '/api/teachers/timetables'])
+def test_batch_path_rejects_get(client, url):
+    response = client.get(url)
+    assert response.status_code == 405
+    assert response.headers['Allow'] == 'POST'
+
+
+def test_stream_uses_snapshot_taken_before_streaming(app, monkeypatch):
+    snapshots = iter(['first', 'second'])
+    monkeypatch.setattr(batch_timetables, 'get_snapshot', lambda: next(snapshots))
+
+    with app.test_request_context():
+        response = stream_batch_timetables(['a', 'b', 'c'], lambda key, snapshot: {'key': key, 'snapshot': snapshot})
+        body = json.loads(''.join(response.response))
+
+    assert [result['snapshot'] for result in body['results']] == ['first'] * 3
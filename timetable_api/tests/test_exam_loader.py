@@ -0,0 +1,37 @@
+"""
+考試資料載入：replace=True 時清除與載入在同一個交易中，任一檔案錯誤時既有資料不變
+"""
+import contextlib
+import io
+import os
+import shutil
+
+from src import data_loader_exam
+from src.models.exam import ExamSession, ClassExamInfo, ProctorAssignment
+
+
+def exam_rows():
+    """目前資料庫中的考試資料 -> {資料表: 排序後的列}"""
+    return {
+        'sessions': sorted((row.id, row.grade_band, row.exam_date, row.periods) for row in ExamSession.query.all()),
+        'classes': sorted((row.id, row.class_name, row.exam_session_id) for row in ClassExamInfo.query.all()),
+        'proctors': sorted((row.class_exam_info_id, row.proctor_teacher, row.classroom) for row in ProctorAssignment.query.all()),
+    }
+
+
+def test_failing_csv_keeps_previous_exam_data(app, tmp_path, monkeypatch):
+    current = data_loader_exam.current_semester()
+    shutil.copytree(os.path.join(data_loader_exam.EXAMS_DIR, current), tmp_path / 'broken')
+    # classes.csv 缺少必要欄位：考試場次已寫入後，班級考試資訊才失敗
+    (tmp_path / 'broken' / 'classes.csv').write_text('class_name\nG1 Achievers\n', encoding='utf-8')
+    monkeypatch.setattr(data_loader_exam, 'EXAMS_DIR', str(tmp_path))
+    monkeypatch.setattr(data_loader_exam, 'MANIFEST_PATH', str(tmp_path / 'manifest.json'))
+
+    with app.app_context():
+        before = exam_rows()
+        assert before['sessions'] and before['classes']
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert data_loader_exam.load_all_exam_data('broken', replace=True) is False
+
+        assert exam_rows() == before
@@ -0,0 +1,30 @@
+"""
+考試路由：學生人數一致性報告
+"""
+import os
+import shutil
+
+from src import data_loader_exam
+
+
+def test_drift_rejects_unknown_semester(client):
+    response = client.get('/api/exams/student-counts/drift?semester=../../etc')
+    assert response.status_code == 400
+    assert response.get_json()['available_semesters'] == data_loader_exam.list_semesters()
+
+
+def test_drift_reflects_roster_file_changes(client, tmp_path, monkeypatch):
+    current = data_loader_exam.current_semester()
+    shutil.copytree(os.path.join(data_loader_exam.EXAMS_DIR, current), tmp_path / current)
+    monkeypatch.setattr(data_loader_exam, 'EXAMS_DIR', str(tmp_path))
+    url = f'/api/exams/student-counts/drift?semester={current}'
+
+    before = client.get(url).get_json()
+    assert before['checked'] > 1
+
+    # 直接修改 classes.csv 不會遞增資料版本，報告仍需反映檔案內容
+    classes_path = tmp_path / current / 'classes.csv'
+    lines = classes_path.read_text(encoding='utf-8').splitlines()
+    classes_path.write_text('\n'.join(lines[:2]) + '\n', encoding='utf-8')
+
+    assert client.get(url).get_json()['checked'] == 1
@@ -0,0 +1,25 @@
+"""
+課表資料熱更新：跨行程互斥
+"""
+import contextlib
+import fcntl
+import io
+
+import pytest
+
+from src.hot_reload import RELOAD_LOCK_SUFFIX, ReloadInProgressError, reload_timetable_data
+from src.models.timetable import db
+
+
+def test_reload_refused_while_another_worker_holds_the_lock(app):
+    with app.app_context():
+        # 另外開啟的檔案描述即相當於其他 worker 行程持有的鎖
+        with open(db.engine.url.database + RELOAD_LOCK_SUFFIX, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            with pytest.raises(ReloadInProgressError):
+                reload_timetable_data()
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = reload_timetable_data()
+        assert report['success'], report['errors']
@@ -0,0 +1,104 @@
+"""
+監考衝突檢查：區間索引、批次資料與自動分配的占用判斷
+"""
+from collections import defaultdict
+
+import pytest
+
+from src import proctor_conflicts
+from src.proctor_conflicts import (
+    Booking, ConflictIndex, IntervalList, Slot, check_batch_conflicts, teacher_name_tokens
+)
+from src.proctor_solver import ExamClass, ProctorSolver
+
+
+def slot(class_exam_info_id, exam_time, exam_date='2025-12-02'):
+    return Slot(class_exam_info_id, f'Class {class_exam_info_id}', exam_date, exam_time,
+                *proctor_conflicts.parse_time_range(exam_time))
+
+
+@pytest.fixture
+def use_index(monkeypatch):
+    """以指定的班級時段與既有分配取代資料庫的衝突索引"""
+    def install(slots, bookings=()):
+        index = ConflictIndex({item.class_exam_info_id: item for item in slots})
+        for class_exam_info_id, proctor_teacher, classroom in bookings:
+            index.add(Booking(index.slots[class_exam_info_id], class_exam_info_id, proctor_teacher, classroom))
+        monkeypatch.setattr(proctor_conflicts, 'get_conflict_index', lambda: index)
+        return index
+    return install
+
+
+def test_interval_list_overlapping():
+    intervals = IntervalList()
+    long_slot = slot(1, '08:00-12:00')
+    intervals.add(Booking(long_slot, 1, 'A', ''))
+    intervals.add(Booking(slot(2, '08:30-09:00'), 2, 'A', ''))
+    intervals.add(Booking(slot(3, '13:00-14:00'), 3, 'A', ''))
+
+    found = intervals.overlapping(*proctor_conflicts.parse_time_range('10:00-10:30'))
+    assert [booking.slot.class_exam_info_id for booking in found] == [1]
+    assert intervals.overlapping(*proctor_conflicts.parse_time_range('12:00-13:00')) == []
+
+
+def test_batch_rejects_second_of_two_colliding_rows(use_index):
+    use_index([slot(1, '08:30-09:50'), slot(2, '09:00-10:00')])
+    rows = [
+        (0, 1, {'proctor_teacher': 'Mr. Test', 'classroom': 'E101'}),
+        (1, 2, {'proctor_teacher': 'Mr. Test', 'classroom': 'E102'}),
+    ]
+
+    valid_rows, errors = check_batch_conflicts(rows)
+
+    assert valid_rows == rows[:1]
+    assert [(error.index, error.class_exam_info_id) for error in errors] == [(1, 2)]
+    assert 'Mr. Test' in errors[0].error
+
+
+def test_batch_rechecks_rows_against_kept_assignments(use_index):
+    # 班級 2 原由 Mr. Test 監考；批次中班級 1 改由 Mr. Test 監考（班級 2 將換人，因此先通過），
+    # 但班級 2 的新教室與班級 3 衝突而不寫入，保留的 Mr. Test 便與班級 1 衝突
+    use_index(
+        [slot(1, '08:30-09:50'), slot(2, '09:00-10:00'), slot(3, '09:00-10:00')],
+        [(2, 'Mr. Test', 'E102'), (3, 'Ms. Other', 'E103')]
+    )
+    rows = [
+        (0, 1, {'proctor_teacher': 'Mr. Test', 'classroom': 'E101'}),
+        (1, 2, {'proctor_teacher': 'Ms. New', 'classroom': 'E103'}),
+    ]
+
+    valid_rows, errors = check_batch_conflicts(rows)
+
+    assert valid_rows == []
+    assert [error.index for error in errors] == [0, 1]
+
+
+def test_create_proctor_rejects_non_integer_class_id(client):
+    response = client.post('/api/exams/proctors', json={
+        'class_exam_info_id': 'abc', 'proctor_teacher': 'Mr. Test', 'classroom': 'E101'
+    })
+    assert response.status_code == 400
+    assert 'class_exam_info_id' in response.get_json()['error']
+
+
+def test_titled_and_full_teacher_names_conflict():
+    by_token = teacher_name_tokens(['Carlo Van Rensburg', 'Ann Lee'])
+    index = ConflictIndex(by_token=by_token)
+    index.slots = {1: slot(1, '08:30-09:50'), 2: slot(2, '09:00-10:00')}
+    index.add(Booking(index.slots[1], 1, 'Carlo Van Rensburg', 'E101'))
+
+    conflicts = index.check(index.booking_for(2, 'Mr. Van', 'E102'))
+
+    assert [(conflict['type'], conflict['resource']) for conflict in conflicts] == [('teacher', 'Carlo Van Rensburg')]
+
+
+def test_solver_frees_lessons_only_on_exam_date():
+    solver = ProctorSolver.__new__(ProctorSolver)
+    solver.teacher_busy = {('Tuesday', 3): [('G1', 'Ann Lee')]}
+    solver.examining = defaultdict(set, {('2025-12-02', 3): {'G1'}})
+    exam_class = ExamClass(slot(1, '10:30-11:45'), 'G2', "G2 LT's", 21, 'Tuesday', (3,))
+    # 下一週的同一個星期二，G1 沒有考試而照常上課
+    next_week = exam_class._replace(slot=slot(2, '10:30-11:45', exam_date='2025-12-09'))
+
+    assert solver._busy(solver.teacher_busy, exam_class) == set()
+    assert solver._busy(solver.teacher_busy, next_week) == {'Ann Lee'}
@@ -0,0 +1,219 @@
+"""
+查詢計畫與查詢次數檢查
+以測試資料庫逐一呼叫所有 GET 路由、考試寫入路由與批次課表路由，記錄每個路由執行的 SQL：
+
+1. 以 EXPLAIN QUERY PLAN 檢查是否有全表掃描（SCAN 且未使用索引）。
+   不帶 WHERE 條件的查詢（列出整張資料表）本來就需要讀取所有資料，不視為問題；
+   以 LIKE '%關鍵字%' 做子字串比對的路由無法使用 B-tree 索引，列於 KNOWN_SCANS 並註明原因。
+2. 路由的 SQL 數量不得超過 EXPECTED_QUERY_COUNTS，避免逐筆延遲載入（N+1）再次出現。
+"""
+import re
+from urllib.parse import quote
+
+import pytest
+from sqlalchemy import event
+
+from src.models.timetable import db, Classroom
+from src.models.student import Student, EnglishTimetable
+from src.models.exam import ExamSession, ClassExamInfo, ProctorAssignment
+
+# 已知無法使用索引的路由（子字串比對）
+KNOWN_SCANS = {
+    'teacher.search_teachers': "teacher_name LIKE '%q%'（SEARCH_BACKEND=fts 時改用 FTS5）",
+    'timetable.search_courses': "課程篩選條件為 ILIKE '%q%'",
+}
+
+# 與其他路由同名但代表不同資料的參數: {endpoint: {參數: sample_args() 的鍵}}
+ENDPOINT_ARGS = {
+    'exam.get_class_exam_info': {'class_name': 'exam_class_name'},
+}
+
+# 考試路由的 SQL 數量上限（與資料筆數無關）
+EXPECTED_QUERY_COUNTS = {
+    'exam.get_all_exam_sessions': 1,
+    'exam.get_exam_session': 1,
+    'exam.get_sessions_by_date': 1,
+    'exam.get_all_class_exam_info': 1,
+    'exam.get_classes_by_grade_band': 2,
+    'exam.get_class_exam_info': 1,
+    'exam.get_all_proctors': 1,
+    'exam.export_all_to_csv': 1,
+    'exam.export_grade_band_to_csv': 2,
+    'exam.get_exam_stats': 1,
+    'exam.get_student_count_drift': 2,
+    'exam.get_proctor_conflicts': 1,
+    # 寫入路由含一次衝突索引重建（前一次寫入已使索引失效）
+    'exam.create_proctor_assignment': 5,
+    'exam.update_proctor_assignment': 5,
+    'exam.delete_proctor_assignment': 2,
+    'exam.batch_create_proctor_assignments': 4,
+    # 批次課表取自記憶體快照
+    'student.get_student_timetables': 0,
+    'teacher.get_teacher_timetables': 0,
+}
+
+# 路由以外額外檢查的查詢字串
+EXTRA_URLS = [
+    '/api/students/search?q=chen',
+    '/api/teachers/search?q=john',
+    '/api/teachers/available?day=Monday&period=3-4',
+    '/api/classrooms/free?day=Tuesday&period=5',
+    '/api/classes/102/students?include=timetables',
+    '/api/classrooms/free?date=2026-01-06&period=5&floor=E3',
+    '/api/search?class_name=G1&day=Monday',
+    '/api/search?q=chen',
+    '/api/search?q=G1',
+]
+
+SCAN_PATTERN = re.compile(r'^SCAN (\S+)')
+
+
+def sample_args():
+    """路由參數的範例值（取自實際資料）"""
+    session = ExamSession.query.first()
+    return {
+        'student_id': Student.query.first().student_id,
+        'teacher_name': db.session.query(EnglishTimetable.teacher).first()[0],
+        'class_name': db.session.query(EnglishTimetable.class_name).first()[0],
+        'exam_class_name': ClassExamInfo.query.first().class_name,
+        'classroom_name': Classroom.query.first().classroom_name,
+        'day': 'Monday',
+        'grade_band': session.grade_band,
+        'session_id': session.id,
+        'date': session.exam_date,
+    }
+
+
+def route_urls(app, args):
+    """所有 GET 路由（以範例值代入參數）-> [(endpoint, url)]"""
+    urls = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if 'GET' not in rule.methods or rule.endpoint == 'static':
+            continue
+        if any(name not in args for name in rule.arguments):
+            continue
+        url = rule.rule
+        for name in rule.arguments:
+            value = args[ENDPOINT_ARGS.get(rule.endpoint, {}).get(name, name)]
+            url = re.sub(rf'<(?:\w+:)?{name}>', quote(str(value)), url)
+        urls.append((rule.endpoint, url))
+    for url in EXTRA_URLS:
+        endpoint, _ = app.url_map.bind('').match(url.split('?')[0])
+        urls.append((endpoint, url))
+    return urls
+
+
+def write_requests(args):
+    """
+    考試寫入路由：刪除、重新新增、更新同一筆監考分配，再批次更新 20 筆；
+    以及批次課表路由（POST） -> [(endpoint, method, url, json)]
+    """
+    proctor = ProctorAssignment.query.first()
+    proctor_id = proctor.id
+    payload = {
+        'class_exam_info_id': proctor.class_exam_info_id,
+        'proctor_teacher': proctor.proctor_teacher,
+        'classroom': proctor.classroom,
+        'notes': proctor.notes or ''
+    }
+    return [
+        ('exam.delete_proctor_assignment', 'DELETE', f'/api/exams/proctors/{proctor_id}', None),
+        ('exam.create_proctor_assignment', 'POST', '/api/exams/proctors', payload),
+        # 重新新增後的 ID 於執行時取得
+        ('exam.update_proctor_assignment', 'PUT', None, {'classroom': payload['classroom'], 'notes': payload['notes']}),
+        ('exam.batch_create_proctor_assignments', 'POST', '/api/exams/proctors/batch', {
+            'assignments': [
+                {**payload, 'class_exam_info_id': proctor.class_exam_info_id + offset} for offset in range(20)
+            ]
+        }),
+        ('student.get_student_timetables', 'POST', '/api/students/timetables', {
+            'student_ids': [student.student_id for student in Student.query.limit(30)]
+        }),
+        ('teacher.get_teacher_timetables', 'POST', '/api/teachers/timetables', {
+            'teacher_names': [args['teacher_name']]
+        }),
+    ]
+
+
+def full_scans(connection, statement, parameters):
+    """回傳此查詢計畫中未使用索引的 SCAN 資料表"""
+    plan = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+    scans = []
+    for row in plan:
+        detail = row[-1]
+        match = SCAN_PATTERN.match(detail)
+        if match and 'USING' not in detail and 'VIRTUAL TABLE' not in detail:
+            scans.append(match.group(1))
+    return scans
+
+
+def _run_routes(app):
+    """呼叫所有路由並記錄各自執行的 SQL -> [(endpoint, url, status, [(statement, parameters)])]"""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith('PRAGMA'):
+            captured.append((statement, parameters))
+
+    client = app.test_client()
+    results = []
+    with app.app_context():
+        urls = route_urls(app, sample_args())
+        writes = write_requests(sample_args())
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            for endpoint, url in urls:
+                captured.clear()
+                status = client.get(url).status_code
+                results.append((endpoint, url, status, list(captured)))
+
+            created_id = None
+            for endpoint, method, url, payload in writes:
+                url = url or f'/api/exams/proctors/{created_id}'
+                captured.clear()
+                response = client.open(url, method=method, json=payload)
+                response.get_data()
+                if method == 'POST' and response.status_code == 201:
+                    created_id = response.get_json()['proctor']['id']
+                results.append((endpoint, f'{method} {url}', response.status_code, list(captured)))
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+    return results
+
+
+@pytest.fixture(scope='module')
+def route_results(app):
+    return _run_routes(app)
+
+
+def test_routes_do_not_fail(route_results):
+    failed = [f'{url} -> {status}' for _, url, status, _ in route_results if status >= 500]
+    assert not failed, '\n'.join(failed)
+
+
+def test_no_unexpected_full_scans(app, route_results):
+    failures = []
+    with app.app_context(), db.engine.connect() as connection:
+        for endpoint, url, _, statements in route_results:
+            if endpoint in KNOWN_SCANS:
+                continue
+            for statement, parameters in statements:
+                if not statement.lstrip().upper().startswith('SELECT'):
+                    continue
+                if not re.search(r'\bWHERE\b', statement, re.IGNORECASE):
+                    continue
+                scans = full_scans(connection, statement, parameters)
+                if scans:
+                    failures.append(f"{url}: SCAN {', '.join(scans)}: {' '.join(statement.split())[:200]}")
+    assert not failures, '\n'.join(failures)
+
+
+def test_query_counts_within_limits(route_results):
+    checked = {endpoint for endpoint, _, _, _ in route_results}
+    assert set(EXPECTED_QUERY_COUNTS) <= checked, f'未呼叫的路由: {set(EXPECTED_QUERY_COUNTS) - checked}'
+    failures = [
+        f'{url}: 查詢次數 {len(statements)} 超過上限 {EXPECTED_QUERY_COUNTS[endpoint]}'
+        for endpoint, url, _, statements in route_results
+        if endpoint in EXPECTED_QUERY_COUNTS and len(statements) > EXPECTED_QUERY_COUNTS[endpoint]
+    ]
+    assert not failures, '\n'.join(failures)
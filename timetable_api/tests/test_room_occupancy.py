@@ -0,0 +1,40 @@
+"""
+空教室索引：考試日期的教室占用
+"""
+from types import SimpleNamespace
+
+from src.room_occupancy import RoomOccupancy
+
+
+def lesson(class_name, classroom, day='Tuesday', period_number=3):
+    return SimpleNamespace(class_name=class_name, classroom=classroom, day=day,
+                           period_number=period_number, class_type='english')
+
+
+def occupancy(exam_bookings):
+    snapshot = SimpleNamespace(
+        classroom_names=['E101', 'E102', 'E201'],
+        class_lessons={
+            'G1 Achievers': [lesson('G1 Achievers', 'E101')],
+            'G1 Discoverers': [lesson('G1 Discoverers', 'E102')],
+        }
+    )
+    return RoomOccupancy(snapshot, exam_bookings)
+
+
+def test_assigned_exam_room_is_occupied_and_regular_rooms_freed():
+    rooms = occupancy([
+        ('E201', "G1 Achievers (LT)", 'G1', '2025-12-02', 'P3-P4'),
+        ('E201', "G1 Discoverers (LT)", 'G1', '2025-12-02', 'P3-P4'),
+    ])
+    assert rooms.free_rooms('Tuesday', 3, exam_date='2025-12-02') == ('E101', 'E102')
+
+
+def test_exam_without_proctor_keeps_regular_room_occupied():
+    rooms = occupancy([
+        ('E201', "G1 Achievers (LT)", 'G1', '2025-12-02', 'P3-P4'),
+        (None, "G1 Discoverers (LT)", 'G1', '2025-12-02', 'P3-P4'),
+    ])
+    assert rooms.free_rooms('Tuesday', 3, exam_date='2025-12-02') == ('E101',)
+    # 一般週課表不受影響
+    assert rooms.free_rooms('Tuesday', 3) == ('E201',)
@@ -0,0 +1,11 @@
+"""
+WSGI 進入點（正式環境）：gunicorn -c gunicorn.conf.py wsgi:app
+開發時仍可使用 python run_server.py
+"""
+import os
+import sys
+
+# Add current directory to Python path for module imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.main import app